@@ -8,25 +8,49 @@ from datetime import datetime
 from functools import wraps
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-from wards_route import ward_bp
+
+# Before any local import: utils modules read their settings at import time
+load_dotenv()
+
+from wards_route import ward_bp, locate_ward
 
 
 from utils.pdf_processor import extract_data_from_pdf, extract_projects_from_pdf, generate_project_summary
 from utils.context_generator import extract_keywords_from_query, add_context_to_results
+from utils.llm_guard import Deadline
+from utils import metrics
+from utils import request_metrics
+from utils import plan_audit
+from utils.request_metrics import traced_connect
+from utils.http_cache import conditional_get
+from utils.geojson_cache import geojson_response, geojson_document, zoom_transform, ward_feature_collection
+from utils.geometry import band_for_zoom, ZOOM_BANDS
+from utils.ward_locator import get_locator
+from utils import gazetteer
+from utils import compression
+from utils.admission import limit
+from utils.db_writer import write, run_write
+from utils.fast_json import FastJSONProvider
+from utils.geometry_registry import geometry_path
+from utils.semantic_index import SemanticIndex
 from utils.database import (
     init_database, get_city_id, get_all_cities,
-    insert_projects, search_projects, get_ward_stats, get_statistics,
+    insert_projects, search_projects, search_projects_tiered, get_ward_stats, get_statistics,
     get_meetings, create_user, authenticate_user, get_user_by_id,
     insert_complaint, get_complaints_for_user, get_all_complaints,
     update_complaint_status, add_follow_up, remove_follow_up,
-    get_followed_projects, DATABASE_PATH,
+    get_followed_projects, DATABASE_PATH, get_data_version, CITY_LIST, WARD_GROUP_SQL,
+    create_session, get_session_user, delete_session, SESSION_TTL_SECONDS,
+    parse_fields, project_columns, PROJECT_FIELDS,
     insert_review, get_reviews_for_contractor, get_contractor_rating, has_user_reviewed,
 )
 
-load_dotenv()
-
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, supports_credentials=True)
+# Metrics hooks first: after_request runs in reverse, so they see the compressed size
+request_metrics.init_flask(app)
+compression.init_app(app)
 
 UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", "uploads")
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
@@ -36,7 +60,9 @@ app.secret_key = os.environ.get("SECRET_KEY", secrets.token_hex(32))
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 init_database()
 
-_sessions = {}
+# Ranks free-text questions against project text; refreshed on data changes
+semantic_index = SemanticIndex(DATABASE_PATH)
+semantic_index.refresh(force=True)
 
 app.register_blueprint(ward_bp, url_prefix="/api/wards")
 
@@ -48,9 +74,7 @@ def get_current_user():
     token = request.headers.get("Authorization", "").replace("Bearer ", "").strip()
     if not token:
         token = request.cookies.get("token", "")
-    if token and token in _sessions:
-        return get_user_by_id(_sessions[token])
-    return None
+    return get_session_user(token)
 
 
 def require_auth(f):
@@ -93,6 +117,43 @@ def resolve_city_id():
     return get_city_id(city_name)
 
 
+def city_data_version():
+    """Version of the data behind a city-scoped read (all cities when unresolved)."""
+    cid = resolve_city_id()
+    return f"{cid}:{get_data_version(cid)}"
+
+
+def with_fields(f):
+    """Validate ?fields= into g.fields (None = every column); 400 on unknown names."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        try:
+            g.fields = parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e), "fields": list(PROJECT_FIELDS)}), 400
+        return f(*args, **kwargs)
+    return decorated
+
+
+def project_list(key, rows, **extra):
+    """{key: rows, "count": n, **extra}; with ?format=compact the rows are
+    {"columns": [...], "rows": [[...], ...]}, column names sent once."""
+    if request.args.get("format") == "compact":
+        rows_out = {"columns": list(rows[0]) if rows else list(g.get("fields") or []),
+                    "rows": [list(r.values()) for r in rows]}
+    else:
+        rows_out = rows
+    return jsonify({**extra, key: rows_out, "count": len(rows)})
+
+
+def all_data_version():
+    return get_data_version()
+
+
+def city_list_version():
+    return get_data_version(CITY_LIST)
+
+
 # ==================== AUTH ====================
 
 
@@ -111,11 +172,10 @@ def signup():
     if not user_id:
         return jsonify({"error": "Username already taken"}), 409
 
-    token = secrets.token_hex(32)
-    _sessions[token] = user_id
+    token = create_session(user_id)
     user = get_user_by_id(user_id)
     resp = jsonify({"success": True, "token": token, "user": user})
-    resp.set_cookie("token", token, httponly=True, samesite="Lax", max_age=604800)
+    resp.set_cookie("token", token, httponly=True, samesite="Lax", max_age=SESSION_TTL_SECONDS)
     return resp
 
 
@@ -128,11 +188,10 @@ def login():
     if not user:
         return jsonify({"error": "Invalid credentials"}), 401
 
-    token = secrets.token_hex(32)
-    _sessions[token] = user["id"]
+    token = create_session(user["id"])
     safe = {k: v for k, v in user.items() if k != "password"}
     resp = jsonify({"success": True, "token": token, "user": safe})
-    resp.set_cookie("token", token, httponly=True, samesite="Lax", max_age=604800)
+    resp.set_cookie("token", token, httponly=True, samesite="Lax", max_age=SESSION_TTL_SECONDS)
     return resp
 
 
@@ -145,7 +204,8 @@ def get_me():
 @app.route("/api/auth/logout", methods=["POST"])
 def logout():
     token = request.headers.get("Authorization", "").replace("Bearer ", "").strip() or request.cookies.get("token", "")
-    _sessions.pop(token, None)
+    if token:
+        delete_session(token)
     resp = jsonify({"success": True})
     resp.delete_cookie("token")
     return resp
@@ -159,11 +219,25 @@ def health():
     return jsonify({"status": "healthy"})
 
 
+@app.route("/metrics")
+def api_metrics():
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
+@app.route("/api/debug/query-plans")
+def api_query_plans():
+    """Plans seen so far (SQL_PLAN_AUDIT=1 only); ?scans=1 lists full scans only."""
+    if not plan_audit.enabled:
+        return jsonify({"error": "Query plan audit is off (set SQL_PLAN_AUDIT=1)"}), 404
+    return jsonify({"statements": plan_audit.report(scans_only=request.args.get("scans") == "1")})
+
+
 # ==================== ADMIN — PDF ====================
 
 
 @app.route("/api/admin/upload-pdf", methods=["POST"])
 @require_admin
+@limit("upload")
 def admin_upload():
     if "file" not in request.files:
         return jsonify({"error": "No file"}), 400
@@ -194,8 +268,7 @@ def admin_upload():
         elapsed = time.perf_counter() - start
 
         # Insert meeting with extracted metadata
-        conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-        conn.execute("""
+        write(DATABASE_PATH, """
             INSERT INTO meetings (city_id, ward_no, ward_name, meet_date, meet_type,
                 venue, objective, attendees, projects_discussed, source_pdf, project_count)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -212,8 +285,7 @@ def admin_upload():
             filename,
             len(projects),
         ))
-        conn.commit()
-        conn.close()
+        semantic_index.refresh(force=True)
 
         return jsonify({
             "success": True,
@@ -250,6 +322,7 @@ def admin_update_complaint(complaint_id):
 
 
 @app.route("/api/query", methods=["POST"])
+@limit("llm")
 def query_projects():
     data = request.get_json()
     if not data or not data.get("query"):
@@ -257,31 +330,34 @@ def query_projects():
 
     user_query = data["query"]
     city_id = get_city_id(data.get("city") or request.headers.get("X-City") or "mumbai")
+    # One latency budget for every LLM call this request makes
+    deadline = Deadline()
 
     try:
-        keywords = extract_keywords_from_query(user_query)
+        keywords = extract_keywords_from_query(user_query, deadline=deadline)
         keyword_str = " ".join(keywords.get("keywords", []))
 
-        # First: structured search with extracted parameters
-        results = search_projects(
+        filters = {k: v for k, v in (
+            ("ward_no", keywords.get("ward_no")),
+            ("ward_name", keywords.get("ward_name")),
+            ("ward_zone", keywords.get("ward_zone")),
+            ("project_type", keywords.get("project_type")),
+            ("status", keywords.get("status")),
+            ("corporator", keywords.get("corporator_name")),
+            ("contractor", keywords.get("contractor_name")),
+        ) if v}
+
+        # All fallbacks in one statement: structured filters, then text-similarity
+        # hits in this city, then in any city, then any raw query word
+        results = search_projects_tiered(
             city_id=city_id,
-            ward_no=keywords.get("ward_no"),
-            ward_name=keywords.get("ward_name"),
-            project_type=keywords.get("project_type"),
-            status=keywords.get("status"),
-            corporator=keywords.get("corporator_name"),
+            filters=filters,
             keyword=keyword_str if keyword_str.strip() else None,
+            query=user_query,
+            ranked=semantic_index.rank(user_query, city_id=city_id),
         )
 
-        # Second: raw keyword search as fallback
-        if not results:
-            results = search_projects(city_id=city_id, keyword=user_query)
-
-        # Third: try without city filter (maybe user means a different city)
-        if not results:
-            results = search_projects(keyword=user_query)
-
-        context = add_context_to_results(user_query, results)
+        context = add_context_to_results(user_query, results, deadline=deadline)
 
         # context is now a dict with {found, answer, suggestions}
         if isinstance(context, dict):
@@ -312,6 +388,8 @@ def query_projects():
 
 
 @app.route("/api/projects")
+@conditional_get(city_data_version)
+@with_fields
 def api_projects():
     cid = resolve_city_id()
     results = search_projects(
@@ -320,11 +398,13 @@ def api_projects():
         project_type=request.args.get("type"),
         status=request.args.get("status"),
         keyword=request.args.get("q"),
+        fields=g.fields,
     )
-    return jsonify({"projects": results, "count": len(results)})
+    return project_list("projects", results)
 
 
 @app.route("/api/projects/delayed")
+@conditional_get(city_data_version)
 def api_delayed():
     cid = resolve_city_id()
     delayed = search_projects(city_id=cid, status="delayed")
@@ -335,8 +415,9 @@ def api_delayed():
 
 
 @app.route("/api/projects/<int:pid>")
+@conditional_get(all_data_version)
 def api_project(pid):
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     row = conn.execute("""
         SELECT p.*, c.city_name FROM projects p
@@ -369,25 +450,28 @@ def unfollow():
 
 @app.route("/api/following")
 @require_auth
+@with_fields
 def following():
-    projects = get_followed_projects(g.user["id"])
-    return jsonify({"projects": projects, "count": len(projects)})
+    projects = get_followed_projects(g.user["id"], fields=g.fields)
+    return project_list("projects", projects)
 
 
 # ==================== WARDS ====================
 
 
 @app.route("/api/wards")
+@conditional_get(city_data_version)
 def api_wards():
     cid = resolve_city_id()
     return jsonify(get_ward_stats(city_id=cid))
 
 
 @app.route("/api/wards/stats")
+@conditional_get(city_data_version)
 def api_wards_stats():
     """Ward stats in the shape WardMap expects."""
     cid = resolve_city_id()
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     params = []
     w = ""
@@ -396,7 +480,7 @@ def api_wards_stats():
         params.append(cid)
     rows = conn.execute(f"""
         SELECT
-            ward_no,
+            {WARD_GROUP_SQL} as ward,
             MAX(ward_name) as ward_name,
             MAX(corporator_name) as corporator_name,
             COUNT(*) as total,
@@ -409,16 +493,16 @@ def api_wards_stats():
         FROM projects
         WHERE ward_no IS NOT NULL AND ward_no != ''
         {w}
-        GROUP BY ward_no
-        ORDER BY ward_no
+        GROUP BY {WARD_GROUP_SQL}
+        ORDER BY {WARD_GROUP_SQL}
     """, params).fetchall()
     conn.close()
     result = []
     for r in rows:
         d = dict(r)
         result.append({
-            "wardNumber": d["ward_no"],
-            "wardName": d["ward_name"] or f"Ward {d['ward_no']}",
+            "wardNumber": d["ward"],
+            "wardName": d["ward_name"] or f"Ward {d['ward']}",
             "corporatorName": d["corporator_name"] or "",
             "total": d["total"],
             "completed": d["completed"],
@@ -433,38 +517,27 @@ def api_wards_stats():
 
 @app.route("/api/wards/geojson")
 def api_wards_geojson():
-    """Serve ward GeoJSON with CORS headers."""
-    geojson_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "wards.geojson")
-    if not os.path.exists(geojson_path):
-        return jsonify({"type": "FeatureCollection", "features": []}), 200
-    with open(geojson_path, "r", encoding="utf-8") as f:
-        import json as _json
-        raw = _json.load(f)
-    features = []
-    for feat in raw.get("features", []):
-        try:
-            wn = int(feat["properties"].get("note", 0))
-        except (ValueError, TypeError):
-            wn = 0
-        features.append({
-            "type": "Feature",
-            "properties": {"wardNumber": wn, "wardName": f"Ward {wn}"},
-            "geometry": feat["geometry"],
-        })
-    return jsonify({"type": "FeatureCollection", "features": features})
+    """Serve ward GeoJSON for ?city= (pre-serialised and compressed, see utils/geojson_cache)."""
+    path = geometry_path(request.args.get("city"))
+    if path is None:
+        return jsonify({"error": "No ward geometry for this city"}), 404
+    return geojson_response(path, zoom_transform(band_for_zoom(request.args.get("zoom", type=int))))
 
 
 @app.route("/api/projects/ward/<ward_no>")
+@conditional_get(city_data_version)
+@with_fields
 def api_ward_projects(ward_no):
     cid = resolve_city_id()
-    projects = search_projects(city_id=cid, ward_no=ward_no)
-    return jsonify({"ward_no": ward_no, "projects": projects, "count": len(projects)})
+    projects = search_projects(city_id=cid, ward_no=ward_no, fields=g.fields)
+    return project_list("projects", projects, ward_no=ward_no)
 
 
 # ==================== MEETINGS ====================
 
 
 @app.route("/api/meetings")
+@conditional_get(city_data_version)
 def api_meetings():
     cid = resolve_city_id()
     ward = request.args.get("ward")
@@ -482,6 +555,14 @@ def submit_complaint():
         return jsonify({"error": "Description required"}), 400
     user = get_current_user()
     cid = get_city_id(data.get("city") or "mumbai")
+    # Tag the ward from coordinates when the citizen did not give one
+    if not data.get("ward_no") and data.get("lat") is not None and data.get("lng") is not None:
+        try:
+            ward = locate_ward(float(data["lat"]), float(data["lng"]), data.get("city"))
+        except (TypeError, ValueError):
+            ward = None
+        if ward:
+            data["ward_no"] = str(ward["wardNumber"])
     complaint_id = insert_complaint(data, user_id=user["id"] if user else None, city_id=cid)
     return jsonify({"success": True, "complaint_id": complaint_id})
 
@@ -500,6 +581,7 @@ def api_complaints():
 
 
 @app.route("/api/stats")
+@conditional_get(city_data_version)
 def api_stats():
     cid = resolve_city_id()
     return jsonify(get_statistics(city_id=cid))
@@ -509,6 +591,8 @@ def api_stats():
 
 
 @app.route("/api/search")
+@conditional_get(city_data_version)
+@with_fields
 def api_search():
     cid = resolve_city_id()
     results = search_projects(
@@ -519,17 +603,19 @@ def api_search():
         keyword=request.args.get("q"),
         corporator=request.args.get("corporator"),
         min_delay=request.args.get("min_delay", type=int),
+        fields=g.fields,
     )
-    return jsonify({"results": results, "count": len(results)})
+    return project_list("results", results)
 
 
 # ==================== CONTRACTORS ====================
 
 
 @app.route("/api/contractors")
+@conditional_get(city_data_version)
 def api_contractors():
     cid = resolve_city_id()
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     params = []
     w = ""
@@ -547,7 +633,7 @@ def api_contractors():
             COALESCE(SUM(budget), 0) as total_budget,
             COALESCE(AVG(CASE WHEN delay_days > 0 THEN delay_days END), 0) as avg_delay_days,
             MAX(delay_days) as max_delay_days,
-            COUNT(DISTINCT ward_no) as wards_count,
+            COUNT(DISTINCT {WARD_GROUP_SQL}) as wards_count,
             GROUP_CONCAT(DISTINCT project_type) as project_types
         FROM projects
         WHERE contractor_name IS NOT NULL AND contractor_name != ''
@@ -568,13 +654,15 @@ def api_contractors():
 
 
 @app.route("/api/contractor-projects")
+@conditional_get(city_data_version)
+@with_fields
 def api_contractor_projects():
     """Get projects for a specific contractor using ?name= query param."""
     contractor_name = request.args.get("name", "").strip()
     if not contractor_name:
         return jsonify({"error": "name parameter required"}), 400
     cid = resolve_city_id()
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     params = [contractor_name]
     w = ""
@@ -582,13 +670,13 @@ def api_contractor_projects():
         w = " AND p.city_id=?"
         params.append(cid)
     projects_rows = conn.execute(f"""
-        SELECT p.*, c.city_name FROM projects p
+        SELECT {project_columns(g.fields)} FROM projects p
         JOIN city c ON p.city_id=c.city_id
         WHERE LOWER(p.contractor_name)=LOWER(?) {w}
         ORDER BY p.delay_days DESC, p.created_at DESC
     """, params).fetchall()
     conn.close()
-    return jsonify({"projects": [dict(r) for r in projects_rows], "count": len(projects_rows)})
+    return project_list("projects", [dict(r) for r in projects_rows])
 
 
 # ==================== CONTRACTOR REVIEWS ====================
@@ -651,11 +739,8 @@ def api_promote_user():
         return jsonify({"error": "username required"}), 400
     if role not in ("user", "authorized_user", "admin"):
         return jsonify({"error": "invalid role"}), 400
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.execute("UPDATE users SET role=? WHERE username=?", (role, username))
-    conn.commit()
-    affected = conn.execute("SELECT changes()").fetchone()[0]
-    conn.close()
+    affected = run_write(DATABASE_PATH, lambda conn: conn.execute(
+        "UPDATE users SET role=? WHERE username=?", (role, username)).rowcount)
     if not affected:
         return jsonify({"error": "User not found"}), 404
     return jsonify({"success": True, "username": username, "new_role": role})
@@ -665,6 +750,7 @@ def api_promote_user():
 
 
 @app.route("/api/cities")
+@conditional_get(city_list_version)
 def api_cities():
     cities = get_all_cities()
     config = {
@@ -677,6 +763,44 @@ def api_cities():
     ])
 
 
+# ==================== WARM-UP ====================
+
+# Read endpoints whose responses are primed into the HTTP cache per city
+WARM_PATHS = ("/api/stats", "/api/wards", "/api/wards/stats", "/api/contractors")
+
+
+def warm_up():
+    """Fill this process's caches before it takes traffic (see wsgi.py).
+
+    Cities, the query-parser vocabulary, the default city's ward geometry
+    (every zoom band, plus the point locator) and the aggregate endpoints.
+    Run it before workers fork and they all share the result.
+    """
+    started = datetime.now()
+    cities = [c["city_name"] for c in get_all_cities()]
+    for name in cities:
+        get_city_id(name)
+    gazetteer.get_gazetteer()
+    semantic_index.refresh(force=True)
+
+    path = geometry_path()
+    if path:
+        for band in ZOOM_BANDS + (None,):
+            geojson_document(path, zoom_transform(band))
+        get_locator(path, ward_feature_collection)
+
+    client = app.test_client()
+    client.get("/api/cities")
+    for name in cities:
+        for url in WARM_PATHS:
+            client.get(url, query_string={"city": name})
+    if path:
+        # The map page's request, for every band it can ask for
+        for band in ZOOM_BANDS:
+            client.get("/api/wards/map", query_string={"zoom": band})
+    print(f"[warm_up] {len(cities)} cities ready in {(datetime.now() - started).total_seconds():.2f}s")
+
+
 # ==================== MAIN ====================
 
 
@@ -684,4 +808,5 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     print(f"\n  JanSaakshi API — http://localhost:{port}")
     print(f"  DB: {DATABASE_PATH}  |  Uploads: {UPLOAD_FOLDER}\n")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    # Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    app.run(host="0.0.0.0", port=port, debug=os.environ.get("FLASK_DEBUG", "0") == "1")
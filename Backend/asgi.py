@@ -0,0 +1,13 @@
+"""Production ASGI entrypoint for the FastAPI service (main.py).
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+Importing main creates Meeting_data and builds the vocabulary indexes; the
+query-parser gazetteer is built here too, so with preload_app all of it is
+ready before the workers fork.
+"""
+
+from main import app
+from utils import gazetteer
+
+gazetteer.get_gazetteer()
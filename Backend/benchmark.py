@@ -0,0 +1,524 @@
+"""In-process endpoint benchmark for the Flask (app.py) and FastAPI (main.py) apps.
+
+    python benchmark.py --projects 100000 --concurrency 8 --requests 200 --out results.json
+    python benchmark.py --data bench_data/100k --app flask --compare results.json
+    python benchmark.py --startup --runs 10 --out startup.json
+
+Generates (or reuses) a synthetic dataset with synth_data.py, boots each app
+in its own process against it, and drives every route with --concurrency
+parallel clients: a thread pool over Flask's test client, and an asyncio
+pool over httpx's ASGI transport for FastAPI. Per route it records p50 /
+p95 / p99 / mean / max latency, throughput and status codes; per app, boot
+time and peak RSS. Results are JSON (--out) so runs can be compared with
+--compare BASELINE.json, which prints the p95 and throughput change per route.
+
+--startup measures cold start instead: each app is imported in --runs fresh
+interpreters, timing the import (what a forked worker pays) and the warm
+boot through wsgi.py / asgi.py, with peak RSS and the slowest imports.
+
+Routes that call the LLM (/api/query, /search, /ask) only run with
+--include-llm; PDF uploads are never driven. Admission limits are raised
+for the run unless --keep-admission is given, so the numbers measure the
+route rather than the rate limiter.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LLM_ROUTES = {"/api/query", "/search", "/ask"}
+# Never driven: need a real PDF plus OCR / LLM, or are diagnostics
+SKIPPED_ROUTES = {"/api/admin/upload-pdf", "/upload-pdf", "/api/debug/query-plans", "/debug/query-plans",
+                  "/static/<path:filename>"}
+
+
+# ==================== DATASET ====================
+def ensure_dataset(args):
+    data = args.data or os.path.join(BASE_DIR, "bench_data", str(args.projects))
+    if not os.path.exists(os.path.join(data, "dataset.json")):
+        subprocess.run([sys.executable, os.path.join(BASE_DIR, "synth_data.py"),
+                        "--projects", str(args.projects), "--out", data, "--seed", str(args.seed)],
+                       cwd=BASE_DIR, check=True)
+    return os.path.abspath(data)
+
+
+class Sample:
+    """Ids and names drawn from the dataset, for filling in route parameters."""
+
+    def __init__(self, data, seed):
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._serial = 0
+        conn = sqlite3.connect(os.path.join(data, "jansaakshi.db"))
+        self.project_ids = [r[0] for r in conn.execute("SELECT id FROM projects ORDER BY RANDOM() LIMIT 1000")]
+        self.wards = [r[0] for r in conn.execute(
+            "SELECT ward_key FROM projects WHERE city_id=1 AND ward_key IS NOT NULL "
+            "GROUP BY ward_key ORDER BY COUNT(*) DESC LIMIT 50")]
+        self.contractors = [r[0] for r in conn.execute(
+            "SELECT contractor_name FROM projects GROUP BY contractor_name ORDER BY COUNT(*) DESC LIMIT 50")]
+        self.complaint_ids = [r[0] for r in conn.execute("SELECT id FROM complaints ORDER BY RANDOM() LIMIT 1000")]
+        self.places = [r[0] for r in conn.execute("SELECT DISTINCT ward_name FROM projects LIMIT 50")]
+        self.users = [r[0] for r in conn.execute("SELECT username FROM users WHERE role='user' LIMIT 100")]
+        conn.close()
+
+    def pick(self, values):
+        with self._lock:
+            return self.rng.choice(values)
+
+    def serial(self):
+        with self._lock:
+            self._serial += 1
+            return self._serial
+
+
+def tile_for(lat, lng, z):
+    n = 2 ** z
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return z, x, y
+
+
+# ==================== ROUTES ====================
+# (route template, method, auth, request factory) -- auth is None, "user",
+# "authorized" or "admin"; the factory returns (url, json body or None).
+def flask_routes(s):
+    z, x, y = tile_for(19.076, 72.8777, 12)
+    return [
+        ("/health", "GET", None, lambda: ("/health", None)),
+        ("/metrics", "GET", None, lambda: ("/metrics", None)),
+        ("/api/cities", "GET", None, lambda: ("/api/cities", None)),
+        ("/api/stats", "GET", None, lambda: ("/api/stats?city=mumbai", None)),
+        ("/api/projects", "GET", None, lambda: ("/api/projects?city=mumbai", None)),
+        ("/api/projects?ward", "GET", None, lambda: (f"/api/projects?city=mumbai&ward={s.pick(s.wards)}", None)),
+        ("/api/projects?format=compact", "GET", None,
+         lambda: ("/api/projects?city=mumbai&fields=project_name,status&format=compact", None)),
+        ("/api/projects/delayed", "GET", None, lambda: ("/api/projects/delayed?city=mumbai", None)),
+        ("/api/projects/<int:pid>", "GET", None, lambda: (f"/api/projects/{s.pick(s.project_ids)}", None)),
+        ("/api/projects/ward/<ward_no>", "GET", None,
+         lambda: (f"/api/projects/ward/{s.pick(s.wards)}?city=mumbai", None)),
+        ("/api/search", "GET", None, lambda: (f"/api/search?city=mumbai&q={s.pick(s.places)}", None)),
+        ("/api/meetings", "GET", None, lambda: (f"/api/meetings?city=mumbai&ward={s.pick(s.wards)}", None)),
+        ("/api/complaints", "GET", None, lambda: ("/api/complaints?city=mumbai", None)),
+        ("/api/contractors", "GET", None, lambda: ("/api/contractors?city=mumbai", None)),
+        ("/api/contractor-projects", "GET", None,
+         lambda: (f"/api/contractor-projects?name={s.pick(s.contractors)}", None)),
+        ("/api/contractors/reviews", "GET", None,
+         lambda: (f"/api/contractors/reviews?name={s.pick(s.contractors)}", None)),
+        ("/api/wards", "GET", None, lambda: ("/api/wards?city=mumbai", None)),
+        ("/api/wards/stats", "GET", None, lambda: ("/api/wards/stats?city=mumbai", None)),
+        ("/api/wards/<int:ward_no>", "GET", None, lambda: (f"/api/wards/{s.pick(s.wards)}?city=mumbai", None)),
+        ("/api/wards/geojson", "GET", None, lambda: ("/api/wards/geojson?zoom=11", None)),
+        ("/api/wards/map", "GET", None, lambda: ("/api/wards/map?city=mumbai&zoom=11", None)),
+        ("/api/wards/tiles/<int:z>/<int:x>/<int:y>", "GET", None, lambda: (f"/api/wards/tiles/{z}/{x}/{y}", None)),
+        ("/api/wards/locate", "GET", None, lambda: ("/api/wards/locate?lat=19.076&lng=72.8777", None)),
+        ("/api/wards/locate POST", "POST", None, lambda: ("/api/wards/locate", {"points": [
+            {"lat": 19.0 + i / 500, "lng": 72.8 + i / 500} for i in range(100)]})),
+        ("/api/auth/me", "GET", "user", lambda: ("/api/auth/me", None)),
+        ("/api/following", "GET", "user", lambda: ("/api/following", None)),
+        ("/api/follow", "POST", "user", lambda: ("/api/follow", {"project_id": s.pick(s.project_ids)})),
+        ("/api/unfollow", "POST", "user", lambda: ("/api/unfollow", {"project_id": s.pick(s.project_ids)})),
+        ("/api/complaints POST", "POST", None, lambda: ("/api/complaints", {
+            "description": "Benchmark complaint", "category": "roads", "city": "mumbai",
+            "lat": 19.076, "lng": 72.8777})),
+        ("/api/contractors/reviews POST", "POST", "authorized", lambda: ("/api/contractors/reviews", {
+            "contractor_name": s.pick(s.contractors), "rating": 3, "title": "Benchmark"})),
+        ("/api/auth/signup", "POST", None, lambda: ("/api/auth/signup", {
+            "username": f"bench_signup_{os.getpid()}_{s.serial()}", "password": "bench"})),
+        ("/api/auth/login", "POST", None, lambda: ("/api/auth/login", {
+            "username": s.pick(s.users), "password": "bench"})),
+        ("/api/auth/logout", "POST", None, lambda: ("/api/auth/logout", None)),
+        ("/api/admin/complaints", "GET", "admin", lambda: ("/api/admin/complaints?city=mumbai", None)),
+        ("/api/admin/complaints/<int:complaint_id>", "PATCH", "admin",
+         lambda: (f"/api/admin/complaints/{s.pick(s.complaint_ids)}", {"status": "reviewed"})),
+        ("/api/admin/promote-user", "POST", "admin", lambda: ("/api/admin/promote-user", {
+            "username": s.pick(s.users), "role": "user"})),
+        ("/api/query", "POST", None, lambda: ("/api/query", {"query": "delayed road projects in ward 77"})),
+    ]
+
+
+def fastapi_routes(s):
+    return [
+        ("/", "GET", None, lambda: ("/", None)),
+        ("/test", "GET", None, lambda: ("/test", None)),
+        ("/home", "GET", None, lambda: ("/home", None)),
+        ("/metrics", "GET", None, lambda: ("/metrics", None)),
+        ("/ward/{ward_no}", "GET", None, lambda: (f"/ward/{s.pick(s.wards)}", None)),
+        ("/backend/{project_id}", "GET", None, lambda: (f"/backend/{s.pick(s.project_ids)}", None)),
+        ("/backend/delayed", "GET", None, lambda: ("/backend/delayed", None)),
+        ("/search", "POST", None, lambda: ("/search", {"question": f"projects in {s.pick(s.places)}"})),
+        ("/ask", "POST", None, lambda: ("/ask", {"question": "which meetings discussed drains"})),
+    ]
+
+
+# ==================== MEASUREMENT ====================
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarise(route, method, latencies, statuses, wall):
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+    return {
+        "route": route,
+        "method": method,
+        "requests": len(latencies),
+        "errors": sum(n for code, n in statuses.items() if code >= 500),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def bench_flask(routes, headers, args):
+    from app import app
+
+    local = threading.local()
+
+    def call(method, factory, auth):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        url, body = factory()
+        started = time.perf_counter()
+        resp = client.open(url, method=method, json=body, headers=headers.get(auth, {}))
+        resp.get_data()
+        return time.perf_counter() - started, resp.status_code
+
+    results = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for route, method, auth, factory in routes:
+            for _ in range(args.warmup):
+                call(method, factory, auth)
+            started = time.perf_counter()
+            timings = list(pool.map(lambda _: call(method, factory, auth), range(args.requests)))
+            wall = time.perf_counter() - started
+            results.append(summarise(route, method, [t for t, _ in timings],
+                                     Counter(code for _, code in timings), wall))
+            print(f"  {method:5} {route:45} p95 {results[-1]['p95_ms']} ms", file=sys.stderr)
+    return results
+
+
+def bench_fastapi(routes, args):
+    import httpx
+    from main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        results = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def call(method, factory):
+                url, body = factory()
+                started = time.perf_counter()
+                resp = await client.request(method, url, json=body)
+                await resp.aread()
+                return time.perf_counter() - started, resp.status_code
+
+            for route, method, _, factory in routes:
+                for _ in range(args.warmup):
+                    await call(method, factory)
+                gate = asyncio.Semaphore(args.concurrency)
+
+                async def limited():
+                    async with gate:
+                        return await call(method, factory)
+
+                started = time.perf_counter()
+                timings = await asyncio.gather(*(limited() for _ in range(args.requests)))
+                wall = time.perf_counter() - started
+                results.append(summarise(route, method, [t for t, _ in timings],
+                                         Counter(code for _, code in timings), wall))
+                print(f"  {method:5} {route:45} p95 {results[-1]['p95_ms']} ms", file=sys.stderr)
+        return results
+
+    return asyncio.run(run())
+
+
+def _flask_tokens(s):
+    from utils.database import create_session, get_db
+
+    conn = get_db()
+    ids = {role: conn.execute("SELECT id FROM users WHERE role=? LIMIT 1", (role,)).fetchone()[0]
+           for role in ("user", "authorized_user", "admin")}
+    conn.close()
+    return {
+        "user": {"Authorization": f"Bearer {create_session(ids['user'])}"},
+        "authorized": {"Authorization": f"Bearer {create_session(ids['authorized_user'])}"},
+        "admin": {"Authorization": f"Bearer {create_session(ids['admin'])}"},
+    }
+
+
+def _uncovered(app_name, covered):
+    if app_name == "flask":
+        from app import app
+        templates = {(rule.rule, method) for rule in app.url_map.iter_rules()
+                     for method in rule.methods - {"HEAD", "OPTIONS"}}
+    else:
+        from main import app
+        templates = {(route.path, method) for route in app.routes
+                     for method in getattr(route, "methods", None) or () if method != "HEAD"}
+    return sorted(f"{method} {path}" for path, method in templates
+                  if path.split("?")[0] not in covered and path not in SKIPPED_ROUTES
+                  and not path.startswith(("/docs", "/redoc", "/openapi")))
+
+
+def app_env(data, args):
+    """Environment pointing both apps at the dataset (and lifting admission limits)."""
+    env = {
+        "DATABASE_PATH": os.path.join(data, "jansaakshi.db"),
+        "DATA_DB_PATH": os.path.join(data, "DATA_DB.db"),
+    }
+    if not args.keep_admission:
+        for route_class in ("LLM", "UPLOAD"):
+            for key in ("RATE", "BURST", "CLIENT_RATE", "CLIENT_BURST", "CONCURRENCY", "QUEUE"):
+                env[f"ADMISSION_{route_class}_{key}"] = os.environ.get(f"ADMISSION_{route_class}_{key}", "100000")
+    return env
+
+
+def run_app(app_name, data, args):
+    """Benchmark one app in this process; returns its result dict."""
+    os.environ.update(app_env(data, args))
+    os.chdir(BASE_DIR)
+
+    sample = Sample(data, args.seed)
+    started = time.perf_counter()
+    if app_name == "flask":
+        import app as flask_app
+        flask_app.warm_up()
+        routes = flask_routes(sample)
+    else:
+        import main  # noqa: F401
+        routes = fastapi_routes(sample)
+    boot = time.perf_counter() - started
+    boot_rss = peak_rss_bytes()
+
+    covered = {route.split(" ")[0].split("?")[0] for route, *_ in routes}
+    if not args.include_llm:
+        routes = [r for r in routes if r[0].split(" ")[0] not in LLM_ROUTES]
+    if args.routes:
+        routes = [r for r in routes if any(part in r[0] for part in args.routes.split(","))]
+
+    print(f"[benchmark] {app_name}: booted in {boot:.2f}s, {len(routes)} routes", file=sys.stderr)
+    if app_name == "flask":
+        results = bench_flask(routes, _flask_tokens(sample), args)
+    else:
+        results = bench_fastapi(routes, args)
+    return {
+        "boot_seconds": round(boot, 3),
+        "boot_rss_bytes": boot_rss,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "routes": results,
+        "uncovered_routes": _uncovered(app_name, covered),
+    }
+
+
+# ==================== STARTUP ====================
+# (app, module imported by a worker, serving entry point that also warms it)
+STARTUP_MODULES = (("flask", "app", "wsgi"), ("fastapi", "main", "asgi"))
+STARTUP_SNIPPET = """
+import json, resource, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+import {entry}
+print("BENCH_STARTUP " + json.dumps({{
+    "import_seconds": imported - started,
+    "boot_seconds": time.perf_counter() - started,
+    "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def _spread(values):
+    values = sorted(values)
+    return {"min": round(values[0], 4), "median": round(values[len(values) // 2], 4), "max": round(values[-1], 4)}
+
+
+def _slowest_imports(module, env, limit=10):
+    """Top-level imports by cumulative time, from python -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BASE_DIR,
+                          env=env, capture_output=True, text=True)
+    imports, started = [], False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not started:  # interpreter start-up ends with `site`
+            started = name.strip() == "site"
+            continue
+        # Depth is the indent under the importing module; keep direct imports only
+        if len(name) - len(name.lstrip()) <= 3 and name.strip() != module:
+            imports.append((int(cumulative) / 1e6, name.strip()))
+    return [{"module": name, "seconds": round(sec, 4)} for sec, name in sorted(imports, reverse=True)[:limit]]
+
+
+def run_startup(data, args):
+    """Cold-start timings per app, each run in a fresh interpreter."""
+    env = {**os.environ, **app_env(data, args)}
+    results = {}
+    for app_name, module, entry in STARTUP_MODULES:
+        if args.app not in ("both", app_name):
+            continue
+        runs = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET.format(module=module, entry=entry)],
+                                  cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True)
+            wall = time.perf_counter() - started
+            line = next(l for l in proc.stdout.splitlines() if l.startswith("BENCH_STARTUP "))
+            runs.append({**json.loads(line[len("BENCH_STARTUP "):]), "process_seconds": wall})
+        results[app_name] = {
+            "runs": len(runs),
+            "import_seconds": _spread([r["import_seconds"] for r in runs]),
+            "boot_seconds": _spread([r["boot_seconds"] for r in runs]),
+            "process_seconds": _spread([r["process_seconds"] for r in runs]),
+            "peak_rss_bytes": max(r["peak_rss_kib"] for r in runs) * 1024,
+            "slowest_imports": _slowest_imports(module, env),
+        }
+        print(f"[benchmark] {app_name}: import {results[app_name]['import_seconds']['median']:.3f}s, "
+              f"warm boot {results[app_name]['boot_seconds']['median']:.3f}s (median of {len(runs)})",
+              file=sys.stderr)
+    return results
+
+
+# ==================== REPORT ====================
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    for app_name, result in current.get("startup", {}).items():
+        old = baseline.get("startup", {}).get(app_name)
+        if old:
+            for key in ("import_seconds", "boot_seconds"):
+                before, after = old[key]["median"], result[key]["median"]
+                print(f"{app_name:7} {key:15} {before:.3f}s -> {after:.3f}s  ({(after / before - 1) * 100:+.0f}%)")
+    if not current.get("apps"):
+        return
+    print(f"\n{'route':52} {'p95 ms':>18} {'rps':>18}")
+    for app_name, result in current["apps"].items():
+        before = {(r["method"], r["route"]): r for r in baseline.get("apps", {}).get(app_name, {}).get("routes", [])}
+        for r in result["routes"]:
+            old = before.get((r["method"], r["route"]))
+            if not old or not old["p95_ms"] or not r["p95_ms"]:
+                continue
+            p95 = f"{old['p95_ms']:.1f} -> {r['p95_ms']:.1f}"
+            rps = f"{old['throughput_rps']:.0f} -> {r['throughput_rps']:.0f}"
+            print(f"{app_name[:7]:7} {r['method']:6} {r['route'][:37]:37} {p95:>18} {rps:>18}"
+                  f"  ({(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}% p95)")
+
+
+def _strip_values(argv):
+    """Parent argv minus the options the parent handles itself (--app/--data/--out/--compare)."""
+    kept, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        name = arg.split("=")[0]
+        if name in ("--app", "--data", "--out", "--compare"):
+            skip = "=" not in arg
+            continue
+        kept.append(arg)
+    return kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--projects", type=int, default=10000, help="dataset size to generate / reuse")
+    parser.add_argument("--data", help="dataset directory from synth_data.py (default bench_data/<projects>)")
+    parser.add_argument("--app", choices=("flask", "fastapi", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests per route")
+    parser.add_argument("--routes", help="comma-separated substrings: only run matching routes")
+    parser.add_argument("--include-llm", action="store_true")
+    parser.add_argument("--keep-admission", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--startup", action="store_true", help="measure cold start instead of routes")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per app for --startup")
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    data = ensure_dataset(args)
+    if args.child_out:
+        with open(args.child_out, "w") as f:
+            json.dump(run_app(args.app, data, args), f)
+        return
+
+    # One process per app so boot time and peak RSS are the app's own
+    apps = {}
+    for app_name in () if args.startup else (("flask", "fastapi") if args.app == "both" else (args.app,)):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            child_out = tmp.name
+        cmd = [sys.executable, os.path.abspath(__file__), *_strip_values(sys.argv[1:]), "--data", data,
+               "--app", app_name, "--child-out", child_out]
+        subprocess.run(cmd, cwd=BASE_DIR, check=True)
+        with open(child_out) as f:
+            apps[app_name] = json.load(f)
+        os.remove(child_out)
+
+    with open(os.path.join(data, "dataset.json")) as f:
+        dataset = json.load(f)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "cpus": os.cpu_count(),
+            "dataset": dataset,
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+            "include_llm": args.include_llm,
+        },
+        "apps": apps,
+    }
+    if args.startup:
+        report["startup"] = run_startup(data, args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[benchmark] results written to {args.out}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Gunicorn settings shared by both services.
+
+    gunicorn -c gunicorn.conf.py wsgi:app                                    # Flask API
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app   # FastAPI /ask
+
+All state that has to agree between workers (sessions, data versions) is in
+SQLite; everything held in process memory is a cache that each worker may
+rebuild on its own. Throughput scales with the number of workers, so the
+default is one per core.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Threads per worker (gthread); requests mostly wait on SQLite or the LLM.
+# utils/admission caps the LLM and upload routes at 6 of them (running +
+# queued), so keep this above that for the cheap endpoints.
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+# Import the app (schema migration + warm_up) once in the master, then fork
+preload_app = True
+
+# /api/query and PDF uploads can wait on the LLM for a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth (0 = never)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
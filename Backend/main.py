@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import sqlite3
@@ -14,10 +15,28 @@ import shutil
 import tempfile
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+# Before any local import: utils modules read their settings at import time
+load_dotenv()
+
 from ocr_detection import extract_text_from_pdf, classify_meeting_data, generate_summary_from_db, generate_meeting_summary_with_prompt
+from utils.llm_guard import AnswerCache, Deadline, call_with_deadline, get_breaker, LLMTimeout, CircuitOpen
+from utils.llm_metrics import track_llm, record_cache
+from utils import metrics
+from utils import request_metrics
+from utils import plan_audit
+from utils.request_metrics import traced_connect
+from utils.vocab_index import VocabIndex
+from utils import gazetteer
+from utils import fast_json
+from utils.compression import COMPRESS_MIN_BYTES
+from utils.admission import fastapi_dependency
+from utils.db_writer import run_write
+from utils.database import get_data_version, ALL_CITIES
 
 # -------------------- CONFIG --------------------
-load_dotenv()
 # Prefer SARVAM API config
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 # Accept either SARVAM_API_URL or SARVAM_BASE_URL
@@ -38,7 +57,17 @@ if SARVAM_API_KEY and SARVAM_API_URL:
 else:
     print("⚠️  Warning: SARVAM API credentials not found in .env. AI calls will be disabled until configured.")
 
-app = FastAPI(title="JanSaakshi Civic Backend")
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by utils.fast_json (orjson when installed)."""
+
+    def render(self, content):
+        return fast_json.dumps(content)
+
+
+app = FastAPI(title="JanSaakshi Civic Backend", default_response_class=FastJSONResponse)
+
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+request_metrics.init_fastapi(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,12 +77,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DB_PATH = "DATA_DB.db"
+DB_PATH = os.environ.get("DATA_DB_PATH", "DATA_DB.db")
+
+# AI answers keyed by question, prompt, model, records shown and the
+# data_versions counter, so an edited record is never answered from the cache
+_answer_cache = AnswerCache()
 
 # -------------------- INITIALIZE MEETING_DATA TABLE --------------------
+# Bump when the DDL below changes; stored as PRAGMA user_version in DATA_DB
+MEETING_DATA_SCHEMA_VERSION = 3
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def _versioned_tables(conn):
+    return ["Meeting_data"] + (["PROJECT_DATA"] if _has_table(conn, "PROJECT_DATA") else [])
+
+
+def _meeting_db_current(conn):
+    """Schema is current and every data table (PROJECT_DATA may arrive later) bumps data_versions."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] != MEETING_DATA_SCHEMA_VERSION:
+        return False
+    return all(
+        conn.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?",
+                     (f"trg_{table.lower()}_version_insert",)).fetchone()
+        for table in _versioned_tables(conn)
+    )
+
+
 def init_meeting_data_table():
     """Create Meeting_data table if it doesn't exist"""
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = traced_connect(DB_PATH, timeout=30.0)
+    if _meeting_db_current(conn):
+        conn.close()
+        return
+    # WAL lets several worker processes read while one writes
+    conn.execute("PRAGMA journal_mode=WAL")
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -73,13 +134,62 @@ def init_meeting_data_table():
         timeline TEXT
     )
     ''')
+    # Equality filters and the newest-first order of fetch_meetings / the
+    # project routes (see tests/test_query_plans.py)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meeting_date ON Meeting_data(meeting_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meeting_created ON Meeting_data(created_at)")
+    # PROJECT_DATA is loaded by an external import; index it when it is there
+    if _has_table(conn, "PROJECT_DATA"):
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_project_data_ward_no ON PROJECT_DATA(ward_no)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_project_data_status ON PROJECT_DATA(status)")
+
+    # Write counter for the answer cache, same scheme as utils/database.py
+    # (this file has no cities, so only the ALL_CITIES row is used)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            city_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in _versioned_tables(conn):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_version_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    INSERT INTO data_versions (city_id, version) VALUES ({ALL_CITIES}, 1)
+                    ON CONFLICT(city_id) DO UPDATE SET version = version + 1;
+                END
+            """)
     
+    cursor.execute(f"PRAGMA user_version = {MEETING_DATA_SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
 # Initialize the table on module load
 init_meeting_data_table()
 
+# Phrase vocabulary used by detect_filters; new PROJECT_DATA rows are picked
+# up incrementally (see VOCAB_REFRESH_SECONDS).
+_project_vocab = VocabIndex(DB_PATH, "PROJECT_DATA", ("project_name", "body_text", "contractor", "ward"))
+_project_vocab.refresh(force=True)
+
+# Word -> Meeting_data rowids, for the keyword side of /ask
+_meeting_vocab = VocabIndex(
+    DB_PATH, "Meeting_data",
+    ("objective", "venue", "ward", "projects_discussed_list", "attendees_present"),
+    max_n=1, row_postings=True,
+)
+_meeting_vocab.refresh(force=True)
+
+# Wards, contractors and corporators known to this DB, for the query parser
+gazetteer.register_source(DB_PATH, """
+    SELECT 'ward_name', ward FROM PROJECT_DATA
+    UNION SELECT 'contractor', contractor FROM PROJECT_DATA
+    UNION SELECT 'corporator', responsible_person FROM PROJECT_DATA
+    UNION SELECT 'ward_name', ward FROM Meeting_data
+    UNION SELECT 'corporator', corporator_responsible FROM Meeting_data
+""")
+
 # -------------------- REQUEST MODEL --------------------
 class Question(BaseModel):
     question: str
@@ -94,137 +204,90 @@ class Question(BaseModel):
     body_text: Optional[str] = None
 
 # -------------------- SIMPLE INTENT DETECTOR --------------------
+# Compiled once; detect_filters runs once per /search and /ask (see QueryAnalysis)
+WARD_NAME_RE = re.compile(r"ward(?:\s*no)?[:\s]+([A-Za-z][A-Za-z\s&\-'']{1,40}?)(?=(?:\s+by\b|\s+about\b|\s+in\b|,|$))", re.IGNORECASE)
+LOCATION_RE = re.compile(r"\b(?:in|at|around|near)\s+([A-Za-z][A-Za-z\s&\-']{1,40})", re.IGNORECASE)
+TOKEN_RE = re.compile(r"\b[\w&'-]+\b")
+PROJECT_RE = re.compile(r"project(?: name)?[:\s]+(.{3,120}?)(?=(?:\s+in\b|\s+by\b|\s+about\b|,|$))", re.IGNORECASE)
+CONTRACTOR_RE = re.compile(r"contractor[:\s]+([A-Za-z0-9 &.\-']{3,60}?)(?=(?:\s+in\b|\s+ward\b|\s+about\b|,|$))", re.IGNORECASE)
+BY_NAME_RE = re.compile(r"\bby\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+){0,3})(?=(?:\s+about\b|,|$))")
+DETAILS_RE = re.compile(r"(?:about|details?|regarding)[:\s]+([\w\s\-,]{3,120})", re.IGNORECASE)
+FILTER_STOPWORDS = {"what","is","happening","in","the","a","an","of","for","on","show","projects","about","please","give","me","here","there","near"}
+
+
 def detect_filters(question: str):
     q = question.lower().strip()
     filters = {}
 
-    # Try to detect plain ward number first (e.g., "37" or "45")
-    try:
-        ward_num = int(q)
-        if 1 <= ward_num <= 70:
-            filters["ward_no"] = ward_num
-            return filters
-    except ValueError:
-        pass
-
-    # ward number detection (check from high to low to avoid matching 3 in 37)
-    for i in range(69, 0, -1):
-        if f"ward {i}" in q or f"ward no {i}" in q or f"ward{i}" in q:
-            filters["ward_no"] = i
-            break
+    # Try to detect plain ward number first (e.g., "37" or "145")
+    if q.isdigit() and len(q) <= 3 and int(q) >= 1:
+        filters["ward_no"] = int(q)
+        return filters
+
+    # ward number detection ("ward 37", "ward no 37", "ward37")
+    ward_no = gazetteer.find_ward_no(q)
+    if ward_no:
+        filters["ward_no"] = ward_no
 
     # ward name detection (e.g., "ward Akurli" or "ward: Akurli")
-    m = re.search(r"ward(?:\s*no)?[:\s]+([A-Za-z][A-Za-z\s&\-'']{1,40}?)(?=(?:\s+by\b|\s+about\b|\s+in\b|,|$))", question, flags=re.IGNORECASE)
+    m = WARD_NAME_RE.search(question)
     if m and 'ward_no' not in filters:
         wn = m.group(1).strip()
         # avoid capturing numeric ward matched above
         if not wn.isdigit():
             filters["ward"] = wn
 
+    # Known places, contractors and project words, found in one pass;
+    # misspelled ones ("Kandivli", "Patel Infra") through the trigram index
+    found = gazetteer.scan(q)
+    words = [w for w in TOKEN_RE.findall(q) if w and w not in FILTER_STOPWORDS]
+    for kind, (value, _, _) in gazetteer.fuzzy_resolve(words).items():
+        found.setdefault(kind, value)
+    if 'ward' not in filters and 'ward_no' not in filters and found.get("ward_name"):
+        filters["ward"] = found["ward_name"]
+
     # Generic location detection: catch phrases like "in Akurli", "at Akurli".
     # This handles user queries that ask about a place without the word 'ward'.
     if 'ward' not in filters and 'ward_no' not in filters:
-        loc = re.search(r"\b(?:in|at|around|near)\s+([A-Za-z][A-Za-z\s&\-']{1,40})", question, flags=re.IGNORECASE)
+        loc = LOCATION_RE.search(question)
         if loc:
             place = loc.group(1).strip()
             if not place.isdigit():
                 filters['ward'] = place
 
-    # project keyword detection - check for all keywords
-    keywords = {
-        "road": "Road",
-        "drain": "Drain", 
-        "water": "Water",
-        "repair": "Repair",
-        "construction": "Construction",
-        "park": "Park",
-        "light": "Light",
-        "sidewalk": "Sidewalk",
-        "school": "School",
-        "bus": "Bus",
-        "waste": "Waste",
-        "toilet": "Toilet",
-        "traffic": "Traffic",
-        "garden": "Garden",
-        "storm": "Storm"
-    }
-    
-    for k, _ in keywords.items():
-        if k in q:
-            filters["project_name"] = k
-            break
-
-    # If no filters found yet, try DB-backed keyword matching: check n-grams
-    # (longer phrases first) then shorter tokens against project_name,
-    # body_text, contractor, and ward. This lets arbitrary user keywords
-    # (e.g., "gym", "open gym", "toilet renovation") match DB rows.
+    # project keyword detection
+    if found.get("project_term"):
+        filters["project_name"] = found["project_term"]
+    if found.get("contractor"):
+        filters["contractor"] = found["contractor"]
+
+    # If no filters found yet, match n-grams (longer phrases first) of the
+    # question against the in-memory vocabulary of project_name, body_text,
+    # contractor and ward. This lets arbitrary user keywords (e.g., "gym",
+    # "open gym", "toilet renovation") match DB rows without table scans.
     if not filters:
-        stopwords = {"what","is","happening","in","the","a","an","of","for","on","show","projects","about","please","give","me","here","there","near"}
-        # tokenization keeping alphanumerics and simple punctuation removed
-        words = [w for w in re.findall(r"\b[\w&'-]+\b", q.lower())]
-        words = [w for w in words if w and w not in stopwords]
         if words:
-            # build n-grams from longest to shortest (max 3 words)
-            max_n = min(3, len(words))
-            found = False
-            conn = None
-            try:
-                conn = sqlite3.connect(DB_PATH, timeout=30.0)
-                cursor = conn.cursor()
-                for n in range(max_n, 0, -1):
-                    if found:
-                        break
-                    for i in range(0, len(words) - n + 1):
-                        phrase = " ".join(words[i : i + n])
-                        like = f"%{phrase}%"
-                        # check columns in preferred order
-                        cursor.execute("SELECT COUNT(*) FROM PROJECT_DATA WHERE LOWER(project_name) LIKE ?", (like,))
-                        if cursor.fetchone()[0] > 0:
-                            filters["project_name"] = phrase
-                            found = True
-                            break
-                        cursor.execute("SELECT COUNT(*) FROM PROJECT_DATA WHERE LOWER(body_text) LIKE ?", (like,))
-                        if cursor.fetchone()[0] > 0:
-                            filters["body_text"] = phrase
-                            found = True
-                            break
-                        cursor.execute("SELECT COUNT(*) FROM PROJECT_DATA WHERE LOWER(contractor) LIKE ?", (like,))
-                        if cursor.fetchone()[0] > 0:
-                            filters["contractor"] = phrase
-                            found = True
-                            break
-                        cursor.execute("SELECT COUNT(*) FROM PROJECT_DATA WHERE LOWER(ward) LIKE ?", (like,))
-                        if cursor.fetchone()[0] > 0:
-                            filters["ward"] = phrase
-                            found = True
-                            break
-                    if found:
-                        break
-            except Exception:
-                pass
-            finally:
-                try:
-                    if conn:
-                        conn.close()
-                except Exception:
-                    pass
+            hit = _project_vocab.longest_match(words)
+            if hit:
+                phrase, column = hit
+                filters[column] = phrase
 
     # explicit project name provided like "project: Road Repair" or quoted phrase
-    pm = re.search(r"project(?: name)?[:\s]+(.{3,120}?)(?=(?:\s+in\b|\s+by\b|\s+about\b|,|$))", question, flags=re.IGNORECASE)
+    pm = PROJECT_RE.search(question)
     if pm:
         filters["project_name"] = pm.group(1).strip()
 
     # contractor detection: look for 'contractor' or 'by <Name>' patterns
-    cm = re.search(r"contractor[:\s]+([A-Za-z0-9 &.\-']{3,60}?)(?=(?:\s+in\b|\s+ward\b|\s+about\b|,|$))", question, flags=re.IGNORECASE)
+    cm = CONTRACTOR_RE.search(question)
     if cm:
         filters["contractor"] = cm.group(1).strip()
     else:
-        bym = re.search(r"\bby\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+){0,3})(?=(?:\s+about\b|,|$))", question)
+        bym = BY_NAME_RE.search(question)
         if bym:
             filters["contractor"] = bym.group(1).strip()
 
     # body text / details search: "about drainage", "details: ..."
-    bm = re.search(r"(?:about|details?|regarding)[:\s]+([\w\s\-,]{3,120})", question, flags=re.IGNORECASE)
+    bm = DETAILS_RE.search(question)
     if bm:
         filters["body_text"] = bm.group(1).strip()
     
@@ -317,8 +380,11 @@ def _normalize_date_to_yyyy_mm_dd(s: str) -> Optional[str]:
     return None
 
 
-def detect_meeting_filters(question: str) -> dict:
-    """Detect filters for Meeting_data queries."""
+def detect_meeting_filters(question: str, base: Optional[dict] = None) -> dict:
+    """Detect filters for Meeting_data queries.
+
+    `base` is detect_filters() output for the same question, if already computed.
+    """
     q = (question or "").strip()
     filters: dict = {}
 
@@ -344,7 +410,8 @@ def detect_meeting_filters(question: str) -> dict:
                     filters["meeting_date"] = nd
 
     # ward: reuse existing ward parsing; map ward_no -> ward text filter
-    base = detect_filters(q)
+    if base is None:
+        base = detect_filters(q)
     if "ward" in base:
         filters["ward"] = base["ward"]
     if "ward_no" in base:
@@ -363,7 +430,7 @@ def detect_meeting_filters(question: str) -> dict:
 
 def fetch_meetings(filters: dict):
     """Fetch meeting records from Meeting_data with best-effort filtering."""
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = traced_connect(DB_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -401,24 +468,24 @@ def fetch_meetings(filters: dict):
     rows = cursor.fetchall()
     conn.close()
 
-    results = []
-    for r in rows:
-        d = dict(r)
-        # parse JSON list fields
-        for k in ("attendees_present", "projects_discussed_list"):
-            try:
-                raw = d.get(k)
-                if raw is None:
-                    d[k] = []
-                elif isinstance(raw, str):
-                    d[k] = json.loads(raw) if raw.strip() else []
-                else:
-                    d[k] = raw
-            except Exception:
-                d[k] = []
-        results.append(d)
+    return [_meeting_record(r) for r in rows]
 
-    return results
+
+def _meeting_record(row) -> dict:
+    """Meeting_data row as a dict with its JSON list fields parsed."""
+    d = dict(row)
+    for k in ("attendees_present", "projects_discussed_list"):
+        try:
+            raw = d.get(k)
+            if raw is None:
+                d[k] = []
+            elif isinstance(raw, str):
+                d[k] = json.loads(raw) if raw.strip() else []
+            else:
+                d[k] = raw
+        except Exception:
+            d[k] = []
+    return d
 
 
 def format_meeting_html(question: str, meetings: list, answer_text: str):
@@ -442,6 +509,33 @@ def format_meeting_html(question: str, meetings: list, answer_text: str):
 
     return header + answer_html + cards
 
+def summarize_meetings(meetings: list, custom_prompt: Optional[str] = None, deadline: Optional[Deadline] = None):
+    """AI meeting summary bounded by the request deadline; late summaries are cached."""
+    cache_key = ("meetings", custom_prompt or "", tuple(m.get("meeting_id") for m in meetings),
+                 get_data_version(db_path=DB_PATH))
+    cached = _answer_cache.get(cache_key)
+    record_cache("meeting_summary", cached is not None)
+    if cached:
+        return cached
+
+    def _summarize():
+        if custom_prompt:
+            return generate_meeting_summary_with_prompt(meetings, custom_prompt)
+        return generate_summary_from_db(meetings)
+
+    try:
+        answer_text = call_with_deadline(
+            _summarize, deadline=deadline, breaker=get_breaker("sarvam"),
+            on_late=_answer_cache.late_writer(cache_key), purpose="meeting_summary",
+        )
+    except (LLMTimeout, CircuitOpen) as e:
+        print(f"Meeting summary skipped: {e}")
+        return "⏱️ The AI summary is taking longer than usual — the matching meeting records are listed below."
+    except Exception as e:
+        return f"⚠️ Meeting summary generation failed: {str(e)}"
+    _answer_cache.put(cache_key, answer_text)
+    return answer_text
+
 # -------------------- FETCH DATA FROM SQLITE --------------------
 def fetch_projects(filters: dict):
     # If no filters were detected, do not return a default set of projects.
@@ -452,7 +546,7 @@ def fetch_projects(filters: dict):
         print("[DEBUG] fetch_projects: no filters provided — returning empty list")
         return []
 
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = traced_connect(DB_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -496,6 +590,101 @@ def fetch_projects(filters: dict):
 
     return [dict(row) for row in rows]
 
+# -------------------- QUERY ANALYSIS + RETRIEVAL --------------------
+MEETING_WORD_RE = re.compile(r"\b[a-z]{3,}\b")
+MEETING_STOPWORDS = {'what', 'when', 'where', 'who', 'how', 'tell', 'show', 'give', 'about', 'with', 'from', 'planned', 'happening', 'discussed'}
+# Only the first few keywords are searched, as before
+MAX_KEYWORDS = 5
+MEETING_LIMIT = 10
+
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+
+class QueryAnalysis:
+    """Everything /search and /ask derive from a question, computed once per request.
+
+    Explicit filters on the request (ward, contractor, ...) override detected ones.
+    """
+
+    def __init__(self, req: "Question"):
+        self.question = req.question
+        self.is_meeting = is_meeting_query(req.question)
+        self.custom_prompt = req.prompt or getattr(req, 'input', None)
+
+        detected = detect_filters(req.question)
+        self.meeting_filters = detect_meeting_filters(req.question, base=detected)
+        self.project_filters = dict(detected)
+        for key in ("ward", "contractor", "project_name", "body_text"):
+            if getattr(req, key, None):
+                self.project_filters[key] = getattr(req, key)
+        if getattr(req, 'ward', None):
+            self.meeting_filters['ward'] = req.ward
+
+        words = MEETING_WORD_RE.findall(req.question.lower())
+        self.keywords = [w for w in words if w not in MEETING_STOPWORDS][:MAX_KEYWORDS]
+
+
+def _keyword_score(keywords, texts) -> float:
+    """Fraction of `keywords` found (as a word prefix) in `texts`."""
+    if not keywords:
+        return 0.0
+    words = set(TOKEN_RE.findall(" ".join(str(t) for t in texts if t).lower()))
+    found = sum(1 for k in keywords if any(w.startswith(k) for w in words))
+    return found / len(keywords)
+
+
+def fetch_meetings_by_keywords(keywords, limit: int = MEETING_LIMIT):
+    """Meetings mentioning any keyword, most keywords first, then newest.
+
+    Candidates come from the in-memory word index; only those rows are read.
+    """
+    if not keywords:
+        return []
+    hits = _meeting_vocab.rows_matching(keywords)
+    if not hits:
+        return []
+    # Best-covered rows first; newer rowids break ties before the DB sort
+    rowids = sorted(hits, key=lambda r: (-hits[r], -r))[:limit * 5]
+    conn = traced_connect(DB_PATH, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            f"SELECT rowid AS _rowid, * FROM Meeting_data WHERE rowid IN ({','.join('?' * len(rowids))}) "
+            "ORDER BY created_at DESC",
+            rowids,
+        ).fetchall()
+    finally:
+        conn.close()
+    meetings = []
+    for r in rows:
+        d = _meeting_record(r)
+        d["_score"] = hits[d.pop("_rowid")] / len(set(keywords))
+        meetings.append(d)
+    meetings.sort(key=lambda m: -m["_score"])
+    return meetings[:limit]
+
+
+def retrieve(analysis: QueryAnalysis):
+    """Projects (by filters) and meetings (by keywords), fetched concurrently.
+
+    Returns (projects, meetings, candidates): `candidates` is both sets merged as
+    (score, source, record), best first, where score is the share of the
+    question's keywords a record contains.
+    """
+    # Each task runs in a copy of the request's context, so its SQL is still
+    # accounted to this request (utils/request_metrics, utils/plan_audit)
+    projects_f = _retrieval_pool.submit(copy_context().run, fetch_projects, analysis.project_filters)
+    meetings_f = _retrieval_pool.submit(copy_context().run, fetch_meetings_by_keywords, analysis.keywords)
+    projects, meetings = projects_f.result(), meetings_f.result()
+
+    candidates = [(m["_score"], "Meeting_data", m) for m in meetings]
+    for p in projects:
+        score = _keyword_score(analysis.keywords, (p.get("project_name"), p.get("body_text"), p.get("ward"), p.get("contractor")))
+        candidates.append((score, "PROJECT_DATA", p))
+    # Stable sort: on equal scores meetings stay ahead, as they always have
+    candidates.sort(key=lambda c: -c[0])
+    return projects, meetings, candidates
+
 # -------------------- AI EXPLAINER --------------------
 def format_html_response(question, records):
     """Format records as nice HTML cards"""
@@ -558,11 +747,58 @@ def format_html_response(question, records):
     html += "</div>"
     return html
 
-def explain(question, records, user_prompt: Optional[str] = None, user_model: Optional[str] = None):
+def _format_answer_html(answer_text):
+    return f"<h3 style='color: #d4a574; margin-bottom: 20px;'>🤖 {chosen_provider} Analysis</h3><p style='background-color: #252525; padding: 15px; border-left: 3px solid #d4a574; margin-bottom: 20px;'>{str(answer_text).replace(chr(10), '<br>')}</p>"
+
+
+def _answer_text_from_response(jr):
+    """Pull the answer text out of the provider's JSON, whatever shape it uses."""
+    # Try common response shapes and prefer textual fields; handle nested chat shapes
+    answer_text = None
+    if isinstance(jr, dict):
+        if jr.get("text"):
+            answer_text = jr.get("text")
+        elif jr.get("output"):
+            answer_text = jr.get("output")
+        elif "choices" in jr and isinstance(jr["choices"], list) and jr["choices"]:
+            c = jr["choices"][0]
+            if isinstance(c, dict):
+                # Prefer message.content (chat-style)
+                msg = c.get("message")
+                if isinstance(msg, dict) and msg.get("content"):
+                    answer_text = msg.get("content")
+                else:
+                    # fallback to common fields inside choice
+                    answer_text = c.get("text") or c.get("output") or c.get("content") or c.get("message")
+
+    # If answer_text is still a dict (some providers return nested dict), try to extract 'content'
+    if isinstance(answer_text, dict):
+        answer_text = answer_text.get("content") or answer_text.get("text") or str(answer_text)
+
+    # If model returned a string that looks like a Python dict, try to parse it and extract 'content'
+    if isinstance(answer_text, str):
+        s = answer_text.strip()
+        if (s.startswith("{") and ("'content'" in s or '"content"' in s)) or s.startswith("{'content'"):
+            try:
+                parsed = ast.literal_eval(s)
+                if isinstance(parsed, dict) and ("content" in parsed or 'text' in parsed):
+                    answer_text = parsed.get("content") or parsed.get("text") or str(parsed)
+            except Exception:
+                pass
+
+    # Clean up simple markdown bold markers for natural text
+    if isinstance(answer_text, str):
+        answer_text = answer_text.replace('**', '')
+    return answer_text
+
+
+def explain(question, records, user_prompt: Optional[str] = None, user_model: Optional[str] = None, deadline: Optional[Deadline] = None):
     """Generate AI explanation of project records.
 
     If SARVAM credentials are configured, call the external API.
     Otherwise produce a helpful mock long-form explanation so the UI can be tested.
+    The provider call is bounded by `deadline`; when it runs out the records are
+    shown without the AI analysis and the late answer is cached for next time.
     """
     # If there are no DB records but the user supplied a custom prompt,
     # allow the AI call to proceed (the prompt may not require DB data).
@@ -625,8 +861,45 @@ Provide a detailed, factual, and helpful summary for a local resident. Do NOT in
             if is_chat_endpoint and not chosen_model:
                 return f"<p style='color: #ff9999;'>⚠️ Chat endpoint requires a `model`. Set {chosen_provider}_MODEL in .env or pass `model` in the request.</p>" + format_html_response(question, plain_records)
 
+            cache_key = (
+                " ".join(question.lower().split()), user_prompt or "", chosen_model,
+                tuple(r.get("id") for r in plain_records if isinstance(r, dict)),
+                get_data_version(db_path=DB_PATH),
+            )
+            answer_text = _answer_cache.get(cache_key)
+            record_cache("answer", answer_text is not None)
+            if answer_text:
+                return _format_answer_html(answer_text) + format_html_response(question, plain_records)
+
+            def _late_answer(late_resp):
+                return _answer_text_from_response(late_resp.json()) if late_resp.ok else None
+
+            def _post():
+                with track_llm("answer", json.dumps(payload.get("messages") or payload.get("prompt"))) as call:
+                    r = requests.post(chosen_api_url, headers=headers, json=payload, timeout=25)
+                    if r.ok:
+                        try:
+                            jr = r.json()
+                            call.record_response(_answer_text_from_response(jr), jr)
+                        except ValueError:
+                            call.fail("invalid_json")
+                    else:
+                        call.fail(f"http_{r.status_code}")
+                    return r
+
             # Use the selected provider's URL/key
-            resp = requests.post(chosen_api_url, headers=headers, json=payload, timeout=25)
+            try:
+                resp = call_with_deadline(
+                    _post,
+                    deadline=deadline,
+                    breaker=get_breaker("sarvam"),
+                    on_late=_answer_cache.late_writer(cache_key, _late_answer),
+                    purpose="answer",
+                )
+            except (LLMTimeout, CircuitOpen) as e:
+                print(f"{chosen_provider} answer skipped: {e}")
+                return "<p style='color: #ff9999;'>⏱️ AI analysis is taking longer than usual — showing the official records directly.</p>" + format_html_response(question, plain_records)
+
             try:
                 resp.raise_for_status()
             except requests.exceptions.HTTPError as http_e:
@@ -641,50 +914,16 @@ Provide a detailed, factual, and helpful summary for a local resident. Do NOT in
 
             jr = resp.json()
 
-            # Try common response shapes and prefer textual fields; handle nested chat shapes
-            answer_text = None
-            if isinstance(jr, dict):
-                if jr.get("text"):
-                    answer_text = jr.get("text")
-                elif jr.get("output"):
-                    answer_text = jr.get("output")
-                elif "choices" in jr and isinstance(jr["choices"], list) and jr["choices"]:
-                    c = jr["choices"][0]
-                    if isinstance(c, dict):
-                        # Prefer message.content (chat-style)
-                        msg = c.get("message")
-                        if isinstance(msg, dict) and msg.get("content"):
-                            answer_text = msg.get("content")
-                        else:
-                            # fallback to common fields inside choice
-                            answer_text = c.get("text") or c.get("output") or c.get("content") or c.get("message")
-
-            # If answer_text is still a dict (some providers return nested dict), try to extract 'content'
-            if isinstance(answer_text, dict):
-                answer_text = answer_text.get("content") or answer_text.get("text") or str(answer_text)
-
-            # If model returned a string that looks like a Python dict, try to parse it and extract 'content'
-            if isinstance(answer_text, str):
-                s = answer_text.strip()
-                if (s.startswith("{") and ("'content'" in s or '"content"' in s)) or s.startswith("{'content'"):
-                    try:
-                        parsed = ast.literal_eval(s)
-                        if isinstance(parsed, dict) and ("content" in parsed or 'text' in parsed):
-                            answer_text = parsed.get("content") or parsed.get("text") or str(parsed)
-                    except Exception:
-                        pass
+            answer_text = _answer_text_from_response(jr)
 
             if not answer_text:
                 # If still nothing usable, log the response and return an error note
                 print(f"Unexpected {chosen_provider} response shape:", jr)
                 answer_text = f"⚠️ {chosen_provider} returned an unexpected response format. Check server logs for details."
+            else:
+                _answer_cache.put(cache_key, answer_text)
 
-            # Clean up simple markdown bold markers for natural text
-            if isinstance(answer_text, str):
-                answer_text = answer_text.replace('**', '')
-
-            answer_html = f"<h3 style='color: #d4a574; margin-bottom: 20px;'>🤖 {chosen_provider} Analysis</h3><p style='background-color: #252525; padding: 15px; border-left: 3px solid #d4a574; margin-bottom: 20px;'>{str(answer_text).replace(chr(10), '<br>')}</p>"
-            return answer_html + format_html_response(question, plain_records)
+            return _format_answer_html(answer_text) + format_html_response(question, plain_records)
 
         except Exception as e:
             print(f"{chosen_provider} call error: {e}")
@@ -722,7 +961,7 @@ def serve_test_page():
 def get_home():
     """Home/dashboard endpoint"""
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn = traced_connect(DB_PATH, timeout=30.0)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -747,7 +986,7 @@ def get_home():
 def get_ward(ward_no: int):
     """Get projects for a specific ward"""
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn = traced_connect(DB_PATH, timeout=30.0)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -767,7 +1006,7 @@ def get_ward(ward_no: int):
 def get_project(project_id: int):
     """Get details of a specific project"""
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn = traced_connect(DB_PATH, timeout=30.0)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -786,7 +1025,7 @@ def get_project(project_id: int):
 def get_delayed():
     """Get all delayed projects"""
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn = traced_connect(DB_PATH, timeout=30.0)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -802,39 +1041,23 @@ def get_delayed():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/search")
+@app.post("/search", dependencies=[Depends(fastapi_dependency("llm"))])
 def search_projects(req: Question):
     """Search projects by question (uses AI filtering)"""
     try:
+        analysis = QueryAnalysis(req)
         # Route meeting queries to Meeting_data
-        if is_meeting_query(req.question):
-            meeting_filters = detect_meeting_filters(req.question)
-            # Merge explicit filters from request body (take precedence)
-            if getattr(req, 'ward', None):
-                meeting_filters['ward'] = req.ward
-
-            records = fetch_meetings(meeting_filters)
+        if analysis.is_meeting:
+            records = fetch_meetings(analysis.meeting_filters)
             return {
                 "query": req.question,
                 "source": "Meeting_data",
-                "filters_used": meeting_filters,
+                "filters_used": analysis.meeting_filters,
                 "results": records,
                 "count": len(records),
             }
 
-        filters = detect_filters(req.question)
-        # Accept both `prompt` and `input` as the user-provided prompt
-        if getattr(req, 'input', None) and not req.prompt:
-            req.prompt = req.input
-        # Merge explicit filters from request body (take precedence)
-        if getattr(req, 'ward', None):
-            filters['ward'] = req.ward
-        if getattr(req, 'contractor', None):
-            filters['contractor'] = req.contractor
-        if getattr(req, 'project_name', None):
-            filters['project_name'] = req.project_name
-        if getattr(req, 'body_text', None):
-            filters['body_text'] = req.body_text
+        filters = analysis.project_filters
         records = fetch_projects(filters)
         
         # Convert records to plain dicts for JSON serialization
@@ -852,36 +1075,25 @@ def search_projects(req: Question):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ask")
+@app.post("/ask", dependencies=[Depends(fastapi_dependency("llm"))])
 def ask_ai(req: Question):
     """Main AI-powered question answering endpoint"""
+    # One latency budget for every AI call this request makes
+    deadline = Deadline()
     try:
-        # Accept both `prompt` and `input` as the user-provided prompt
-        custom_prompt = req.prompt
-        if getattr(req, 'input', None) and not custom_prompt:
-            custom_prompt = req.input
-        
-        # Check if this is an explicit meeting query
-        is_explicit_meeting = is_meeting_query(req.question)
-        
-        if is_explicit_meeting:
-            # Explicit meeting query - route directly to meetings
-            meeting_filters = detect_meeting_filters(req.question)
-            if getattr(req, 'ward', None):
-                meeting_filters['ward'] = req.ward
+        # Parse the question once: filters, meeting filters and keywords
+        analysis = QueryAnalysis(req)
+        custom_prompt = analysis.custom_prompt
 
+        if analysis.is_meeting:
+            # Explicit meeting query - route directly to meetings
+            meeting_filters = analysis.meeting_filters
             meetings = fetch_meetings(meeting_filters)
             
             if not meetings:
                 answer = format_meeting_html(req.question, [], "No matching meeting record found in the database.")
             else:
-                try:
-                    if custom_prompt:
-                        answer_text = generate_meeting_summary_with_prompt(meetings, custom_prompt)
-                    else:
-                        answer_text = generate_summary_from_db(meetings)
-                except Exception as e:
-                    answer_text = f"⚠️ Meeting summary generation failed: {str(e)}"
+                answer_text = summarize_meetings(meetings, custom_prompt, deadline=deadline)
                 answer = format_meeting_html(req.question, meetings, answer_text)
 
             return {
@@ -892,100 +1104,29 @@ def ask_ai(req: Question):
                 "data": meetings,
             }
         
-        # Not an explicit meeting query - search BOTH projects and meetings
-        # First, try to find projects
-        project_filters = detect_filters(req.question)
-        if getattr(req, 'ward', None):
-            project_filters['ward'] = req.ward
-        if getattr(req, 'contractor', None):
-            project_filters['contractor'] = req.contractor
-        if getattr(req, 'project_name', None):
-            project_filters['project_name'] = req.project_name
-        if getattr(req, 'body_text', None):
-            project_filters['body_text'] = req.body_text
-        
-        project_records = fetch_projects(project_filters)
-        
-        # Also search meetings using the same filters
-        meeting_filters = detect_meeting_filters(req.question)
-        if getattr(req, 'ward', None):
-            meeting_filters['ward'] = req.ward
-        
-        # Extract keywords from question to search meeting data
-        # Look for any meaningful words that might be in meeting data
-        question_lower = req.question.lower()
-        words = re.findall(r'\b[a-z]{3,}\b', question_lower)
-        stopwords = {'what', 'when', 'where', 'who', 'how', 'tell', 'show', 'give', 'about', 'with', 'from', 'planned', 'happening', 'discussed'}
-        keywords = [w for w in words if w not in stopwords]
-        
-        # Search meeting data for these keywords in various fields
-        meetings = []
-        if keywords:
-            conn = sqlite3.connect(DB_PATH, timeout=30.0)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Build a search query that looks in multiple fields
-            search_conditions = []
-            search_values = []
-            
-            for keyword in keywords[:5]:  # Limit to first 5 keywords
-                like_pattern = f"%{keyword}%"
-                search_conditions.append("(LOWER(objective) LIKE ? OR LOWER(venue) LIKE ? OR LOWER(ward) LIKE ? OR LOWER(projects_discussed_list) LIKE ? OR LOWER(attendees_present) LIKE ?)")
-                search_values.extend([like_pattern] * 5)
-            
-            if search_conditions:
-                query = f"SELECT * FROM Meeting_data WHERE {' OR '.join(search_conditions)} ORDER BY created_at DESC LIMIT 10"
-                print(f"[DEBUG] Meeting search query: {query[:200]}...")
-                cursor.execute(query, search_values)
-                rows = cursor.fetchall()
-                
-                for r in rows:
-                    d = dict(r)
-                    # Parse JSON list fields
-                    for k in ("attendees_present", "projects_discussed_list"):
-                        try:
-                            raw = d.get(k)
-                            if raw is None:
-                                d[k] = []
-                            elif isinstance(raw, str):
-                                d[k] = json.loads(raw) if raw.strip() else []
-                            else:
-                                d[k] = raw
-                        except Exception:
-                            d[k] = []
-                    meetings.append(d)
-            
-            conn.close()
-        
-        # Decide which data source to use
-        # Priority: meetings if found, otherwise projects
-        if meetings:
-            # Found meeting data - use it!
-            try:
-                if custom_prompt:
-                    answer_text = generate_meeting_summary_with_prompt(meetings, custom_prompt)
-                else:
-                    answer_text = generate_summary_from_db(meetings)
-            except Exception as e:
-                answer_text = f"⚠️ Meeting summary generation failed: {str(e)}"
+        # Not an explicit meeting query - search BOTH projects and meetings,
+        # and answer from whichever source ranks best for this question
+        project_records, meetings, candidates = retrieve(analysis)
+        source = candidates[0][1] if candidates else "PROJECT_DATA"
+
+        if source == "Meeting_data":
+            answer_text = summarize_meetings(meetings, custom_prompt, deadline=deadline)
             answer = format_meeting_html(req.question, meetings, answer_text)
             
             return {
                 "source": "Meeting_data",
-                "filters_used": meeting_filters,
+                "filters_used": analysis.meeting_filters,
                 "records_found": len(meetings),
                 "answer": answer,
                 "data": meetings,
             }
         else:
-            # No meetings found - use project data
-            answer = explain(req.question, project_records, user_prompt=custom_prompt, user_model=getattr(req, 'model', None))
+            answer = explain(req.question, project_records, user_prompt=custom_prompt, user_model=getattr(req, 'model', None), deadline=deadline)
             data = [dict(r) if hasattr(r, 'keys') else r for r in project_records]
             
             return {
                 "source": "PROJECT_DATA",
-                "filters_used": project_filters,
+                "filters_used": analysis.project_filters,
                 "records_found": len(project_records),
                 "answer": answer,
                 "data": data
@@ -1017,8 +1158,10 @@ def serve_ui():
     """
 
 
-@app.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
+# Plain def: FastAPI runs it on the threadpool, so OCR, the LLM calls and the
+# blocking DB write never stall the event loop
+@app.post("/upload-pdf", dependencies=[Depends(fastapi_dependency("upload"))])
+def upload_pdf(file: UploadFile = File(...)):
     """Handle PDF upload, extract text, classify data, store in Meeting_data table, and generate summary from database"""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Please upload a PDF file")
@@ -1065,12 +1208,9 @@ async def upload_pdf(file: UploadFile = File(...)):
         # Extract projects
         projects = classified_data.get("projects", [])
         
-        # Use connection with timeout to prevent locking
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
-        cursor = conn.cursor()
-        
-        # Insert ONE row per project into Meeting_data
-        projects_inserted = 0
+        # ONE row per project into Meeting_data, written in a single transaction
+        # by the DB writer thread
+        rows = []
         for idx, project in enumerate(projects, 1):
             if not project.get("project_name"):
                 continue
@@ -1081,12 +1221,7 @@ async def upload_pdf(file: UploadFile = File(...)):
             # Create projects_discussed_list with just this project
             projects_json = json.dumps([project.get("project_name")])
             
-            cursor.execute('''
-            INSERT OR REPLACE INTO Meeting_data 
-            (meeting_id, objective, meeting_date, meeting_time, attendees_present, ward, venue, projects_discussed_list,
-             allocated_budget, estimated_completion, corporator_responsible, timeline)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            rows.append((
                 meeting_id,
                 classified_data.get("objective"),
                 classified_data.get("meeting_date"),
@@ -1100,11 +1235,17 @@ async def upload_pdf(file: UploadFile = File(...)):
                 classified_data.get("corporator_responsible"),
                 project.get("timeline")
             ))
-            projects_inserted += 1
         
-        conn.commit()
-        conn.close()
-        conn = None
+        run_write(DB_PATH, lambda conn: conn.executemany('''
+            INSERT OR REPLACE INTO Meeting_data 
+            (meeting_id, objective, meeting_date, meeting_time, attendees_present, ward, venue, projects_discussed_list,
+             allocated_budget, estimated_completion, corporator_responsible, timeline)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows))
+        projects_inserted = len(rows)
+        # New wards / corporators become recognisable in questions
+        gazetteer.invalidate()
+        _meeting_vocab.refresh(force=True)
         store_duration = time.perf_counter() - store_start
         print(f"Inserted {projects_inserted} project records into Meeting_data table")
         
@@ -1114,7 +1255,7 @@ async def upload_pdf(file: UploadFile = File(...)):
         # Step 4: Generate summary from database
         summary_start = time.perf_counter()
         # Fetch ALL project records for this meeting (all rows with meeting_id starting with base_meeting_id)
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn = traced_connect(DB_PATH, timeout=30.0)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM Meeting_data WHERE meeting_id LIKE ?", (f"{meeting_id}%",))
@@ -1180,4 +1321,19 @@ async def upload_pdf(file: UploadFile = File(...)):
             try:
                 shutil.rmtree("output")
             except:
-                pass
\ No newline at end of file
+                pass
+
+
+# -------------------- METRICS --------------------
+@app.get("/metrics")
+def get_metrics():
+    """LLM/OCR call, admission and per-route request/SQL metrics, Prometheus text format."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/query-plans")
+def get_query_plans(scans: int = 0):
+    """Plans seen so far (SQL_PLAN_AUDIT=1 only); ?scans=1 lists full scans only."""
+    if not plan_audit.enabled:
+        raise HTTPException(status_code=404, detail="Query plan audit is off (set SQL_PLAN_AUDIT=1)")
+    return {"statements": plan_audit.report(scans_only=bool(scans))}
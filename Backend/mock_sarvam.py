@@ -0,0 +1,350 @@
+"""
+Local Sarvam stand-in for offline load and latency testing.
+
+Implements the chat-completion and document-intelligence endpoints used by the
+app, with configurable latency, error rate, token throughput and canned JSON
+outputs (data/mock_sarvam_fixtures.json). Run:
+
+    python mock_sarvam.py --port 8100
+
+and point the app at it:
+
+    SARVAM_API_KEY=mock
+    SARVAM_API_BASE=http://127.0.0.1:8100
+    SARVAM_API_URL=http://127.0.0.1:8100/v1/chat/completions
+    SARVAM_MODEL=sarvam-m
+
+Behaviour is configured with MOCK_SARVAM_* environment variables and can be
+changed at runtime through GET/POST /mock/config.
+"""
+
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_PATH = os.environ.get("MOCK_SARVAM_FIXTURES") or os.path.join(BASE_DIR, "data", "mock_sarvam_fixtures.json")
+
+# -------------------- CONFIG --------------------
+config = {
+    # fixed | uniform | normal | lognormal | exponential
+    "latency_distribution": os.environ.get("MOCK_SARVAM_LATENCY_DIST", "lognormal"),
+    # time to first token, in milliseconds
+    "latency_ms": float(os.environ.get("MOCK_SARVAM_LATENCY_MS", "400")),
+    # spread: +/- range for uniform, std-dev for normal, sigma for lognormal
+    "latency_jitter": float(os.environ.get("MOCK_SARVAM_LATENCY_JITTER", "0.5")),
+    # generation speed; 0 disables the per-token delay
+    "tokens_per_second": float(os.environ.get("MOCK_SARVAM_TOKENS_PER_SEC", "60")),
+    # fraction of requests answered with an error status
+    "error_rate": float(os.environ.get("MOCK_SARVAM_ERROR_RATE", "0")),
+    "error_status": int(os.environ.get("MOCK_SARVAM_ERROR_STATUS", "503")),
+    # simulated document-intelligence processing time per job
+    "ocr_seconds": float(os.environ.get("MOCK_SARVAM_OCR_SECONDS", "2")),
+    "seed": os.environ.get("MOCK_SARVAM_SEED"),
+}
+
+_rng = random.Random(config["seed"])
+_rng_lock = threading.Lock()
+
+
+def load_fixtures(path=FIXTURES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+fixtures = load_fixtures()
+
+app = FastAPI(title="Sarvam mock")
+
+# -------------------- SIMULATION --------------------
+def sample_latency():
+    """Seconds before the first token, drawn from the configured distribution."""
+    mean = config["latency_ms"] / 1000.0
+    jitter = config["latency_jitter"]
+    dist = config["latency_distribution"]
+    with _rng_lock:
+        if dist == "fixed":
+            value = mean
+        elif dist == "uniform":
+            value = _rng.uniform(mean * (1 - jitter), mean * (1 + jitter))
+        elif dist == "normal":
+            value = _rng.gauss(mean, mean * jitter)
+        elif dist == "exponential":
+            value = _rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            # lognormal with the configured median; sigma=jitter gives a long tail
+            value = mean * _rng.lognormvariate(0.0, jitter)
+    return max(0.0, value)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def should_fail():
+    with _rng_lock:
+        return _rng.random() < config["error_rate"]
+
+
+def error_response():
+    status = config["error_status"]
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": "Simulated provider error", "code": "mock_error", "status": status}},
+    )
+
+
+def classify_prompt(messages):
+    """Pick the fixture purpose from the prompt text."""
+    text = "\n".join(str(m.get("content", "")) for m in messages)
+    for route in fixtures.get("routes", []):
+        if route["match"] in text:
+            return route["purpose"], text
+    return "answer", text
+
+
+def keywords_response(prompt_text):
+    m = re.search(r'Query: "(.*?)"', prompt_text)
+    query = (m.group(1) if m else "").lower()
+    ward = re.search(r"\bward\s*(?:no\.?\s*)?(\d+)", query)
+    words = [w for w in re.findall(r"[a-z]+", query) if len(w) >= 3]
+    return {
+        "ward_no": ward.group(1) if ward else None,
+        "ward_name": None,
+        "project_type": None,
+        "corporator_name": None,
+        "status": "delayed" if "delay" in query else None,
+        "keywords": words[:6],
+    }
+
+
+def completion_content(purpose, prompt_text, max_tokens):
+    if purpose == "keywords":
+        return json.dumps(keywords_response(prompt_text))
+    content = fixtures["responses"].get(purpose, fixtures["responses"]["answer"])
+    if not isinstance(content, str):
+        return json.dumps(content, ensure_ascii=False)
+    # Trim free text to the requested budget so throughput stays realistic
+    if max_tokens and estimate_tokens(content) > max_tokens:
+        content = content[: max_tokens * 4]
+    return content
+
+
+# -------------------- CHAT --------------------
+@app.post("/v1/chat/completions")
+@app.post("/v2/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages") or [{"role": "user", "content": body.get("prompt", "")}]
+    purpose, prompt_text = classify_prompt(messages)
+
+    delay = sample_latency()
+    if should_fail():
+        await asyncio.sleep(delay)
+        return error_response()
+
+    content = completion_content(purpose, prompt_text, body.get("max_tokens"))
+    completion_tokens = estimate_tokens(content)
+    if config["tokens_per_second"] > 0:
+        delay += completion_tokens / config["tokens_per_second"]
+    await asyncio.sleep(delay)
+
+    prompt_tokens = estimate_tokens(prompt_text)
+    return {
+        "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or "sarvam-m",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+        "mock_purpose": purpose,
+    }
+
+
+# -------------------- DOCUMENT INTELLIGENCE --------------------
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _job_or_404(job_id):
+    job = _jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _job_state(job):
+    if job["state"] == "Running" and time.monotonic() >= job["ready_at"]:
+        job["state"] = job["final_state"]
+        job["updated_at"] = _now()
+    return job["state"]
+
+
+def _status_payload(job):
+    state = _job_state(job)
+    detail_state = {"Completed": "Success", "Failed": "Failed"}.get(state, state if state in ("Pending", "Running") else "Pending")
+    done = state in ("Completed", "Failed")
+    return {
+        "job_id": job["job_id"],
+        "job_state": state,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "storage_container_type": "Local",
+        "total_files": len(job["files"]) or 1,
+        "successful_files_count": 1 if state == "Completed" else 0,
+        "failed_files_count": 1 if state == "Failed" else 0,
+        "error_message": "Simulated processing failure" if state == "Failed" else None,
+        "job_details": [{
+            "inputs": [{"file_name": name, "file_id": name} for name in job["files"]],
+            "outputs": [{"file_name": "output.zip", "file_id": "output.zip"}] if done else [],
+            "state": detail_state,
+            "total_pages": 1,
+            "pages_processed": 1 if done else 0,
+            "pages_succeeded": 1 if state == "Completed" else 0,
+            "pages_failed": 1 if state == "Failed" else 0,
+        }],
+    }
+
+
+@app.post("/doc-digitization/job/v1")
+async def create_job(request: Request):
+    if should_fail():
+        return error_response()
+    body = await request.json()
+    params = body.get("job_parameters") or {}
+    job_id = f"mock-{uuid.uuid4().hex[:16]}"
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "state": "Accepted",
+            "final_state": "Completed",
+            "files": {},
+            "created_at": _now(),
+            "updated_at": _now(),
+            "ready_at": 0.0,
+            "params": params,
+        }
+    return {
+        "job_id": job_id,
+        "storage_container_type": "Local",
+        "job_parameters": {"language": params.get("language", "hi-IN"), "output_format": params.get("output_format", "md")},
+        "job_state": "Accepted",
+    }
+
+
+@app.post("/doc-digitization/job/v1/upload-files")
+async def upload_links(request: Request):
+    body = await request.json()
+    job = _job_or_404(body.get("job_id"))
+    base = str(request.base_url).rstrip("/")
+    urls = {}
+    for name in body.get("files") or []:
+        job["files"].setdefault(name, b"")
+        urls[name] = {"file_url": f"{base}/mock-storage/{job['job_id']}/{name}"}
+    job["state"] = "Pending"
+    return {"job_id": job["job_id"], "job_state": "Pending", "upload_urls": urls, "storage_container_type": "Local"}
+
+
+@app.put("/mock-storage/{job_id}/{filename}")
+async def put_file(job_id: str, filename: str, request: Request):
+    job = _job_or_404(job_id)
+    job["files"][filename] = await request.body()
+    return Response(status_code=201)
+
+
+@app.post("/doc-digitization/job/v1/{job_id}/start")
+async def start_job(job_id: str):
+    job = _job_or_404(job_id)
+    job["state"] = "Running"
+    job["final_state"] = "Failed" if should_fail() else "Completed"
+    job["ready_at"] = time.monotonic() + config["ocr_seconds"]
+    job["updated_at"] = _now()
+    return _status_payload(job)
+
+
+@app.get("/doc-digitization/job/v1/{job_id}/status")
+async def job_status(job_id: str):
+    return _status_payload(_job_or_404(job_id))
+
+
+@app.post("/doc-digitization/job/v1/{job_id}/download-files")
+async def download_links(job_id: str, request: Request):
+    job = _job_or_404(job_id)
+    state = _job_state(job)
+    base = str(request.base_url).rstrip("/")
+    urls = {}
+    if state == "Completed":
+        urls["output.zip"] = {"file_url": f"{base}/mock-storage/{job_id}/output.zip"}
+    return {"job_id": job_id, "job_state": state, "storage_container_type": "Local", "download_urls": urls}
+
+
+@app.get("/mock-storage/{job_id}/output.zip")
+async def get_output(job_id: str):
+    _job_or_404(job_id)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("document.md", fixtures["responses"]["ocr_markdown"])
+    return Response(content=buf.getvalue(), media_type="application/zip")
+
+
+# -------------------- CONTROL --------------------
+@app.get("/health")
+def health():
+    return {"status": "mock", "jobs": len(_jobs)}
+
+
+@app.get("/mock/config")
+def get_config():
+    return config
+
+
+@app.post("/mock/config")
+async def update_config(request: Request):
+    """Adjust latency/error settings between benchmark runs without restarting."""
+    global fixtures
+    body = await request.json()
+    for key, value in body.items():
+        if key == "fixtures_path":
+            fixtures = load_fixtures(value)
+        elif key in config:
+            config[key] = type(config[key])(value) if config[key] is not None else value
+    if "seed" in body:
+        with _rng_lock:
+            _rng.seed(body["seed"])
+    return config
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Sarvam stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MOCK_SARVAM_PORT", 8100)))
+    args = parser.parse_args()
+    print(f"\n  Sarvam mock — http://{args.host}:{args.port}  ({config['latency_distribution']} {config['latency_ms']}ms, errors {config['error_rate']:.0%})\n")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
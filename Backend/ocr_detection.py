@@ -1,7 +1,8 @@
 import os
 import zipfile
 import json
-from sarvamai import SarvamAI
+from utils.sarvam_client import create_client, CHAT_MODEL_KWARGS
+from utils.llm_metrics import track_llm, ocr_stage
 from dotenv import load_dotenv
 
 # =========================
@@ -14,11 +15,15 @@ PDF_PATH = "document.pdf"   # change to your file
 # Allow configuring document language; default to English-India (must be one of Sarvam's allowed codes).
 SARVAM_DOC_LANGUAGE = os.getenv("SARVAM_DOC_LANGUAGE", "en-IN")
 
-# Proper SarvamAI client initialization using the correct constructor argument.
-if SARVAM_API_KEY:
-    client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
-else:
-    client = None
+# SarvamAI client, built on first use so importing this module stays cheap
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None and SARVAM_API_KEY:
+        _client = create_client(SARVAM_API_KEY)
+    return _client
 
 # =========================
 # STEP 1 — OCR EXTRACTION
@@ -26,25 +31,32 @@ else:
 def extract_text_from_pdf(pdf_path):
     print("Creating OCR job...")
 
+    client = _get_client()
     if client is None:
         raise RuntimeError("SARVAM_API_KEY is not configured; cannot run document intelligence OCR.")
 
-    job = client.document_intelligence.create_job(
-        language=SARVAM_DOC_LANGUAGE,
-        output_format="md"
-    )
-
-    job.upload_file(pdf_path)
-    print("File uploaded")
-
-    job.start()
-    print("Processing...")
-
-    status = job.wait_until_complete()
-    print("Completed:", status.job_state)
-
-    job.download_output("output.zip")
-    print("Downloaded output.zip")
+    with track_llm("ocr") as call:
+        with ocr_stage("create"):
+            job = client.document_intelligence.create_job(
+                language=SARVAM_DOC_LANGUAGE,
+                output_format="md"
+            )
+
+        with ocr_stage("upload"):
+            job.upload_file(pdf_path)
+        print("File uploaded")
+
+        with ocr_stage("process"):
+            job.start()
+            print("Processing...")
+            status = job.wait_until_complete()
+        print("Completed:", status.job_state)
+        if status.job_state != "Completed":
+            call.fail(f"job_{str(status.job_state).lower()}")
+
+        with ocr_stage("download"):
+            job.download_output("output.zip")
+        print("Downloaded output.zip")
 
     # unzip
     with zipfile.ZipFile("output.zip", 'r') as zip_ref:
@@ -66,6 +78,7 @@ def classify_meeting_data(extracted_text: str):
     """Extract structured meeting data from OCR text using AI classification - extracts MULTIPLE projects"""
     print("Classifying meeting data and extracting all projects...")
     
+    client = _get_client()
     if client is None:
         raise RuntimeError("SARVAM_API_KEY is not configured; cannot classify meeting data.")
     
@@ -107,13 +120,15 @@ DOCUMENT TEXT:
 {extracted_text[:20000]}
 """
     
-    response = client.chat.completions(
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,  # Very low temperature for accurate extraction
-        max_tokens=3000
-    )
-    
-    response_text = response.choices[0].message.content.strip()
+    with track_llm("classification", prompt) as call:
+        response = client.chat.completions(
+            **CHAT_MODEL_KWARGS,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,  # Very low temperature for accurate extraction
+            max_tokens=3000
+        )
+        response_text = response.choices[0].message.content.strip()
+        call.record_response(response_text, response)
     
     # Try to extract JSON from the response (handle cases where AI wraps it in markdown)
     if "```json" in response_text:
@@ -151,6 +166,7 @@ def generate_summary_from_db(meeting_records):
     """Generate detailed, comprehensive summary from Meeting_data table records"""
     print("Generating detailed human summary from database...")
 
+    client = _get_client()
     if client is None:
         raise RuntimeError("SARVAM_API_KEY is not configured; cannot generate summary.")
     
@@ -200,19 +216,24 @@ MEETING DATA FROM DATABASE (Multiple project records):
 """
 
     # SarvamAI Python SDK exposes `chat.completions` as a callable function.
-    response = client.chat.completions(
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,  # Lower temperature for consistency
-        max_tokens=2000
-    )
+    with track_llm("meeting_summary", prompt) as call:
+        response = client.chat.completions(
+            **CHAT_MODEL_KWARGS,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,  # Lower temperature for consistency
+            max_tokens=2000
+        )
+        content = response.choices[0].message.content
+        call.record_response(content, response)
 
-    return response.choices[0].message.content
+    return content
 
 
 def generate_meeting_summary_with_prompt(meeting_records, user_prompt: str):
     """Generate detailed summary from Meeting_data table records using a custom user prompt"""
     print("Generating detailed custom summary from database with user prompt...")
 
+    client = _get_client()
     if client is None:
         raise RuntimeError("SARVAM_API_KEY is not configured; cannot generate summary.")
     
@@ -289,13 +310,17 @@ IMPORTANT INSTRUCTIONS:
 """
 
     # SarvamAI Python SDK exposes `chat.completions` as a callable function.
-    response = client.chat.completions(
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,  # Lower temperature for consistency
-        max_tokens=2000
-    )
-
-    return response.choices[0].message.content
+    with track_llm("meeting_summary", prompt) as call:
+        response = client.chat.completions(
+            **CHAT_MODEL_KWARGS,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,  # Lower temperature for consistency
+            max_tokens=2000
+        )
+        content = response.choices[0].message.content
+        call.record_response(content, response)
+
+    return content
 
 
 
@@ -0,0 +1,352 @@
+"""Generate a synthetic JanSaakshi dataset at benchmark scale.
+
+    python synth_data.py --projects 100000 --out bench_data/100k
+
+Writes <out>/jansaakshi.db (Flask app schema) and <out>/DATA_DB.db
+(PROJECT_DATA / Meeting_data for main.py). Rows follow the seed_data.py
+patterns -- the same cities, wards, zones, project types, statuses and
+contractors, with a skewed ward distribution so some wards are hot -- and
+the other tables scale with --projects unless given explicitly:
+
+    meetings = projects / 5, complaints = projects / 2, users = projects / 20,
+    reviews = projects / 10, follow-ups = 3 per user
+
+Every user's password is "bench"; "bench_admin" is an admin. The run is
+deterministic for a given --seed.
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+BATCH = 10000
+PASSWORD = "bench"
+
+# ==================== VOCABULARY (from seed_data.py) ====================
+CITIES = {
+    "mumbai": {
+        "state": "Maharashtra", "wards": 227,
+        "zones": ["A", "B", "C", "D", "E", "F/N", "F/S", "G/N", "G/S", "H/E", "H/W", "K/E", "K/W",
+                  "L", "M/E", "M/W", "N", "P/N", "P/S", "R/C", "R/N", "R/S", "S", "T"],
+        "places": ["Kandivali West", "Kandivali East", "Andheri East", "Andheri West", "Bandra West",
+                   "Dadar", "Malad", "Worli", "Mulund", "Kurla", "Borivali", "Ghatkopar", "Charkop",
+                   "Versova", "Thakur Village", "Lokhandwala", "Chembur", "Powai", "Goregaon", "Sion"],
+        "corporators": ["Shri Bhalchandra Shirsat", "Smt. Rajul Patel", "Shri Ameet Satam",
+                        "Shri Asif Zakaria", "Shri Vishwanath Mahadeshwar", "Shri Vinod Shelar",
+                        "Shri Sunil Prabhu", "Shri Mihir Kotecha", "Shri Mangesh Kudalkar",
+                        "Smt. Sandya Doshi", "Shri Pravin Darekar"],
+        "meet_type": "ward_committee",
+    },
+    "delhi": {
+        "state": "Delhi", "wards": 250,
+        "zones": ["Central", "South", "South West", "South East", "North West", "West", "East",
+                  "Shahdara", "Najafgarh", "Rohini", "Civil Lines", "Karol Bagh"],
+        "places": ["Chandni Chowk", "Dwarka", "Saket", "Rohini", "Lajpat Nagar", "Pitampura",
+                   "Okhla", "Janakpuri", "Karol Bagh", "Mayur Vihar", "Shahdara", "Vasant Kunj"],
+        "corporators": ["MCD Commissioner", "MCD South West", "MCD South Zone", "MCD North West",
+                        "MCD South East", "MCD West Zone", "MCD Central", "MCD East Zone", "MCD Shahdara"],
+        "meet_type": "zone_committee",
+    },
+    "pune": {
+        "state": "Maharashtra", "wards": 58,
+        "zones": ["Aundh", "Kothrud", "Hadapsar", "Yerawada", "Dhole Patil", "Bibwewadi"],
+        "places": ["Aundh", "Baner", "Kothrud", "Hadapsar", "Viman Nagar", "Shivajinagar", "Wakad"],
+        "corporators": ["PMC Ward Office Aundh", "PMC Ward Office Kothrud", "PMC Ward Office Hadapsar"],
+        "meet_type": "ward_committee",
+    },
+}
+
+PROJECT_TYPES = {
+    "roads": ["Road Resurfacing", "Road Widening", "Footpath Construction", "Flyover Construction"],
+    "water_supply": ["Water Pipeline Replacement", "Water ATMs", "Water Pipeline"],
+    "drainage": ["Storm Water Drain", "Nallah Covering", "STP Expansion", "Drain Rejuvenation"],
+    "parks": ["Garden Upgrade", "Park Renovation", "Promenade"],
+    "street_lighting": ["LED Street Lighting", "Smart Lighting"],
+    "schools": ["School Renovation", "School Extension", "School Upgrades"],
+    "healthcare": ["Healthcare Centre Upgrade", "Health Centre", "Polyclinic"],
+    "waste_management": ["Waste-to-Energy Expansion", "Dry Waste Centre"],
+    "other": ["Community Hall", "Pedestrian Plaza"],
+}
+STATUSES = ["ongoing", "ongoing", "delayed", "completed"]
+CONTRACTORS = ["ABC Infra Pvt Ltd", "HydroFix Solutions", "CleanStream Corp", "Green Spaces India",
+               "Bajaj Electricals", "Enviro Treatment Systems", "Patel Construction", "Shree Construction",
+               "EduBuild India", "Patel Infrastructure", "Marine Works India", "Aquapure Systems",
+               "Nirmal Infrastructure", "Mediquip Healthcare", "L&T Infrastructure", "Shapoorji Pallonji",
+               "Tata Projects", "Green Delhi Foundation", "WaterLife India", "Crompton Greaves",
+               "Jindal Urban Infra", "NBCC India Ltd", "PWD Delhi", "Delhi Health Infra", "Gammon India"]
+CONTRACTOR_SUFFIXES = ["Infra Pvt Ltd", "Constructions", "Engineering Works", "Builders", "Projects Ltd"]
+COMPLAINT_TEXT = ["Work stalled for weeks, site left open", "Potholes reappeared after resurfacing",
+                  "Water supply disrupted since the pipeline work began", "Drain overflowing onto the road",
+                  "Streetlights not working on the stretch", "Debris dumped on the footpath",
+                  "Contractor working without safety barricades", "Garden gates locked during park hours"]
+COMPLAINT_STATUSES = ["submitted", "submitted", "reviewed", "resolved"]
+REVIEW_TITLES = ["Slow progress", "Good quality work", "Missed deadlines", "Responsive to complaints",
+                 "Poor finishing", "Completed on time"]
+
+
+# ==================== GENERATORS ====================
+def _ward_weights(n):
+    """Zipf-like weights so a handful of wards hold most of the rows."""
+    return [1 / (rank ** 0.8) for rank in range(1, n + 1)]
+
+
+_ward_tables = {}
+
+
+def _pick_ward(rng, city):
+    info = CITIES[city]
+    if city not in _ward_tables:
+        wards = list(range(1, info["wards"] + 1))
+        rng.shuffle(wards)
+        cum, total = [], 0
+        for w in _ward_weights(len(wards)):
+            total += w
+            cum.append(total)
+        _ward_tables[city] = (wards, cum)
+    wards, cum = _ward_tables[city]
+    ward = rng.choices(wards, cum_weights=cum)[0]
+    place = info["places"][ward % len(info["places"])]
+    zone = info["zones"][ward % len(info["zones"])]
+    return str(ward), place, zone, info["corporators"][ward % len(info["corporators"])]
+
+
+def _contractors(n):
+    names = list(CONTRACTORS)
+    i = 0
+    while len(names) < n:
+        base = CONTRACTORS[i % len(CONTRACTORS)].split()[0]
+        names.append(f"{base} {CONTRACTOR_SUFFIXES[i % len(CONTRACTOR_SUFFIXES)]} {i // len(CONTRACTORS) + 1}")
+        i += 1
+    return names
+
+
+def _day(rng, start=date(2022, 1, 1), span=1400):
+    return start + timedelta(days=rng.randrange(span))
+
+
+def project_rows(rng, city_ids, count, contractors, now):
+    cities = list(city_ids)
+    for _ in range(count):
+        city = rng.choice(cities)
+        ward, place, zone, corporator = _pick_ward(rng, city)
+        ptype = rng.choice(list(PROJECT_TYPES))
+        status = rng.choice(STATUSES)
+        approval = _day(rng)
+        start = approval + timedelta(days=rng.randrange(30, 90))
+        expected = start + timedelta(days=rng.randrange(180, 720))
+        actual = (expected - timedelta(days=rng.randrange(0, 30))).isoformat() if status == "completed" else None
+        delay = rng.randrange(30, 450) if status == "delayed" else 0
+        name = f"{place} {rng.choice(PROJECT_TYPES[ptype])}"
+        if rng.random() < 0.5:
+            name += f" Phase {rng.randrange(1, 5)}"
+        yield (city_ids[city], name, f"{name} in ward {ward} ({zone}), {ptype.replace('_', ' ')} works.",
+               ward, place, zone, status, float(rng.randrange(10, 2000) * 100000), corporator,
+               rng.choice(contractors), ptype, approval.isoformat(), start.isoformat(), expected.isoformat(),
+               actual, delay, f"{place}, ward {ward}", "synth_data", now, now)
+
+
+def meeting_rows(rng, city_ids, count):
+    cities = list(city_ids)
+    for _ in range(count):
+        city = rng.choice(cities)
+        ward, place, zone, corporator = _pick_ward(rng, city)
+        discussed = [f"{place} {rng.choice(rng.choice(list(PROJECT_TYPES.values())))}"
+                     for _ in range(rng.randrange(1, 4))]
+        yield (city_ids[city], ward, place, _day(rng).isoformat(), CITIES[city]["meet_type"],
+               f"{place} Ward Office", f"Review of ongoing projects in {place}",
+               f"{corporator}, Ward Officer, {rng.randrange(5, 40)} citizens",
+               json.dumps(discussed), None, len(discussed))
+
+
+def complaint_rows(rng, city_ids, count, user_count):
+    cities = list(city_ids)
+    for _ in range(count):
+        city = rng.choice(cities)
+        ward, place, _, _ = _pick_ward(rng, city)
+        user_id = rng.randrange(1, user_count + 1) if rng.random() < 0.6 else None
+        yield (city_ids[city], user_id, ward, rng.choice(list(PROJECT_TYPES)), rng.choice(COMPLAINT_TEXT),
+               place, f"Citizen {rng.randrange(1, 10 ** 6)}", f"9{rng.randrange(10 ** 8, 10 ** 9)}",
+               rng.choice(COMPLAINT_STATUSES), _day(rng).isoformat())
+
+
+# ==================== WRITERS ====================
+def _insert(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+
+
+def build_app_db(path, rng, counts):
+    os.environ["DATABASE_PATH"] = path
+    from utils.database import init_database, hash_password
+
+    init_database()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    for name, info in CITIES.items():
+        conn.execute("INSERT OR IGNORE INTO city (city_name, state) VALUES (?, ?)", (name, info["state"]))
+    conn.commit()
+    city_ids = {name: cid for cid, name in conn.execute("SELECT city_id, city_name FROM city")}
+
+    # One salted hash shared by every account: hashing per user adds nothing here
+    password = hash_password(PASSWORD)
+    users = counts["users"]
+    _insert(conn, "INSERT INTO users (username, password, display_name, city_id, ward, role) VALUES (?,?,?,?,?,?)",
+            ((f"bench_user{i}" if i else "bench_admin", password, f"Bench User {i}",
+              city_ids[rng.choice(list(city_ids))], str(rng.randrange(1, 100)),
+              "admin" if i == 0 else "authorized_user" if i % 10 == 0 else "user")
+             for i in range(users)))
+
+    contractors = _contractors(max(len(CONTRACTORS), counts["projects"] // 200))
+    _insert(conn, """
+        INSERT INTO projects (city_id, project_name, summary, ward_no, ward_name, ward_zone,
+            status, budget, corporator_name, contractor_name, project_type,
+            approval_date, start_date, expected_completion, actual_completion,
+            delay_days, location_details, source_pdf, created_at, updated_at)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    """, project_rows(rng, city_ids, counts["projects"], contractors, now))
+
+    _insert(conn, """
+        INSERT INTO meetings (city_id, ward_no, ward_name, meet_date, meet_type, venue, objective,
+            attendees, projects_discussed, source_pdf, project_count)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?)
+    """, meeting_rows(rng, city_ids, counts["meetings"]))
+
+    _insert(conn, """
+        INSERT INTO complaints (city_id, user_id, ward_no, category, description, location,
+            citizen_name, user_phone, status, created_at)
+        VALUES (?,?,?,?,?,?,?,?,?,?)
+    """, complaint_rows(rng, city_ids, counts["complaints"], users))
+
+    reviews = set()
+    while len(reviews) < min(counts["reviews"], users * len(contractors)):
+        reviews.add((rng.choice(contractors), rng.randrange(1, users + 1)))
+    _insert(conn, "INSERT INTO contractor_reviews (contractor_name, reviewer_id, rating, title, body) VALUES (?,?,?,?,?)",
+            ((name, uid, rng.randrange(1, 6), rng.choice(REVIEW_TITLES), "Synthetic review")
+             for name, uid in reviews))
+
+    follows = set()
+    for uid in range(1, users + 1):
+        for _ in range(counts["follows_per_user"]):
+            follows.add((uid, rng.randrange(1, counts["projects"] + 1)))
+    _insert(conn, "INSERT INTO follow_ups (user_id, project_id) VALUES (?,?)", sorted(follows))
+
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return city_ids
+
+
+def build_data_db(path, app_db):
+    """PROJECT_DATA and Meeting_data (main.py) mirrored from the app database."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS PROJECT_DATA (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ward TEXT,
+            ward_no INTEGER,
+            project_name TEXT,
+            budget TEXT,
+            deadline TEXT,
+            responsible_person TEXT,
+            contractor TEXT,
+            body_text TEXT,
+            status TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Meeting_data (
+            meeting_id TEXT PRIMARY KEY,
+            objective TEXT,
+            meeting_date TEXT,
+            meeting_time TEXT,
+            attendees_present TEXT,
+            ward TEXT,
+            venue TEXT,
+            projects_discussed_list TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            allocated_budget TEXT DEFAULT 'N/A',
+            estimated_completion TEXT DEFAULT 'N/A',
+            corporator_responsible TEXT DEFAULT 'N/A',
+            timeline TEXT
+        )
+    """)
+    conn.execute("ATTACH DATABASE ? AS app", (app_db,))
+    conn.execute("""
+        INSERT INTO PROJECT_DATA (ward, ward_no, project_name, budget, deadline, responsible_person,
+            contractor, body_text, status)
+        SELECT ward_name, ward_key, project_name, CAST(CAST(budget AS INTEGER) AS TEXT), expected_completion,
+            corporator_name, contractor_name, summary,
+            UPPER(SUBSTR(status, 1, 1)) || SUBSTR(status, 2)
+        FROM app.projects ORDER BY id
+    """)
+    conn.execute("""
+        INSERT INTO Meeting_data (meeting_id, objective, meeting_date, meeting_time, attendees_present,
+            ward, venue, projects_discussed_list, corporator_responsible, timeline)
+        SELECT 'MEET-' || REPLACE(meet_date, '-', '') || '-' || printf('%06d', id), objective, meet_date,
+            '11:00', attendees, ward_name, venue, projects_discussed,
+            SUBSTR(attendees, 1, INSTR(attendees, ',') - 1), project_count || ' months'
+        FROM app.meetings ORDER BY id
+    """)
+    conn.commit()
+    conn.execute("DETACH DATABASE app")
+    conn.close()
+
+
+def scaled_counts(projects, **overrides):
+    counts = {
+        "projects": projects,
+        "meetings": max(10, projects // 5),
+        "complaints": max(10, projects // 2),
+        "users": max(20, projects // 20),
+        "reviews": max(10, projects // 10),
+        "follows_per_user": 3,
+    }
+    counts.update({k: v for k, v in overrides.items() if v is not None})
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--meetings", type=int)
+    parser.add_argument("--complaints", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--reviews", type=int)
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = scaled_counts(args.projects, meetings=args.meetings, complaints=args.complaints,
+                           users=args.users, reviews=args.reviews)
+    os.makedirs(args.out, exist_ok=True)
+    app_db = os.path.abspath(os.path.join(args.out, "jansaakshi.db"))
+    data_db = os.path.abspath(os.path.join(args.out, "DATA_DB.db"))
+    for path in (app_db, data_db):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    started = time.perf_counter()
+    build_app_db(app_db, random.Random(args.seed), counts)
+    build_data_db(data_db, app_db)
+    with open(os.path.join(args.out, "dataset.json"), "w") as f:
+        json.dump({"seed": args.seed, "counts": counts, "cities": list(CITIES)}, f, indent=2)
+    print(f"Generated {counts} in {time.perf_counter() - started:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
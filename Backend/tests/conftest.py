@@ -0,0 +1,22 @@
+"""Shared setup: make the Backend modules importable from tests/ and point
+both apps at scratch copies of the seeded databases, so tests never write to
+the real ones. Runs before any test module imports app or main."""
+
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="jansaakshi-tests-")
+# main.py's meeting database is checked in as Data_DB.db
+for env, name, source in (("DATABASE_PATH", "jansaakshi.db", "jansaakshi.db"),
+                          ("DATA_DB_PATH", "DATA_DB.db", "Data_DB.db")):
+    src = os.path.join(BACKEND_DIR, source)
+    dst = os.path.join(SCRATCH_DIR, name)
+    if os.path.exists(src):
+        shutil.copyfile(src, dst)
+    os.environ[env] = dst
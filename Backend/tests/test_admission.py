@@ -0,0 +1,78 @@
+"""Admission control: 429 for a client over its rate, 503 when the wait queue
+times out, and tokens handed back for requests that never ran.
+
+    python -m pytest tests/test_admission.py
+"""
+
+import threading
+
+import pytest
+from flask import Flask
+
+from utils import admission
+from utils.admission import AdmissionController, Rejected
+
+# Rates of 0 never refill, so the buckets hold exactly `burst` tokens
+NO_REFILL = {"rate": 0.0, "burst": 10, "client_rate": 0.0, "client_burst": 10,
+             "concurrency": 1, "queue": 1, "max_wait": 0.05}
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setitem(admission.ROUTE_CLASSES, "test", dict(NO_REFILL, client_burst=1))
+    monkeypatch.setattr(admission, "_controllers", {})
+    app = Flask(__name__)
+
+    @app.route("/expensive")
+    @admission.limit("test")
+    def expensive():
+        return {"ok": True}
+
+    return app.test_client()
+
+
+def test_empty_client_bucket_is_429_with_retry_after(limited_app):
+    assert limited_app.get("/expensive", environ_base={"REMOTE_ADDR": "10.0.0.1"}).status_code == 200
+
+    res = limited_app.get("/expensive", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    assert res.get_json()["error"]
+
+    # Other clients have their own bucket
+    assert limited_app.get("/expensive", environ_base={"REMOTE_ADDR": "10.0.0.2"}).status_code == 200
+
+
+def test_queue_wait_expiry_is_503_and_refunds_tokens():
+    controller = AdmissionController("test", **dict(NO_REFILL, burst=2, client_burst=1))
+    controller.acquire("a")  # holds the only slot
+
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire("b")  # queued, then gives up after max_wait
+    assert rejected.value.status == 503
+    assert rejected.value.retry_after >= 1
+    assert not controller._waiters
+
+    # "b" never ran, so neither its own token nor the global one was spent
+    controller.release()
+    controller.acquire("b")
+    controller.release()
+
+
+def test_queued_request_is_admitted_when_slot_frees():
+    controller = AdmissionController("test", **dict(NO_REFILL, max_wait=5.0))
+    controller.acquire("a")
+    admitted = threading.Event()
+
+    def waiter():
+        controller.acquire("b")
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not admitted.wait(0.05)
+    controller.release()
+    assert admitted.wait(5)
+    thread.join()
+    controller.release()
+    assert controller._running == 0
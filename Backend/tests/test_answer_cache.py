@@ -0,0 +1,58 @@
+"""AI answer caches are keyed on the data version as well as the records
+shown, so editing a record (same ids) never serves the old answer.
+
+    python -m pytest tests/test_answer_cache.py
+"""
+
+import sqlite3
+
+import pytest
+
+import main
+from utils import context_generator
+from utils.database import DATABASE_PATH
+from utils.db_writer import write
+
+
+def _first_row(path, sql):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return dict(conn.execute(sql).fetchone())
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def project():
+    row = _first_row(DATABASE_PATH, "SELECT id, status FROM projects ORDER BY id LIMIT 1")
+    yield row
+    write(DATABASE_PATH, "UPDATE projects SET status=? WHERE id=?", (row["status"], row["id"]))
+
+
+@pytest.fixture
+def meeting():
+    row = _first_row(main.DB_PATH, "SELECT * FROM Meeting_data ORDER BY meeting_id LIMIT 1")
+    yield row
+    write(main.DB_PATH, "UPDATE Meeting_data SET objective=? WHERE meeting_id=?", (row["objective"], row["meeting_id"]))
+
+
+def test_project_answer_key_follows_project_writes(project):
+    key = context_generator._answer_cache_key("Status of  the road?", [project])
+    assert context_generator._answer_cache_key("status of the road?", [project]) == key
+
+    write(DATABASE_PATH, "UPDATE projects SET status='completed' WHERE id=?", (project["id"],))
+    assert context_generator._answer_cache_key("status of the road?", [project]) != key
+
+
+def test_meeting_summary_not_reused_after_edit(meeting, monkeypatch):
+    summaries = []
+    monkeypatch.setattr(main, "generate_summary_from_db",
+                        lambda meetings: summaries.append(meetings) or f"summary {len(summaries)}")
+
+    assert main.summarize_meetings([meeting]) == "summary 1"
+    assert main.summarize_meetings([meeting]) == "summary 1"  # cached
+
+    write(main.DB_PATH, "UPDATE Meeting_data SET objective='Revised objective' WHERE meeting_id=?",
+          (meeting["meeting_id"],))
+    assert main.summarize_meetings([meeting]) == "summary 2"
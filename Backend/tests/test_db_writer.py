@@ -0,0 +1,114 @@
+"""Single-writer thread: group commit, per-write savepoints, results back to callers.
+
+    python -m pytest tests/test_db_writer.py
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import db_writer
+
+
+@pytest.fixture
+def db(tmp_path, request):
+    # The file name is the metrics label, so keep it unique per test
+    path = str(tmp_path / f"{request.node.name}.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, v FROM t ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def _commits(path):
+    return db_writer.db_write_commit_seconds.summary(db=db_writer.get_writer(path).name)["count"]
+
+
+def _hold_writer(path):
+    """Occupy the writer thread until the returned event is set, so writes queue up."""
+    started, release = threading.Event(), threading.Event()
+    blocker = db_writer.get_writer(path).run(lambda conn: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    return blocker, release
+
+
+def _wait_queued(path, n):
+    writer = db_writer.get_writer(path)
+    deadline = time.monotonic() + 5
+    while writer._queue.qsize() < n:
+        assert time.monotonic() < deadline, "writes never reached the queue"
+        time.sleep(0.005)
+
+
+def test_concurrent_writes_share_one_commit(db):
+    blocker, release = _hold_writer(db)
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = [pool.submit(db_writer.write, db, "INSERT INTO t (id, v) VALUES (?, ?)", (i, f"w{i}"))
+                   for i in range(1, 21)]
+        _wait_queued(db, 20)
+        commits_before = _commits(db)
+        release.set()
+        rowids = sorted(f.result(5) for f in futures)
+    blocker.result(5)
+
+    assert rowids == list(range(1, 21))
+    assert len(_rows(db)) == 20
+    # The blocker's own transaction, then all 20 queued writes in one more
+    assert _commits(db) - commits_before == 2
+
+
+def test_failing_write_rolls_back_only_itself(db):
+    writer = db_writer.get_writer(db)
+    blocker, release = _hold_writer(db)
+    first = writer.execute("INSERT INTO t (id, v) VALUES (1, 'first')")
+    duplicate = writer.execute("INSERT INTO t (id, v) VALUES (1, 'duplicate')")
+
+    def partial_then_fail(conn):
+        conn.execute("INSERT INTO t (id, v) VALUES (2, 'rolled back')")
+        raise ValueError("boom")
+
+    failing = writer.run(partial_then_fail)
+    last = writer.execute("INSERT INTO t (id, v) VALUES (3, 'last')")
+    commits_before = _commits(db)
+    release.set()
+    blocker.result(5)
+
+    assert first.result(5) == 1
+    assert last.result(5) == 3
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result(5)
+    with pytest.raises(ValueError, match="boom"):
+        failing.result(5)
+    assert _rows(db) == [(1, "first"), (3, "last")]
+    # The blocker's transaction, then one for all four queued writes
+    assert _commits(db) - commits_before == 2
+
+
+def test_run_write_returns_result_and_reraises(db):
+    def insert_two(conn):
+        conn.execute("INSERT INTO t (v) VALUES ('a')")
+        last = conn.execute("INSERT INTO t (v) VALUES ('b')").lastrowid
+        return last, conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+    assert db_writer.run_write(db, insert_two) == (2, 2)
+    assert db_writer.write(db, "UPDATE t SET v='c' WHERE id=?", (2,)) is not None
+
+    def fail(conn):
+        conn.execute("DELETE FROM t")
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        db_writer.run_write(db, fail)
+    assert _rows(db) == [(1, "a"), (2, "c")]
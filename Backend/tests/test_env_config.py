@@ -0,0 +1,49 @@
+"""Settings in Backend/.env must reach the utils modules that read them at import.
+
+Each app is imported in a fresh interpreter from a scratch copy of Backend/
+with its own .env, so the real .env and databases are never touched.
+
+    python -m pytest tests/test_env_config.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+DOTENV = {
+    "LLM_DEADLINE_SECONDS": "1.5",
+    "SARVAM_API_BASE": "http://127.0.0.1:8100",
+}
+PROBE = (
+    "import {app}\n"
+    "from utils import llm_guard, sarvam_client\n"
+    "print(llm_guard.LLM_DEADLINE_SECONDS, sarvam_client.SARVAM_API_BASE)\n"
+)
+
+
+def _scratch_backend(tmp_path):
+    root = tmp_path / "Backend"
+    shutil.copytree(BACKEND_DIR, root, ignore=shutil.ignore_patterns(
+        "*.db", "*.sqbpro", "__pycache__", "uploads", "bench_data", "tests", "Use-for-react-production", ".env"))
+    lines = [f"{key}={value}" for key, value in DOTENV.items()]
+    lines += ["DATABASE_PATH=jansaakshi.db", "DATA_DB_PATH=DATA_DB.db"]
+    (root / ".env").write_text("\n".join(lines) + "\n")
+    return root
+
+
+@pytest.mark.parametrize("app", ["app", "main"])
+def test_dotenv_reaches_import_time_settings(tmp_path, app):
+    root = _scratch_backend(tmp_path)
+    env = {k: v for k, v in os.environ.items()
+           if k not in DOTENV and k not in ("DATABASE_PATH", "DATA_DB_PATH")}
+    out = subprocess.run([sys.executable, "-c", PROBE.format(app=app)], cwd=root, env=env,
+                         capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    deadline, api_base = out.stdout.strip().splitlines()[-1].split()
+    assert float(deadline) == 1.5
+    assert api_base == DOTENV["SARVAM_API_BASE"]
@@ -0,0 +1,23 @@
+"""Gazetteer terms match whole words only.
+
+    python -m pytest tests/test_gazetteer.py
+"""
+
+from utils.gazetteer import Gazetteer, _static_terms
+
+
+def _scan(text):
+    return Gazetteer(list(_static_terms()) + [("ward 3", "ward_name", "Ward 3")]).scan(text)
+
+
+def test_term_inside_a_longer_word_does_not_match():
+    assert "project_type" not in _scan("parking near the station")
+    assert "ward_name" not in _scan("ward 37 complaints")
+
+
+def test_whole_words_and_plurals_match():
+    found = _scan("delayed parks and roads")
+    assert found["status"] == "delayed"
+    assert found["project_type"] == "parks"
+    assert _scan("street lighting")["project_term"] == "light"
+    assert _scan("ward 3 drains")["ward_name"] == "Ward 3"
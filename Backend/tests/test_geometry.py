@@ -0,0 +1,33 @@
+"""Arc-based simplification: only the ends of a shared border are pinned, and
+both wards get the same simplified border.
+
+    python -m pytest tests/test_geometry.py
+"""
+
+from utils.geometry import _junctions, simplify_collection
+
+
+def _feature(ring):
+    return {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+# Two unit squares sharing the edge x=1. Every edge carries extra collinear
+# vertices, which any tolerance should remove.
+WEST = [[0, 0], [0.25, 0], [0.5, 0], [0.75, 0], [1, 0], [1, 0.25], [1, 0.5], [1, 0.75], [1, 1], [0, 1], [0, 0]]
+EAST = [[1, 0], [2, 0], [2, 1], [1, 1], [1, 0.75], [1, 0.5], [1, 0.25], [1, 0]]
+SHARED_ENDS = {(1.0, 0.0), (1.0, 1.0)}
+
+
+def test_junctions_are_the_shared_border_ends():
+    # Not (0.75, 0) or (2, 1): they border a shared vertex but belong to one ward
+    assert _junctions([_feature(WEST), _feature(EAST)]) == SHARED_ENDS
+
+
+def test_shared_edge_simplifies_identically_in_both_wards():
+    out = simplify_collection({"type": "FeatureCollection", "features": [_feature(WEST), _feature(EAST)]}, zoom=10)
+    west, east = (f["geometry"]["coordinates"][0] for f in out["features"])
+
+    assert sorted(map(tuple, west[:-1])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert sorted(map(tuple, east[:-1])) == [(1, 0), (1, 1), (2, 0), (2, 1)]
+    # The border between the junctions is the same arc, walked in opposite directions
+    assert [p for p in west if p[0] == 1] == [p for p in east if p[0] == 1][::-1]
@@ -0,0 +1,36 @@
+"""Conditional GET: an unchanged ETag is answered 304, and any write to the
+city's projects bumps data_versions so the old ETag stops matching.
+
+    python -m pytest tests/test_http_cache.py
+"""
+
+import pytest
+
+from app import app
+from utils.database import DATABASE_PATH, get_city_id, insert_projects
+from utils.db_writer import write
+
+PROJECT_NAME = "HTTP cache test footpath"
+
+
+@pytest.fixture
+def mumbai():
+    yield get_city_id("mumbai")
+    write(DATABASE_PATH, "DELETE FROM projects WHERE project_name=?", (PROJECT_NAME,))
+
+
+def test_write_invalidates_etag(mumbai):
+    client = app.test_client()
+    first = client.get("/api/projects", query_string={"city": "mumbai"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/api/projects", query_string={"city": "mumbai"}, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    assert insert_projects([{"project_name": PROJECT_NAME, "status": "pending"}], mumbai) == 1
+
+    changed = client.get("/api/projects", query_string={"city": "mumbai"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert PROJECT_NAME in {p["project_name"] for p in changed.get_json()["projects"]}
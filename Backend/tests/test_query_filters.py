@@ -0,0 +1,68 @@
+"""/api/query keeps the entities it resolves (a contractor named in the
+question becomes a contractor filter, never a corporator sharing a surname),
+and exact in-city matches always outrank the semantic fallback tiers.
+
+    python -m pytest tests/test_query_filters.py
+"""
+
+import sqlite3
+
+from app import app
+from utils.database import DATABASE_PATH, search_projects_tiered
+
+
+def _contractor_project_ids(name):
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        return {r[0] for r in conn.execute("SELECT id FROM projects WHERE contractor_name=?", (name,))}
+    finally:
+        conn.close()
+
+
+def test_contractor_query_returns_that_contractors_projects():
+    expected = _contractor_project_ids("Patel Infrastructure")
+    assert expected, "seed data has no Patel Infrastructure projects"
+
+    resp = app.test_client().post("/api/query", json={"query": "show Patel Infra projects"})
+    body = resp.get_json()
+
+    assert resp.status_code == 200, body
+    keywords = body["keywords_extracted"]
+    assert keywords["contractor_name"] == "Patel Infrastructure"
+    # "patel" alone must not resolve to corporator "Smt. Rajul Patel"
+    assert keywords["corporator_name"] is None
+    assert body["projects_count"] == len(expected)
+    assert {p["id"] for p in body["projects"]} <= expected
+
+
+def _ids(sql, params=()):
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        return [r[0] for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def test_in_city_keyword_match_outranks_semantic_hits_elsewhere():
+    mumbai, other = _ids("SELECT city_id FROM city WHERE city_name IN ('mumbai', 'delhi') ORDER BY city_name='delhi'")
+    flyovers = set(_ids("SELECT id FROM projects WHERE city_id=? AND project_name LIKE '%flyover%'", (mumbai,)))
+    elsewhere = _ids("SELECT id FROM projects WHERE city_id=? LIMIT 5", (other,))
+    assert flyovers and elsewhere
+
+    # No structured filter was detected: only keywords, plus semantic hits from another city
+    results = search_projects_tiered(city_id=mumbai, filters={}, keyword="flyover",
+                                     query="flyover", ranked=elsewhere)
+
+    assert {r["id"] for r in results} == flyovers
+    assert {r["_tier"] for r in results} == {1}
+
+
+def test_raw_query_in_city_before_semantic_fallback():
+    mumbai, other = _ids("SELECT city_id FROM city WHERE city_name IN ('mumbai', 'delhi') ORDER BY city_name='delhi'")
+    elsewhere = _ids("SELECT id FROM projects WHERE city_id=? LIMIT 5", (other,))
+
+    results = search_projects_tiered(city_id=mumbai, filters={}, keyword=None,
+                                     query="flyover", ranked=elsewhere)
+
+    assert results and {r["city_id"] for r in results} == {mumbai}
+    assert {r["_tier"] for r in results} == {2}
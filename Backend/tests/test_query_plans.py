@@ -0,0 +1,109 @@
+"""Hot routes must not fall back to full-table scans.
+
+Each route below runs with the plan auditor on (utils/plan_audit): Flask
+routes through its test client, main.py routes through FastAPI's. Every
+statement a route executes is EXPLAINed, and a full scan of a table fails
+the test unless ALLOWED_SCANS lists that statement for that table.
+
+    python -m pytest tests/test_query_plans.py
+"""
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils import gazetteer, plan_audit
+
+plan_audit.enable()
+
+import app as flask_app  # noqa: E402  (imported after enabling the audit)
+import main  # noqa: E402
+
+FLASK_ROUTES = [
+    "/api/projects?city=mumbai",
+    "/api/projects?city=mumbai&ward=28",
+    "/api/projects?city=mumbai&status=delayed",
+    "/api/projects/delayed?city=mumbai",
+    "/api/projects/1",
+    "/api/projects/ward/28?city=mumbai",
+    "/api/wards?city=mumbai",
+    "/api/wards/stats?city=mumbai",
+    "/api/wards/28?city=mumbai",
+    "/api/meetings?city=mumbai&ward=28",
+    "/api/stats?city=mumbai",
+    "/api/contractors?city=mumbai",
+    "/api/cities",
+]
+
+# (method, path, JSON body); /search and /ask answer locally without Sarvam keys
+FASTAPI_ROUTES = [
+    ("GET", "/home", None),
+    ("GET", "/ward/5", None),
+    ("GET", "/backend/1", None),
+    ("POST", "/search", {"question": "road repair in ward 5"}),
+    ("POST", "/search", {"question": "meeting in andheri"}),
+    ("POST", "/ask", {"question": "drain work by Patel Construction"}),
+    ("POST", "/ask", {"question": "what was discussed in the meeting on 2024-01-15"}),
+]
+
+# table -> [(statement regex, why a scan is acceptable)]. Statements are
+# matched in their normalised form (whitespace collapsed).
+ALLOWED_SCANS = {
+    "city": [
+        (r"^SELECT \* FROM city$", "the city list itself; a handful of rows"),
+        (r"^SELECT city_id FROM city WHERE LOWER\(city_name\)=\?$", "case-insensitive name lookup over a handful of rows"),
+    ],
+    "PROJECT_DATA": [
+        (r"^SELECT COUNT\(\*\) as total_projects FROM PROJECT_DATA$",
+         "whole-table count, answered from the smallest index"),
+        (r"^SELECT \* FROM PROJECT_DATA WHERE LOWER\(\w+\) LIKE \?( AND LOWER\(\w+\) LIKE \?)* LIMIT 10$",
+         "substring search with no equality filter; stops at 10 rows"),
+    ],
+    "Meeting_data": [
+        (r"^SELECT \* FROM Meeting_data WHERE LOWER\(\w+\) LIKE \?( AND LOWER\(\w+\) LIKE \?)* "
+         r"ORDER BY created_at DESC LIMIT 20$",
+         "substring search, walked newest-first on idx_meeting_created; stops at 20 rows"),
+    ],
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def warm_caches():
+    # Built once at boot in production (wsgi.py / asgi.py), not per request
+    gazetteer.get_gazetteer()
+    flask_app.semantic_index.refresh(force=True)
+
+
+def _allowed(table, sql):
+    return any(re.search(pattern, sql) for pattern, _ in ALLOWED_SCANS.get(table, ()))
+
+
+def _assert_no_scans(statements):
+    assert statements, "route ran no SQL"
+    offenders = []
+    for entry in statements.values():
+        for scan in entry["scans"]:
+            if not _allowed(scan["table"], entry["sql"]):
+                offenders.append(f"{scan['detail']} (~{scan['est_rows']} rows) in: {entry['sql']}\n"
+                                 f"    at {', '.join(entry['sites'])}\n    plan: {entry['plan']}")
+    assert not offenders, "full-table scans:\n" + "\n".join(offenders)
+
+
+@pytest.mark.parametrize("path", FLASK_ROUTES)
+def test_flask_route_uses_indexes(path):
+    client = flask_app.app.test_client()
+    with plan_audit.capture() as statements:
+        status = client.get(path).status_code
+    assert status == 200
+    _assert_no_scans(statements)
+
+
+@pytest.mark.parametrize("method,path,body", FASTAPI_ROUTES,
+                         ids=[f"{m} {p}" + (f" {b['question']}" if b else "") for m, p, b in FASTAPI_ROUTES])
+def test_fastapi_route_uses_indexes(method, path, body):
+    client = TestClient(main.app)
+    with plan_audit.capture() as statements:
+        status = client.request(method, path, json=body).status_code
+    assert status == 200
+    _assert_no_scans(statements)
@@ -0,0 +1,47 @@
+"""Chat calls send `model` only when SARVAM_MODEL is set; otherwise the
+request is left as it always was and the API default model applies.
+
+The setting is read at import, so each case runs in a fresh interpreter.
+
+    python -m pytest tests/test_sarvam_model.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+# Records the kwargs of a keyword-extraction chat call made through a fake client
+PROBE = """
+import json
+from types import SimpleNamespace
+from utils import context_generator
+
+calls = []
+
+def completions(**kwargs):
+    calls.append(sorted(kwargs))
+    message = SimpleNamespace(content='{"keywords": []}')
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+context_generator._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+context_generator.extract_keywords_from_query("what is happening near the old mill compound")
+print(json.dumps(calls))
+"""
+
+
+@pytest.mark.parametrize("model", [None, "sarvam-m"])
+def test_model_sent_only_when_configured(model):
+    env = {k: v for k, v in os.environ.items() if k != "SARVAM_MODEL"}
+    if model:
+        env["SARVAM_MODEL"] = model
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    calls = json.loads(out.stdout.strip().splitlines()[-1])
+    assert len(calls) == 1
+    assert ("model" in calls[0]) == bool(model)
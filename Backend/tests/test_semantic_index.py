@@ -0,0 +1,99 @@
+"""Semantic index: BM25 ranking, abbreviation expansion, and refresh reading
+only new rows after inserts but re-reading everything after updates/deletes.
+
+    python -m pytest tests/test_semantic_index.py
+"""
+
+import sqlite3
+
+import pytest
+
+from utils.database import PROJECTS
+from utils.semantic_index import SemanticIndex
+
+MUMBAI, DELHI = 1, 2
+SEED = [
+    (1, MUMBAI, "Storm water drain", "Drain desilting before monsoon", None, None, "drainage"),
+    (2, MUMBAI, "Ward office renovation",
+     "New roof, painting, furniture, lifts, wiring and a small drain by the gate", None, None, "building"),
+    (3, MUMBAI, "STP Expansion", "Capacity increase", None, None, "sewage"),
+    (4, DELHI, "Storm water drain widening", "Drain along the ring road", None, None, "drainage"),
+]
+
+
+def _connect(path):
+    return sqlite3.connect(path, isolation_level=None)
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "projects.db")
+    conn = _connect(path)
+    conn.executescript(f"""
+        CREATE TABLE projects (id INTEGER PRIMARY KEY, city_id INTEGER, project_name TEXT,
+                               summary TEXT, location_details TEXT, ward_name TEXT, project_type TEXT);
+        CREATE TABLE data_versions (city_id INTEGER PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+    """)
+    # One bump per written row, as the triggers in utils/database.py do
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER trg_projects_version_{event.lower()} AFTER {event} ON projects BEGIN
+                INSERT INTO data_versions (city_id, version) VALUES ({PROJECTS}, 1)
+                ON CONFLICT(city_id) DO UPDATE SET version = version + 1;
+            END
+        """)
+    conn.executemany("INSERT INTO projects VALUES (?,?,?,?,?,?,?)", SEED)
+    conn.close()
+    return path
+
+
+def _write(path, sql, params=()):
+    conn = _connect(path)
+    try:
+        conn.execute(sql, params)
+    finally:
+        conn.close()
+
+
+def _index(path):
+    index = SemanticIndex(path, refresh_seconds=3600)
+    assert index.refresh(force=True) == len(SEED)
+    return index
+
+
+def test_bm25_prefers_focused_short_documents(db):
+    ids = [pid for pid, _ in _index(db).search("drain", k=4, min_score=0.0)]
+    # Both drain projects mention it in name and summary; the renovation only in passing
+    assert set(ids[:2]) == {1, 4}
+    assert ids.index(2) > ids.index(1)
+
+
+def test_search_city_filter_and_abbreviations(db):
+    index = _index(db)
+    assert [pid for pid, _ in index.search("drain", city_id=DELHI)] == [4]
+    assert [pid for pid, _ in index.search("sewage treatment plant")][0] == 3
+
+
+def test_insert_reads_only_new_rows(db):
+    index = _index(db)
+    _write(db, "INSERT INTO projects VALUES (5, 1, 'Foot over bridge', 'Near the station', NULL, NULL, 'bridge')")
+
+    assert index.refresh(force=True) == 1
+    assert index.stats()["projects"] == len(SEED) + 1
+    assert [pid for pid, _ in index.search("foot over bridge")] == [5]
+
+
+@pytest.mark.parametrize("sql", [
+    "UPDATE projects SET project_name='Foot over bridge', summary='Near the station', project_type='bridge' WHERE id=3",
+    "DELETE FROM projects WHERE id=3",
+])
+def test_update_or_delete_rebuilds(db, sql):
+    index = _index(db)
+    _write(db, sql)
+    _write(db, "INSERT INTO projects VALUES (5, 1, 'Skywalk repair', NULL, NULL, NULL, 'bridge')")
+
+    # Version moved by 2, only 1 new row: everything is re-read
+    remaining = len(SEED) + (0 if sql.startswith("UPDATE") else -1) + 1
+    assert index.refresh(force=True) == remaining
+    assert index.stats()["projects"] == remaining
+    assert 3 not in [pid for pid, _ in index.search("sewage treatment plant")]
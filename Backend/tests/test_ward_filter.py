@@ -0,0 +1,60 @@
+"""Ward filters use the integer ward_key, but wards with no digits in them
+('F/North', 'R/S') have no key and must still match on their text.
+
+    python -m pytest tests/test_ward_filter.py
+"""
+
+import sqlite3
+
+from app import app
+from utils.database import DATABASE_PATH
+
+TEXT_WARD = "F/North"
+
+
+def _projects_in_ward(ward_no):
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT p.id, c.city_name FROM projects p JOIN city c ON p.city_id=c.city_id WHERE p.ward_no=?",
+            (ward_no,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {r[0] for r in rows}, {r[1] for r in rows}
+
+
+def test_non_numeric_ward_matches_on_text():
+    expected, cities = _projects_in_ward(TEXT_WARD)
+    assert expected and len(cities) == 1, "seed data has no single-city F/North projects"
+
+    resp = app.test_client().get("/api/projects", query_string={"city": cities.pop(), "ward": TEXT_WARD})
+
+    assert resp.status_code == 200
+    assert {p["id"] for p in resp.get_json()["projects"]} == expected
+
+
+def _mumbai_wards():
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        # Seed ward numbers are unpadded, so distinct text == distinct ward
+        return {r[0] for r in conn.execute(
+            "SELECT DISTINCT p.ward_no FROM projects p JOIN city c ON p.city_id=c.city_id "
+            "WHERE c.city_name='mumbai' AND p.ward_no IS NOT NULL AND p.ward_no != ''")}
+    finally:
+        conn.close()
+
+
+def test_ward_aggregates_keep_non_numeric_wards():
+    client = app.test_client()
+    wards = _mumbai_wards()
+    assert TEXT_WARD in wards
+
+    listed = client.get("/api/wards", query_string={"city": "mumbai"}).get_json()
+    assert len(listed) == len(wards)
+    assert TEXT_WARD in {w["ward_no"] for w in listed}
+
+    stats = client.get("/api/wards/stats", query_string={"city": "mumbai"}).get_json()
+    assert TEXT_WARD in {w["wardNumber"] for w in stats}
+
+    assert client.get("/api/stats", query_string={"city": "mumbai"}).get_json()["total_wards"] == len(wards)
@@ -0,0 +1,103 @@
+"""Point -> ward lookup: inside, outside, holes and shared borders, both on
+WardLocator and through /api/wards/locate with a small fixture city.
+
+    python -m pytest tests/test_ward_locator.py
+"""
+
+import json
+from collections import OrderedDict
+
+import pytest
+
+from app import app
+from utils import geometry_registry
+from utils.ward_locator import WardLocator
+
+
+def _ward(number, *rings):
+    return {"type": "Feature", "properties": {"ward_number": number, "ward_name": f"Ward {number}"},
+            "geometry": {"type": "Polygon", "coordinates": [list(r) for r in rings]}}
+
+
+# Ward 1 is the unit square with a hole in the middle; ward 2 is the square
+# east of it, sharing the border x=1. Coordinates are [lng, lat].
+WEST = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+HOLE = [[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6], [0.4, 0.4]]
+EAST = [[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]
+WARDS = {"type": "FeatureCollection", "features": [_ward(1, WEST, HOLE), _ward(2, EAST)]}
+
+
+def _number(props):
+    return props and props["ward_number"]
+
+
+def test_inside_and_outside():
+    locator = WardLocator(WARDS)
+    assert _number(locator.locate(0.2, 0.2)) == 1
+    assert _number(locator.locate(0.5, 1.5)) == 2
+    assert locator.locate(0.5, 0.5) is None    # in the hole
+    assert locator.locate(0.5, 2.5) is None    # east of both
+    assert locator.locate(-0.1, 0.5) is None   # south of both
+
+
+def test_boundary_belongs_to_exactly_one_ward():
+    locator = WardLocator(WARDS)
+    # Edges are half-open: a point on the shared border goes to the ward east of it
+    assert _number(locator.locate(0.5, 1.0)) == 2
+    assert _number(locator.locate(0.5, 0.0)) == 1   # west edge of ward 1
+    assert locator.locate(0.5, 2.0) is None          # east edge of ward 2
+
+
+def test_locate_many_matches_locate():
+    locator = WardLocator(WARDS)
+    points = [(0.2, 0.2), (0.5, 1.5), (0.5, 0.5), (3, 3)]
+    assert locator.locate_many(points) == [locator.locate(lat, lng) for lat, lng in points]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "testcity_wards.geojson").write_text(json.dumps(WARDS), encoding="utf-8")
+    monkeypatch.setattr(geometry_registry, "GEOMETRY_DIR", str(tmp_path))
+    # Restored afterwards, so later tests see the real directory again
+    for name, value in (("_paths", {}), ("_scanned", None), ("_resident", OrderedDict())):
+        monkeypatch.setattr(geometry_registry, name, value)
+    return app.test_client()
+
+
+def test_locate_endpoint(client):
+    inside = client.get("/api/wards/locate", query_string={"city": "testcity", "lat": 0.2, "lng": 0.2})
+    assert inside.status_code == 200
+    assert inside.get_json()["wardNumber"] == 1
+
+    on_border = client.get("/api/wards/locate", query_string={"city": "testcity", "lat": 0.5, "lng": 1.0})
+    assert on_border.get_json()["wardNumber"] == 2
+
+    outside = client.get("/api/wards/locate", query_string={"city": "testcity", "lat": 0.5, "lng": 0.5})
+    assert outside.status_code == 404
+
+
+def test_locate_batch_endpoint(client):
+    res = client.post("/api/wards/locate?city=testcity",
+                      json={"points": [[0.2, 0.2], {"lat": 0.5, "lng": 1.0}, [0.5, 0.5]]})
+    assert res.status_code == 200
+    assert [r["wardNumber"] for r in res.get_json()["results"]] == [1, 2, None]
+
+
+def test_city_without_polygons_says_so(client, tmp_path):
+    # Like data/delhi_wards.geojson: ward centroids only
+    points = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"ward_number": 1}, "geometry": {"type": "Point", "coordinates": [0.5, 0.5]}},
+    ]}
+    (tmp_path / "pointcity_wards.geojson").write_text(json.dumps(points), encoding="utf-8")
+
+    single = client.get("/api/wards/locate", query_string={"city": "pointcity", "lat": 0.5, "lng": 0.5})
+    batch = client.post("/api/wards/locate?city=pointcity", json={"points": [[0.5, 0.5]]})
+    for res in (single, batch):
+        assert res.status_code == 404
+        assert res.get_json()["error"] == "No ward boundaries for this city"
+
+
+def test_delhi_has_no_boundaries():
+    res = app.test_client().get("/api/wards/locate", query_string={"city": "delhi", "lat": 28.6, "lng": 77.2})
+    assert res.status_code == 404
+    assert res.get_json()["error"] == "No ward boundaries for this city"
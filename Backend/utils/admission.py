@@ -0,0 +1,232 @@
+"""Admission control for the expensive (LLM / OCR) routes.
+
+Each route class ("llm", "upload") gets one controller per process with:
+
+* a token bucket per client (429 when a client is over its rate),
+* a global token bucket protecting the provider quota (503 when empty),
+* a cap on requests running at once, with a bounded FIFO wait queue and a
+  maximum wait (503 when the queue is full or the wait runs out).
+
+Every rejection is immediate or bounded by the wait, and carries
+Retry-After. Running + queued requests per class are capped, so these routes
+can never hold every worker thread and cheap endpoints keep their latency.
+
+Settings come from ADMISSION_<CLASS>_<KEY> environment variables, e.g.
+ADMISSION_LLM_RATE=2 or ADMISSION_UPLOAD_CONCURRENCY=1.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+
+from utils.metrics import counter, gauge, histogram
+
+# Defaults per route class. rate/client_rate are tokens per second.
+ROUTE_CLASSES = {
+    "llm": {"rate": 2.0, "burst": 10, "client_rate": 0.2, "client_burst": 5,
+            "concurrency": 2, "queue": 2, "max_wait": 3.0},
+    "upload": {"rate": 0.2, "burst": 3, "client_rate": 1 / 60, "client_burst": 2,
+               "concurrency": 1, "queue": 1, "max_wait": 10.0},
+}
+MAX_TRACKED_CLIENTS = int(os.environ.get("ADMISSION_MAX_CLIENTS", "10000"))
+# Use the first X-Forwarded-For hop as the client (only behind a trusted proxy)
+TRUST_PROXY = os.environ.get("ADMISSION_TRUST_PROXY", "0") == "1"
+
+admission_decisions = counter(
+    "admission_decisions_total",
+    "Admission outcomes per route class: admitted, queued (admitted after waiting), "
+    "rate_limited (429), shed (503).",
+    ("route_class", "result"),
+)
+admission_queue_depth = gauge(
+    "admission_queue_depth", "Requests waiting for a slot.", ("route_class",),
+)
+admission_in_flight = gauge(
+    "admission_in_flight", "Requests holding a slot.", ("route_class",),
+)
+admission_wait_seconds = histogram(
+    "admission_wait_seconds", "Time spent queued before admission.", ("route_class",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class Rejected(Exception):
+    """Request not admitted: HTTP `status`, seconds to `retry_after`, `reason`."""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """0 if a token was taken, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class AdmissionController:
+    def __init__(self, name, rate, burst, client_rate, client_burst, concurrency, queue, max_wait):
+        self.name = name
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.max_wait = max_wait
+        self._global = TokenBucket(rate, burst)
+        self._clients = OrderedDict()
+        self._running = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _client_bucket(self, client):
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst)
+            while len(self._clients) > MAX_TRACKED_CLIENTS:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def _reject(self, status, retry_after, reason, result):
+        admission_decisions.inc(route_class=self.name, result=result)
+        raise Rejected(status, retry_after, reason)
+
+    def acquire(self, client):
+        """Take a slot for `client` or raise Rejected. Pair with release()."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._client_bucket(client)
+            wait = bucket.take(now)
+            if wait:
+                self._reject(429, wait, "Too many requests, slow down", "rate_limited")
+            wait = self._global.take(now)
+            if wait:
+                bucket.refund()
+                self._reject(503, wait, "Service busy, try again shortly", "shed")
+            if self._running < self.concurrency and not self._waiters:
+                self._running += 1
+                admission_in_flight.set(self._running, route_class=self.name)
+                admission_decisions.inc(route_class=self.name, result="admitted")
+                return
+            if len(self._waiters) >= self.max_queue:
+                bucket.refund()
+                self._global.refund()
+                self._reject(503, self.max_wait, "Service busy, try again shortly", "shed")
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            admission_queue_depth.set(len(self._waiters), route_class=self.name)
+
+        admitted = waiter.wait(self.max_wait)
+        with self._lock:
+            if not admitted and waiter.is_set():
+                admitted = True  # released between the timeout and taking the lock
+            if not admitted:
+                self._waiters.remove(waiter)
+                # Never ran: give back what it was charged, as for a full queue
+                bucket.refund()
+                self._global.refund()
+            admission_queue_depth.set(len(self._waiters), route_class=self.name)
+        admission_wait_seconds.observe(time.monotonic() - now, route_class=self.name)
+        if not admitted:
+            self._reject(503, self.max_wait, "Service busy, try again shortly", "shed")
+        admission_decisions.inc(route_class=self.name, result="queued")
+
+    def release(self):
+        """Free a slot: hand it to the oldest waiter, if any."""
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()  # the slot passes on; _running is unchanged
+                admission_queue_depth.set(len(self._waiters), route_class=self.name)
+            else:
+                self._running -= 1
+                admission_in_flight.set(self._running, route_class=self.name)
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(route_class):
+    with _controllers_lock:
+        controller = _controllers.get(route_class)
+        if controller is None:
+            settings = dict(ROUTE_CLASSES[route_class])
+            for key, default in settings.items():
+                env = os.environ.get(f"ADMISSION_{route_class.upper()}_{key.upper()}")
+                if env is not None:
+                    settings[key] = type(default)(float(env))
+            controller = _controllers[route_class] = AdmissionController(route_class, **settings)
+        return controller
+
+
+def client_key(remote_addr, forwarded_for=None):
+    if TRUST_PROXY and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return remote_addr or "unknown"
+
+
+# ---------------- framework adapters ----------------
+def limit(route_class):
+    """Flask view decorator: admit through `route_class` or answer 429/503 with Retry-After."""
+    from flask import jsonify, request
+
+    controller = get_controller(route_class)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                controller.acquire(client_key(request.remote_addr, request.headers.get("X-Forwarded-For")))
+            except Rejected as e:
+                return jsonify({"error": e.reason}), e.status, {"Retry-After": str(e.retry_after)}
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release()
+
+        return wrapper
+
+    return decorator
+
+
+def fastapi_dependency(route_class):
+    """FastAPI dependency (use in `dependencies=[Depends(...)]`) doing the same as limit()."""
+    from fastapi import HTTPException, Request
+
+    controller = get_controller(route_class)
+
+    def admit(request: Request):
+        forwarded = request.headers.get("x-forwarded-for")
+        try:
+            controller.acquire(client_key(request.client.host if request.client else None, forwarded))
+        except Rejected as e:
+            raise HTTPException(status_code=e.status, detail=e.reason,
+                                headers={"Retry-After": str(e.retry_after)})
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return admit
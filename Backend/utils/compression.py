@@ -0,0 +1,93 @@
+"""Negotiated gzip / brotli compression for Flask responses.
+
+``init_app(app)`` registers an after_request hook that compresses text and
+JSON bodies of at least COMPRESS_MIN_BYTES, preferring brotli when the module
+is installed and the client accepts it. Responses that are already encoded
+(utils/geojson_cache serves pre-compressed variants), streamed, sent from
+files or not 200 pass through untouched.
+
+Bodies with an ETag (everything behind utils/http_cache) are the same bytes
+until their data version changes, so their compressed form is kept in a small
+LRU keyed by (ETag, encoding); the ETag becomes weak, as the representation
+differs from the identity one.
+"""
+
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_CACHE_SIZE = int(os.environ.get("COMPRESS_CACHE_SIZE", "256"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE = {
+    "application/json", "application/geo+json", "application/javascript",
+    "text/html", "text/plain", "text/css", "text/csv", "image/svg+xml",
+}
+
+_compressed = OrderedDict()
+_lock = threading.Lock()
+
+
+def _encoding(request):
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _cached_compress(key, body, encoding):
+    if key is None:
+        return _compress(body, encoding)
+    with _lock:
+        data = _compressed.get(key)
+        if data is not None:
+            _compressed.move_to_end(key)
+            return data
+    data = _compress(body, encoding)
+    with _lock:
+        _compressed[key] = data
+        while len(_compressed) > COMPRESS_CACHE_SIZE:
+            _compressed.popitem(last=False)
+    return data
+
+
+def compress_response(resp):
+    from flask import request  # imported here: main.py reads the settings without Flask
+
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or resp.mimetype not in COMPRESSIBLE or "Content-Encoding" in resp.headers):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    encoding = _encoding(request)
+    if encoding is None:
+        return resp
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+
+    etag, _ = resp.get_etag()
+    resp.set_data(_cached_compress((etag, encoding) if etag else None, body, encoding))
+    resp.headers["Content-Encoding"] = encoding
+    if etag:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def init_app(app):
+    app.after_request(compress_response)
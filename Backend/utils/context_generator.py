@@ -1,10 +1,21 @@
 import os
 import json
 import re
-from sarvamai import SarvamAI
+from utils.sarvam_client import create_client, CHAT_MODEL_KWARGS
+from utils.llm_guard import AnswerCache, call_with_deadline, get_breaker, LLMTimeout, CircuitOpen
+from utils.llm_metrics import track_llm, record_cache
+from utils import gazetteer
+from utils.database import get_data_version, PROJECTS
 
 _client = None
 
+WORD_RE = re.compile(r'[a-z]+')
+
+# Answers keyed by (normalized query, project ids shown, projects data version).
+# Late LLM answers land here too, so a repeated question gets the richer answer
+# without waiting; any project write starts a fresh key.
+_answer_cache = AnswerCache()
+
 
 def _get_client():
     global _client
@@ -12,58 +23,40 @@ def _get_client():
         api_key = os.environ.get("SARVAM_API_KEY")
         if not api_key or api_key == "your_sarvam_api_key_here":
             return None
-        _client = SarvamAI(api_subscription_key=api_key)
+        _client = create_client(api_key)
     return _client
 
 
+def _answer_cache_key(user_query, db_results):
+    ids = tuple(p.get("id") for p in db_results[:5])
+    return (" ".join(user_query.lower().split()), ids, get_data_version(PROJECTS))
+
+
+def _replace_phrase(words, phrase_words, replacement):
+    n = len(phrase_words)
+    for i in range(len(words) - n + 1):
+        if words[i:i + n] == phrase_words:
+            return words[:i] + replacement + words[i + n:]
+    return words
+
+
 def extract_keywords_locally(user_query):
     """Fast local keyword extraction — no API call needed."""
     q = user_query.lower().strip()
-    result = {"ward_no": None, "ward_name": None, "project_type": None,
-              "status": None, "corporator_name": None, "keywords": []}
-
-    # Extract ward number
-    ward_match = re.search(r'\bward\s*(?:no\.?\s*)?(\d+)', q)
-    if ward_match:
-        result["ward_no"] = ward_match.group(1)
-
-    # Detect status
-    status_map = {"delayed": "delayed", "delay": "delayed", "stalled": "stalled",
-                  "completed": "completed", "done": "completed", "finished": "completed",
-                  "ongoing": "ongoing", "progress": "ongoing", "approved": "approved"}
-    for word, stat in status_map.items():
-        if word in q:
-            result["status"] = stat
-            break
-
-    # Detect project type
-    type_map = {"road": "roads", "highway": "roads", "bridge": "roads", "flyover": "roads",
-                "water": "water_supply", "pipeline": "water_supply", "pipe": "water_supply",
-                "school": "schools", "education": "schools", "park": "parks", "garden": "parks",
-                "drain": "drainage", "sewer": "drainage", "flood": "drainage", "nallah": "drainage",
-                "health": "healthcare", "hospital": "healthcare", "dispensary": "healthcare",
-                "light": "street_lighting", "lamp": "street_lighting", "led": "street_lighting",
-                "waste": "waste_management", "garbage": "waste_management", "trash": "waste_management"}
-    for word, ptype in type_map.items():
-        if word in q:
-            result["project_type"] = ptype
-            break
-
-    # Detect ward names (common Mumbai/Delhi areas)
-    areas = {
-        "kandivali": "Kandivali", "andheri": "Andheri", "bandra": "Bandra",
-        "dadar": "Dadar", "worli": "Worli", "mulund": "Mulund", "kurla": "Kurla",
-        "borivali": "Borivali", "malad": "Malad", "ghatkopar": "Ghatkopar",
-        "versova": "Andheri West", "charkop": "Kandivali West",
-        "chandni chowk": "Chandni Chowk", "dwarka": "Dwarka", "rohini": "Rohini",
-        "saket": "Saket", "lajpat nagar": "Lajpat Nagar", "pitampura": "Pitampura",
-        "okhla": "Okhla", "janakpuri": "Janakpuri", "karol bagh": "Karol Bagh",
-        "mayur vihar": "Mayur Vihar", "shahdara": "Shahdara",
-    }
-    for kw, area in areas.items():
-        if kw in q:
-            result["ward_name"] = area
-            break
+    result = {"ward_no": None, "ward_name": None, "ward_zone": None, "project_type": None,
+              "status": None, "corporator_name": None, "contractor_name": None, "keywords": []}
+
+    # One pass over the query for wards, zones, statuses, types and people
+    found = gazetteer.scan(q)
+    ward_no = gazetteer.find_ward_no(q)
+    if ward_no is not None:
+        result["ward_no"] = str(ward_no)
+    result["status"] = found.get("status")
+    result["project_type"] = found.get("project_type")
+    result["ward_name"] = found.get("ward_name")
+    result["ward_zone"] = found.get("ward_zone")
+    result["corporator_name"] = found.get("corporator")
+    result["contractor_name"] = found.get("contractor")
 
     # Extract meaningful keywords (remove stop words)
     stop = {"the", "is", "in", "at", "of", "on", "for", "to", "and", "or", "an",
@@ -71,18 +64,35 @@ def extract_keywords_locally(user_query):
             "are", "has", "have", "with", "about", "update", "status", "projects",
             "any", "all", "latest", "current", "give", "list", "find", "search",
             "can", "you", "please", "want", "need", "know", "get"}
-    words = [w for w in re.findall(r'[a-z]+', q) if w not in stop and len(w) >= 3]
+    words = [w for w in WORD_RE.findall(q) if w not in stop and len(w) >= 3]
+
+    # Misspelled wards, localities and names ("Kandivli", "Gatkopar", "Patel Infra")
+    fuzzy = gazetteer.fuzzy_resolve(words)
+    for kind, field in (("ward_name", "ward_name"), ("contractor", "contractor_name"),
+                        ("corporator", "corporator_name"), ("location", None)):
+        if kind not in fuzzy or (field and result[field]):
+            continue
+        value, score, phrase = fuzzy[kind]
+        if field:
+            result[field] = value
+        # Search with the corrected spelling so the keyword LIKEs hit
+        if score < 1.0:
+            words = _replace_phrase(words, phrase.split(), WORD_RE.findall(value.lower()))
     result["keywords"] = words
 
     return result
 
 
-def extract_keywords_from_query(user_query):
-    """Smart keyword extraction — uses local parsing first, AI only for complex queries."""
+def extract_keywords_from_query(user_query, deadline=None):
+    """Smart keyword extraction — uses local parsing first, AI only for complex queries.
+
+    `deadline` is the request's Deadline; the AI call is abandoned when it runs out.
+    """
     local = extract_keywords_locally(user_query)
 
     # If local parsing found structured info, use it
-    if local["ward_no"] or local["ward_name"] or local["project_type"] or local["status"]:
+    if (local["ward_no"] or local["ward_name"] or local["ward_zone"] or local["project_type"]
+            or local["status"] or local["corporator_name"] or local["contractor_name"]):
         return local
 
     # For complex queries, try AI if available
@@ -110,13 +120,22 @@ Examples:
 "Eastern Freeway Extension update" → {{"keywords": ["eastern", "freeway", "extension"]}}
 """
 
+    def _ask():
+        with track_llm("keywords", prompt) as call:
+            response = client.chat.completions(
+                **CHAT_MODEL_KWARGS,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=300,
+            )
+            content = response.choices[0].message.content
+            call.record_response(content, response)
+            return content
+
     try:
-        response = client.chat.completions(
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=300,
-        )
-        result = response.choices[0].message.content.strip()
+        result = call_with_deadline(
+            _ask, deadline=deadline, breaker=get_breaker("sarvam"), purpose="keywords",
+        ).strip()
         if result.startswith("```"):
             result = result.replace("```json", "").replace("```", "").strip()
         return json.loads(result)
@@ -148,8 +167,12 @@ def generate_no_data_response(user_query, keywords):
     }
 
 
-def add_context_to_results(user_query, db_results):
-    """Generate concise, relevant summary from search results."""
+def add_context_to_results(user_query, db_results, deadline=None):
+    """Generate concise, relevant summary from search results.
+
+    The AI answer has to arrive before `deadline`; otherwise the local summary
+    is returned and the late AI answer is cached for the next identical query.
+    """
     if not db_results:
         return generate_no_data_response(user_query, extract_keywords_locally(user_query))
 
@@ -168,6 +191,12 @@ def add_context_to_results(user_query, db_results):
 
     local_summary = " ".join(lines)
 
+    cache_key = _answer_cache_key(user_query, db_results)
+    cached = _answer_cache.get(cache_key)
+    record_cache("answer", cached is not None)
+    if cached:
+        return {"found": True, "answer": cached, "suggestions": []}
+
     # Try AI for a more natural answer
     client = _get_client()
     if not client:
@@ -198,18 +227,39 @@ Write a SHORT (2-4 sentences max), direct answer:
 - If delayed, state the delay clearly
 Do NOT add disclaimers or meta-commentary. Just answer."""
 
+    system_prompt = "You are a concise municipal data assistant. Give direct, factual answers using the provided data. Never hallucinate."
+
+    def _ask():
+        with track_llm("answer", system_prompt + prompt) as call:
+            response = client.chat.completions(
+                **CHAT_MODEL_KWARGS,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=300,
+            )
+            content = response.choices[0].message.content
+            call.record_response(content, response)
+            return content.strip()
+
     try:
-        response = client.chat.completions(
-            messages=[
-                {"role": "system", "content": "You are a concise municipal data assistant. Give direct, factual answers using the provided data. Never hallucinate."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=300,
+        answer = call_with_deadline(
+            _ask, deadline=deadline, breaker=get_breaker("sarvam"),
+            on_late=_answer_cache.late_writer(cache_key), purpose="answer",
         )
+        _answer_cache.put(cache_key, answer)
         return {
             "found": True,
-            "answer": response.choices[0].message.content.strip(),
+            "answer": answer,
+            "suggestions": [],
+        }
+    except (LLMTimeout, CircuitOpen) as e:
+        print(f"AI answer skipped, serving local summary: {e}")
+        return {
+            "found": True,
+            "answer": local_summary,
             "suggestions": [],
         }
     except Exception:
@@ -1,22 +1,80 @@
+import re
 import sqlite3
 from datetime import datetime
 import os
 import hashlib
 import secrets
+import time
+from utils import gazetteer
+from utils.db_writer import write, run_write
+from utils.request_metrics import traced_connect
 
 DATABASE_PATH = os.environ.get("DATABASE_PATH", "jansaakshi.db")
 
+# data_versions rows besides real city ids
+ALL_CITIES = 0    # bumped on any project/meeting write
+CITY_LIST = -1    # bumped when the city table changes
+PROJECTS = -2     # bumped on project writes only (the semantic index follows it)
+
+# Bump whenever init_database() changes the schema. The version is stored in
+# the file (PRAGMA user_version), so a boot against an up-to-date file skips
+# the DDL entirely.
+SCHEMA_VERSION = 2
+
+# Login sessions live in the DB so every worker process sees them
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Integer ward number parsed from the free-text ward_no ('077', 'Ward 77', '77A'
+# -> 77; NULL when there are no digits). Stored as a generated column so every
+# writer keeps it current, and indexed for ward-scoped queries.
+WARD_KEY_SQL = ("NULLIF(CAST(LTRIM(UPPER(ward_no), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ -_.,#:/()') "
+                "AS INTEGER), 0)")
+WARD_KEY_COLUMN = f"ward_key INTEGER GENERATED ALWAYS AS ({WARD_KEY_SQL}) VIRTUAL"
+# What ward aggregates group and count by: the number where there is one, the
+# raw text for wards without digits ('F/North'), so those are not dropped
+WARD_GROUP_SQL = "COALESCE(ward_key, ward_no)"
+
+# Ward names, zones, contractors and corporators for the query parser
+gazetteer.register_source(DATABASE_PATH, """
+    SELECT 'ward_name', ward_name FROM projects
+    UNION SELECT 'ward_zone', ward_zone FROM projects
+    UNION SELECT 'contractor', contractor_name FROM projects
+    UNION SELECT 'corporator', corporator_name FROM projects
+    UNION SELECT 'ward_name', ward_name FROM meetings
+    UNION SELECT 'location', location_details FROM projects
+""")
+
+
+def ward_key(raw):
+    """Python twin of WARD_KEY_SQL for query parameters: '001' -> 1, '5A' -> 5, 'R/S' -> None."""
+    if raw is None:
+        return None
+    m = re.search(r"\d+", str(raw))
+    return (int(m.group()) or None) if m else None
+
+
+def _ward_clause(alias, ward_no):
+    """Filter on the indexed ward_key; wards without digits ('R/S') fall back to the raw text."""
+    key = ward_key(ward_no)
+    if key is None:
+        return f"{alias}.ward_no=?", str(ward_no)
+    return f"{alias}.ward_key=?", key
+
 
 def get_db():
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
-def init_database():
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+def init_database(force=False):
+    conn = traced_connect(DATABASE_PATH, timeout=30.0)
+    if not force and conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
+    # WAL is a property of the file: set once here, not on every connection
+    conn.execute("PRAGMA journal_mode=WAL")
     c = conn.cursor()
 
     # Schema migration: drop old tables if city table doesn't exist
@@ -53,7 +111,7 @@ def init_database():
     """)
 
     # Projects
-    c.execute("""
+    c.execute(f"""
         CREATE TABLE IF NOT EXISTS projects (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_id INTEGER NOT NULL,
@@ -76,17 +134,15 @@ def init_database():
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
             updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
             source_pdf TEXT,
+            {WARD_KEY_COLUMN},
             FOREIGN KEY (city_id) REFERENCES city(city_id)
         )
     """)
-
-    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_city ON projects(city_id)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_ward ON projects(ward_no)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_proj_status ON projects(status)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_proj_type ON projects(project_type)")
 
     # Meetings
-    c.execute("""
+    c.execute(f"""
         CREATE TABLE IF NOT EXISTS meetings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_id INTEGER NOT NULL,
@@ -101,12 +157,13 @@ def init_database():
             source_pdf TEXT,
             project_count INTEGER DEFAULT 0,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            {WARD_KEY_COLUMN},
             FOREIGN KEY (city_id) REFERENCES city(city_id)
         )
     """)
 
     # Complaints
-    c.execute("""
+    c.execute(f"""
         CREATE TABLE IF NOT EXISTS complaints (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_id INTEGER,
@@ -120,11 +177,40 @@ def init_database():
             status TEXT DEFAULT 'submitted',
             admin_notes TEXT,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            {WARD_KEY_COLUMN},
             FOREIGN KEY (city_id) REFERENCES city(city_id),
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     """)
 
+    # ward_key migration for databases created before the column existed
+    for table in ("projects", "meetings", "complaints"):
+        columns = [r[1] for r in c.execute(f"PRAGMA table_xinfo({table})")]
+        if "ward_key" not in columns:
+            print(f"Schema migration: adding {table}.ward_key")
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {WARD_KEY_COLUMN}")
+
+    # Ward pages filter on (city, ward) and sort or group by status / delay:
+    # these make each of them an index range scan.
+    c.execute("DROP INDEX IF EXISTS idx_proj_ward")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_city ON projects(city_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_ward_key ON projects(ward_key)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_city_ward_status ON projects(city_id, ward_key, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_proj_city_ward_delay ON projects(city_id, ward_key, delay_days)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_meet_city_ward ON meetings(city_id, ward_key, meet_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_compl_city_ward ON complaints(city_id, ward_key, status)")
+
+    # Sessions (token stored as a SHA-256 hash)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+
     # Follow-ups
     c.execute("""
         CREATE TABLE IF NOT EXISTS follow_ups (
@@ -154,23 +240,76 @@ def init_database():
     """)
     c.execute("CREATE INDEX IF NOT EXISTS idx_review_contractor ON contractor_reviews(contractor_name)")
 
+    # Data versions: bumped by triggers on every write, read by the HTTP cache
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            city_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table, counters in (("projects", [ALL_CITIES, PROJECTS]), ("meetings", [ALL_CITIES])):
+        for event, cities in (("INSERT", ["NEW.city_id"]),
+                              ("UPDATE", ["OLD.city_id", "NEW.city_id"]),
+                              ("DELETE", ["OLD.city_id"])):
+            values = ", ".join(f"({cid}, 1)" for cid in cities + [str(n) for n in counters])
+            # Recreated so files from an older schema pick up new counters
+            c.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version_{event.lower()}")
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    INSERT INTO data_versions (city_id, version) VALUES {values}
+                    ON CONFLICT(city_id) DO UPDATE SET version = version + 1;
+                END
+            """)
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_city_version_{event.lower()}
+            AFTER {event} ON city BEGIN
+                INSERT INTO data_versions (city_id, version) VALUES ({CITY_LIST}, 1)
+                ON CONFLICT(city_id) DO UPDATE SET version = version + 1;
+            END
+        """)
+
     # Seed cities
     c.execute("INSERT OR IGNORE INTO city (city_name, state) VALUES ('mumbai', 'Maharashtra')")
     c.execute("INSERT OR IGNORE INTO city (city_name, state) VALUES ('delhi', 'Delhi')")
 
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
-    print("Database initialized")
+    print(f"Database initialized (schema v{SCHEMA_VERSION})")
+
+
+# ==================== DATA VERSIONS ====================
+
+def get_data_version(city_id=None, db_path=None):
+    """Write counter for one city (or ALL_CITIES when None); 0 if never written."""
+    conn = traced_connect(db_path or DATABASE_PATH, timeout=30.0)
+    row = conn.execute(
+        "SELECT version FROM data_versions WHERE city_id=?",
+        (ALL_CITIES if city_id is None else city_id,),
+    ).fetchone()
+    conn.close()
+    return row[0] if row else 0
 
 
 # ==================== CITY ====================
 
 
+# city_name -> city_id; cities are only ever added, so hits never go stale
+_city_ids = {}
+
+
 def get_city_id(city_name):
+    if city_name in _city_ids:
+        return _city_ids[city_name]
     conn = get_db()
     row = conn.execute("SELECT city_id FROM city WHERE city_name=?", (city_name,)).fetchone()
     conn.close()
-    return row["city_id"] if row else None
+    if not row:
+        return None
+    _city_ids[city_name] = row["city_id"]
+    return row["city_id"]
 
 
 def get_all_cities():
@@ -195,18 +334,13 @@ def verify_password(password, stored):
 
 
 def create_user(username, password, display_name=None, city_id=None, ward=None, role="user"):
-    conn = get_db()
     try:
-        conn.execute(
+        return write(
+            DATABASE_PATH,
             "INSERT INTO users (username, password, display_name, city_id, ward, role) VALUES (?,?,?,?,?,?)",
             (username, hash_password(password), display_name or username, city_id, ward, role),
         )
-        conn.commit()
-        uid = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-        conn.close()
-        return uid
     except sqlite3.IntegrityError:
-        conn.close()
         return None
 
 
@@ -234,11 +368,60 @@ def get_user_by_id(user_id):
     return dict(row) if row else None
 
 
+# ==================== SESSIONS ====================
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_session(user_id, ttl=SESSION_TTL_SECONDS):
+    """New login token for user_id (expired sessions are purged on the way)."""
+    token = secrets.token_hex(32)
+    now = int(time.time())
+
+    def _create(conn):
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+        conn.execute(
+            "INSERT INTO sessions (token_hash, user_id, expires_at) VALUES (?,?,?)",
+            (_token_hash(token), user_id, now + ttl),
+        )
+
+    run_write(DATABASE_PATH, _create)
+    return token
+
+
+def get_session_user(token):
+    """User behind a live session token, or None (one query)."""
+    if not token:
+        return None
+    conn = get_db()
+    row = conn.execute("""
+        SELECT u.id, u.username, u.display_name, u.city_id, c.city_name, u.ward, u.role, u.created_at
+        FROM sessions s
+        JOIN users u ON u.id = s.user_id
+        LEFT JOIN city c ON u.city_id = c.city_id
+        WHERE s.token_hash = ? AND s.expires_at >= ?
+    """, (_token_hash(token), int(time.time()))).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def delete_session(token):
+    write(DATABASE_PATH, "DELETE FROM sessions WHERE token_hash=?", (_token_hash(token),))
+
+
 # ==================== PROJECTS ====================
 
 
 def insert_projects(projects_list, city_id):
-    conn = get_db()
+    inserted = run_write(DATABASE_PATH, lambda conn: _insert_projects(conn, projects_list, city_id))
+    if inserted:
+        gazetteer.invalidate()
+    return inserted
+
+
+def _insert_projects(conn, projects_list, city_id):
     inserted = 0
     for p in projects_list:
         try:
@@ -262,101 +445,228 @@ def insert_projects(projects_list, city_id):
             inserted += 1
         except Exception as e:
             print(f"Insert error: {e}")
-    conn.commit()
-    conn.close()
     return inserted
 
 
-def search_projects(city_id=None, ward_no=None, ward_name=None,
-                    project_type=None, status=None, keyword=None,
-                    corporator=None, min_delay=None):
-    conn = get_db()
-    q = "SELECT p.*, c.city_name FROM projects p JOIN city c ON p.city_id=c.city_id WHERE 1=1"
-    params = []
+# Fields a project list may be projected to (?fields=); `id` is always returned
+PROJECT_FIELDS = (
+    "id", "city_id", "city_name", "project_name", "summary", "ward_no", "ward_key", "ward_name",
+    "ward_zone", "status", "budget", "corporator_name", "contractor_name", "project_type",
+    "approval_date", "start_date", "expected_completion", "actual_completion", "delay_days",
+    "location_details", "created_at", "updated_at", "source_pdf",
+)
+
+
+def parse_fields(raw):
+    """?fields=a,b,c -> ["id", "a", "b", "c"]; None when absent. ValueError on unknown names."""
+    if not raw:
+        return None
+    fields = ["id"]
+    for name in (f.strip() for f in raw.split(",")):
+        if name and name not in fields:
+            fields.append(name)
+    unknown = [f for f in fields if f not in PROJECT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def project_columns(fields=None):
+    """SELECT list for projects `p` joined to city `c`: every column, or just `fields`."""
+    if not fields:
+        return "p.*, c.city_name"
+    return ", ".join("c.city_name" if f == "city_name" else f"p.{f}" for f in fields)
 
+
+SEARCH_STOP_WORDS = {
+    "the", "is", "in", "at", "of", "on", "for", "to", "and", "or", "an",
+    "what", "how", "which", "where", "when", "show", "tell", "me", "my",
+    "are", "has", "have", "with", "about", "update", "status", "projects",
+}
+
+# Text columns a keyword may hit, concatenated once per row for ranking
+_SEARCH_TEXT = ("LOWER(COALESCE(p.project_name,'') || ' ' || COALESCE(p.summary,'') || ' ' || "
+                "COALESCE(p.location_details,'') || ' ' || COALESCE(p.ward_name,'') || ' ' || "
+                "COALESCE(p.contractor_name,'') || ' ' || COALESCE(p.corporator_name,''))")
+
+
+def _keyword_words(keyword):
+    words = [w.strip() for w in keyword.lower().split() if len(w.strip()) >= 2]
+    return [w for w in words if w not in SEARCH_STOP_WORDS] or [keyword.lower()]
+
+
+def _filter_clauses(city_id=None, ward_no=None, ward_name=None, project_type=None, status=None,
+                    keyword=None, corporator=None, min_delay=None, ward_zone=None, contractor=None):
+    """(["p.x=?", ...], params) for the search_projects filters that are set."""
+    clauses, params = [], []
     if city_id:
-        q += " AND p.city_id=?"
+        clauses.append("p.city_id=?")
         params.append(city_id)
     if ward_no:
-        q += " AND p.ward_no=?"
-        params.append(str(ward_no))
+        clause, value = _ward_clause("p", ward_no)
+        clauses.append(clause)
+        params.append(value)
     if ward_name:
-        q += " AND LOWER(p.ward_name) LIKE ?"
+        clauses.append("LOWER(p.ward_name) LIKE ?")
         params.append(f"%{ward_name.lower()}%")
+    if ward_zone:
+        clauses.append("p.ward_zone=?")
+        params.append(ward_zone)
     if project_type:
-        q += " AND p.project_type=?"
+        clauses.append("p.project_type=?")
         params.append(project_type)
     if status:
-        q += " AND p.status=?"
+        clauses.append("p.status=?")
         params.append(status)
     if keyword:
         # Smart keyword search: split into words, match ANY word across all text fields
-        # This enables "Eastern Freeway Extension" to match projects containing any of those words
-        words = [w.strip() for w in keyword.lower().split() if len(w.strip()) >= 2]
-        stop_words = {"the", "is", "in", "at", "of", "on", "for", "to", "and", "or", "an",
-                       "what", "how", "which", "where", "when", "show", "tell", "me", "my",
-                       "are", "has", "have", "with", "about", "update", "status", "projects"}
-        words = [w for w in words if w not in stop_words] or [keyword.lower()]
-
-        if words:
-            word_clauses = []
-            for w in words:
-                wk = f"%{w}%"
-                word_clauses.append(
-                    "(LOWER(p.project_name) LIKE ? OR LOWER(p.summary) LIKE ? "
-                    "OR LOWER(p.location_details) LIKE ? OR LOWER(p.ward_name) LIKE ? "
-                    "OR LOWER(p.contractor_name) LIKE ? OR LOWER(p.corporator_name) LIKE ?)"
-                )
-                params.extend([wk, wk, wk, wk, wk, wk])
-            # Match ANY word (OR logic for broader results)
-            q += " AND (" + " OR ".join(word_clauses) + ")"
+        # This enables "Eastern Freeway Extension" to match projects containing any of those words.
+        # LIKE already ignores ASCII case, so the columns are not LOWER()ed (that costs 4x).
+        words = _keyword_words(keyword)
+        word_clauses = []
+        for w in words:
+            wk = f"%{w}%"
+            word_clauses.append(
+                "(p.project_name LIKE ? OR p.summary LIKE ? "
+                "OR p.location_details LIKE ? OR p.ward_name LIKE ? "
+                "OR p.contractor_name LIKE ? OR p.corporator_name LIKE ?)"
+            )
+            params.extend([wk, wk, wk, wk, wk, wk])
+        # Match ANY word (OR logic for broader results)
+        clauses.append("(" + " OR ".join(word_clauses) + ")")
     if corporator:
-        q += " AND LOWER(p.corporator_name) LIKE ?"
+        clauses.append("LOWER(p.corporator_name) LIKE ?")
         params.append(f"%{corporator.lower()}%")
+    if contractor:
+        clauses.append("LOWER(p.contractor_name) LIKE ?")
+        params.append(f"%{contractor.lower()}%")
     if min_delay:
-        q += " AND p.delay_days>=?"
+        clauses.append("p.delay_days>=?")
         params.append(int(min_delay))
+    return clauses, params
 
-    q += " ORDER BY p.delay_days DESC, p.created_at DESC LIMIT 100"
-    rows = conn.execute(q, params).fetchall()
+
+def search_projects(city_id=None, ward_no=None, ward_name=None,
+                    project_type=None, status=None, keyword=None,
+                    corporator=None, min_delay=None, ward_zone=None, fields=None):
+    """Matching projects (at most 100), keyword relevance first, then most delayed.
+
+    `fields` (see parse_fields) limits the columns read and returned.
+    """
+    conn = get_db()
+    clauses, params = _filter_clauses(city_id, ward_no, ward_name, project_type, status,
+                                      keyword, corporator, min_delay, ward_zone)
+    # Rank by relevance in SQL (how many keywords match), so a projection
+    # does not need the text columns back
+    order = "p.delay_days DESC, p.created_at DESC"
+    rel_params = []
+    if keyword:
+        rel_sql, rel_params = _relevance_sql(_keyword_words(keyword))
+        order = f"({rel_sql}) DESC, {order}"
+    q = f"SELECT {project_columns(fields)} FROM projects p JOIN city c ON p.city_id=c.city_id WHERE 1=1"
+    q += "".join(f" AND {c}" for c in clauses)
+    q += f" ORDER BY {order} LIMIT 100"
+    rows = conn.execute(q, params + rel_params).fetchall()
     conn.close()
-    results = [dict(r) for r in rows]
-
-    # Rank results by relevance: count how many keywords match
-    if keyword and results:
-        words = [w.strip() for w in keyword.lower().split() if len(w.strip()) >= 2]
-        words = [w for w in words if w not in stop_words] or [keyword.lower()]
-        for r in results:
-            searchable = " ".join([
-                (r.get("project_name") or ""), (r.get("summary") or ""),
-                (r.get("location_details") or ""), (r.get("ward_name") or ""),
-                (r.get("contractor_name") or ""), (r.get("corporator_name") or ""),
-            ]).lower()
-            r["_relevance"] = sum(1 for w in words if w in searchable)
-        results.sort(key=lambda x: (-x.get("_relevance", 0), -x.get("delay_days", 0)))
-        for r in results:
-            r.pop("_relevance", None)
+    return [dict(r) for r in rows]
+
+
+def _relevance_sql(words):
+    """SQL expression counting how many of `words` occur in the row's text."""
+    if not words:
+        return "0", []
+    return " + ".join(f"(instr({_SEARCH_TEXT}, ?) > 0)" for _ in words), list(words)
+
+
+def search_projects_tiered(city_id=None, filters=None, keyword=None, query=None, ranked=None, limit=100):
+    """Evaluate every /api/query fallback tier in one statement.
+
+    Tiers, best first:
+      1. `filters` (search_projects kwargs) + `keyword`, within `city_id`
+      2. any word of the raw `query`, within `city_id`
+      3. `ranked` project ids (e.g. semantic hits) within `city_id`
+      4. `ranked` project ids in any city
+      5. any word of the raw `query`, in any city
+
+    Tier 1 runs whenever there are filters or a keyword; the exact in-city
+    matches always outrank the semantic fallbacks.
 
+    Each tier is a materialised CTE whose LIMIT drops to 0 when an earlier tier
+    matched, so SQLite skips the scans that are not needed and each tier uses
+    its own index. Rows carry `_tier` and `_relevance`; tiers 3-4
+    keep the order of `ranked`.
+    """
+    ranked = list(ranked or [])
+    arms = []   # (tier, where, where params, relevance words)
+
+    if filters or keyword:
+        clauses, p = _filter_clauses(city_id=city_id, keyword=keyword, **(filters or {}))
+        if clauses:
+            arms.append((1, " AND ".join(clauses), p, _keyword_words(keyword) if keyword else []))
+    if query and city_id:
+        clauses, p = _filter_clauses(city_id=city_id, keyword=query)
+        arms.append((2, " AND ".join(clauses), p, _keyword_words(query)))
+    if ranked:
+        id_list = ",".join("?" * len(ranked))
+        if city_id:
+            arms.append((3, f"p.city_id=? AND p.id IN ({id_list})", [city_id] + ranked, []))
+        arms.append((4, f"p.id IN ({id_list})", ranked, []))
+    if query:
+        clauses, p = _filter_clauses(keyword=query)
+        arms.append((5, clauses[0], p, _keyword_words(query)))
+    if not arms:
+        return []
+
+    ctes, params = [], []
+    for i, (tier, where, where_params, words) in enumerate(arms):
+        rel_sql, rel_params = _relevance_sql(words)
+        # LIMIT is evaluated before the scan starts: 0 once an earlier tier has rows
+        earlier = " OR ".join(f"EXISTS (SELECT 1 FROM t{prev})" for prev, *_ in arms[:i])
+        limit_sql = f"CASE WHEN {earlier} THEN 0 ELSE ? END" if earlier else "?"
+        ctes.append(f"""t{tier} AS MATERIALIZED (
+            SELECT p.*, c.city_name, {tier} AS _tier, {rel_sql} AS _relevance
+            FROM projects p JOIN city c ON p.city_id=c.city_id
+            WHERE {where}
+            ORDER BY _relevance DESC, p.delay_days DESC, p.created_at DESC
+            LIMIT {limit_sql}
+        )""")
+        params += rel_params + where_params + [limit]
+
+    sql = ("WITH " + ",\n".join(ctes) + "\n"
+           + " UNION ALL ".join(f"SELECT * FROM t{tier}" for tier, *_ in arms)
+           + " ORDER BY _tier, _relevance DESC, delay_days DESC, created_at DESC")
+    conn = get_db()
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    if not rows:
+        return []
+
+    best = rows[0]["_tier"]
+    results = [dict(r) for r in rows if r["_tier"] == best]
+    if best in (3, 4):
+        order = {pid: i for i, pid in enumerate(ranked)}
+        results.sort(key=lambda r: order[r["id"]])
     return results
 
 
 def get_ward_stats(city_id=None):
     conn = get_db()
     q = """
-        SELECT ward_no, ward_name, ward_zone,
+        SELECT MAX(ward_key) as ward_key, MAX(ward_no) as ward_no, MAX(ward_name) as ward_name,
+            MAX(ward_zone) as ward_zone,
             COUNT(*) as total_projects,
             SUM(CASE WHEN status='delayed' THEN 1 ELSE 0 END) as delayed_projects,
             SUM(CASE WHEN status='completed' THEN 1 ELSE 0 END) as completed_projects,
             SUM(CASE WHEN status='stalled' THEN 1 ELSE 0 END) as stalled_projects,
             SUM(budget) as total_budget,
             MAX(corporator_name) as corporator_name
-        FROM projects WHERE ward_no IS NOT NULL
+        FROM projects WHERE ward_no IS NOT NULL AND ward_no != ''
     """
     params = []
     if city_id:
         q += " AND city_id=?"
         params.append(city_id)
-    q += " GROUP BY ward_no ORDER BY ward_no"
+    q += f" GROUP BY {WARD_GROUP_SQL} ORDER BY {WARD_GROUP_SQL}"
     rows = conn.execute(q, params).fetchall()
     conn.close()
     return [dict(r) for r in rows]
@@ -373,7 +683,7 @@ def get_statistics(city_id=None):
     stats["delayed_projects"] = conn.execute(f"SELECT COUNT(*) FROM projects{w}{a} status IN ('delayed', 'slightly delayed')", p).fetchone()[0]
     stats["total_budget"] = conn.execute(f"SELECT COALESCE(SUM(budget),0) FROM projects{w}", p).fetchone()[0]
     stats["delayed_budget"] = conn.execute(f"SELECT COALESCE(SUM(budget),0) FROM projects{w}{a} status IN ('delayed', 'slightly delayed')", p).fetchone()[0]
-    stats["total_wards"] = conn.execute(f"SELECT COUNT(DISTINCT ward_no) FROM projects{w}", p).fetchone()[0]
+    stats["total_wards"] = conn.execute(f"SELECT COUNT(DISTINCT {WARD_GROUP_SQL}) FROM projects{w}", p).fetchone()[0]
     conn.close()
     return stats
 
@@ -389,8 +699,9 @@ def get_meetings(city_id=None, ward_no=None):
         q += " AND m.city_id=?"
         params.append(city_id)
     if ward_no:
-        q += " AND m.ward_no=?"
-        params.append(ward_no)
+        clause, value = _ward_clause("m", ward_no)
+        q += f" AND {clause}"
+        params.append(value)
     q += " ORDER BY m.meet_date DESC LIMIT 50"
     rows = conn.execute(q, params).fetchall()
     conn.close()
@@ -401,8 +712,7 @@ def get_meetings(city_id=None, ward_no=None):
 
 
 def insert_complaint(data, user_id=None, city_id=None):
-    conn = get_db()
-    conn.execute("""
+    return write(DATABASE_PATH, """
         INSERT INTO complaints (city_id, user_id, ward_no, category, description, location, citizen_name, user_phone)
         VALUES (?,?,?,?,?,?,?,?)
     """, (
@@ -410,10 +720,6 @@ def insert_complaint(data, user_id=None, city_id=None):
         data.get("description"), data.get("location"),
         data.get("citizen_name"), data.get("user_phone"),
     ))
-    cid = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.commit()
-    conn.close()
-    return cid
 
 
 def get_complaints_for_user(user_id):
@@ -437,38 +743,29 @@ def get_all_complaints(city_id=None):
 
 
 def update_complaint_status(complaint_id, status, admin_notes=None):
-    conn = get_db()
-    conn.execute("UPDATE complaints SET status=?, admin_notes=? WHERE id=?", (status, admin_notes, complaint_id))
-    conn.commit()
-    conn.close()
+    write(DATABASE_PATH, "UPDATE complaints SET status=?, admin_notes=? WHERE id=?",
+          (status, admin_notes, complaint_id))
 
 
 # ==================== FOLLOW-UPS ====================
 
 
 def add_follow_up(user_id, project_id):
-    conn = get_db()
     try:
-        conn.execute("INSERT INTO follow_ups (user_id, project_id) VALUES (?,?)", (user_id, project_id))
-        conn.commit()
-        conn.close()
+        write(DATABASE_PATH, "INSERT INTO follow_ups (user_id, project_id) VALUES (?,?)", (user_id, project_id))
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
 
 
 def remove_follow_up(user_id, project_id):
-    conn = get_db()
-    conn.execute("DELETE FROM follow_ups WHERE user_id=? AND project_id=?", (user_id, project_id))
-    conn.commit()
-    conn.close()
+    write(DATABASE_PATH, "DELETE FROM follow_ups WHERE user_id=? AND project_id=?", (user_id, project_id))
 
 
-def get_followed_projects(user_id):
+def get_followed_projects(user_id, fields=None):
     conn = get_db()
-    rows = conn.execute("""
-        SELECT p.*, c.city_name FROM projects p
+    rows = conn.execute(f"""
+        SELECT {project_columns(fields)} FROM projects p
         JOIN city c ON p.city_id=c.city_id
         JOIN follow_ups f ON p.id=f.project_id
         WHERE f.user_id=?
@@ -483,21 +780,17 @@ def get_followed_projects(user_id):
 
 def insert_review(contractor_name, reviewer_id, rating, title=None, body=None):
     """Insert or replace a review for a contractor by a user. Returns review id or None on error."""
-    conn = get_db()
     try:
-        conn.execute("""
+        # RETURNING gives the row id for updates too (lastrowid only moves on insert)
+        return run_write(DATABASE_PATH, lambda conn: conn.execute("""
             INSERT INTO contractor_reviews (contractor_name, reviewer_id, rating, title, body)
             VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(contractor_name, reviewer_id) DO UPDATE SET
                 rating=excluded.rating, title=excluded.title,
                 body=excluded.body, created_at=CURRENT_TIMESTAMP
-        """, (contractor_name, reviewer_id, rating, title, body))
-        conn.commit()
-        rid = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-        conn.close()
-        return rid
+            RETURNING id
+        """, (contractor_name, reviewer_id, rating, title, body)).fetchone()[0])
     except Exception as e:
-        conn.close()
         print(f"Review insert error: {e}")
         return None
 
@@ -0,0 +1,183 @@
+"""One writer thread per SQLite file, with group commit.
+
+Request threads no longer open their own connection and commit; they hand
+the write to the file's writer (``execute()`` / ``run()``) and get a Future.
+The writer owns a single connection and takes whatever has queued up while
+the previous transaction was committing -- up to DB_WRITER_MAX_BATCH writes
+-- and applies it as one ``BEGIN IMMEDIATE ... COMMIT``. Each write runs in
+its own SAVEPOINT, so a failing write (e.g. a UNIQUE violation) only rolls
+back itself and raises from its own Future. Futures resolve after COMMIT.
+
+Inside one process this removes writer-vs-writer lock waits entirely and
+turns N fsyncs into one. Several gunicorn workers still each have a writer
+and meet at SQLite's lock, with busy_timeout as before.
+
+``write()`` and ``run_write()`` are the blocking forms used by the data layer.
+A write still queued when DB_WRITE_TIMEOUT expires is cancelled, so a caller
+that got the timeout knows it was never applied.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from utils.metrics import counter, gauge, histogram
+from utils.request_metrics import traced_connect
+
+MAX_BATCH = int(os.environ.get("DB_WRITER_MAX_BATCH", "256"))
+# Extra wait for company after the first queued write; 0 batches only what is already queued
+GROUP_WINDOW_SECONDS = float(os.environ.get("DB_WRITER_WINDOW_MS", "0")) / 1000
+WRITE_TIMEOUT = float(os.environ.get("DB_WRITE_TIMEOUT", "30"))
+
+db_write_queue_seconds = histogram(
+    "db_write_queue_seconds", "Time a write waited in the writer queue before it ran.", ("db",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+db_write_commit_seconds = histogram(
+    "db_write_commit_seconds", "Time per group-commit transaction, BEGIN to COMMIT.", ("db",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+db_write_batch_size = histogram(
+    "db_write_batch_size", "Writes applied per transaction.", ("db",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+db_write_queue_depth = gauge("db_write_queue_depth", "Writes waiting for the writer thread.", ("db",))
+db_writes = counter("db_writes_total", "Writes by outcome: ok, error (own failure), aborted (batch failed).",
+                    ("db", "result"))
+
+
+class DBWriter:
+    """Writer thread for the SQLite file at `path`."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.pid = os.getpid()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._loop, name=f"db-writer:{self.name}", daemon=True)
+        self._thread.start()
+
+    def run(self, fn):
+        """Queue fn(conn); the Future resolves to its return value once committed."""
+        future = Future()
+        self._queue.put((fn, future, time.perf_counter()))
+        db_write_queue_depth.set(self._queue.qsize(), db=self.name)
+        return future
+
+    def execute(self, sql, params=()):
+        """Queue one statement; the Future resolves to its lastrowid."""
+        return self.run(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened and closed explicitly below
+        conn = traced_connect(self.path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + GROUP_WINDOW_SECONDS
+        while len(batch) < MAX_BATCH:
+            try:
+                remaining = deadline - time.perf_counter()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        db_write_queue_depth.set(self._queue.qsize(), db=self.name)
+        return batch
+
+    def _apply(self, conn, batch):
+        """Run the batch in one transaction; returns [(future, ok, value)]."""
+        outcomes = []
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        for fn, future, queued in batch:
+            db_write_queue_seconds.observe(started - queued, db=self.name)
+            conn.execute("SAVEPOINT write")
+            try:
+                outcomes.append((future, True, fn(conn)))
+            except Exception as e:
+                conn.execute("ROLLBACK TO write")
+                outcomes.append((future, False, e))
+            conn.execute("RELEASE write")
+        conn.execute("COMMIT")
+        db_write_commit_seconds.observe(time.perf_counter() - started, db=self.name)
+        db_write_batch_size.observe(len(batch), db=self.name)
+        return outcomes
+
+    def _reset(self, conn):
+        """Roll back after a failed batch; returns None if conn must be reopened."""
+        if conn is None:
+            return None
+        try:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return conn
+        except sqlite3.Error:
+            conn.close()
+            return None
+
+    def _loop(self):
+        conn = None
+        while True:
+            # Claim the batch first: from here on its callers can no longer cancel
+            batch = [item for item in self._next_batch() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                if conn is None:
+                    conn = self._connect()
+                outcomes = self._apply(conn, batch)
+            except Exception as e:
+                # Connect, BEGIN or COMMIT failed: nothing in this batch was written
+                print(f"[db_writer] {self.name}: batch of {len(batch)} failed: {e}")
+                conn = self._reset(conn)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                db_writes.inc(len(batch), db=self.name, result="aborted")
+                continue
+            for future, ok, value in outcomes:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+                db_writes.inc(db=self.name, result="ok" if ok else "error")
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path):
+    """The writer for `path` in this process (a forked worker gets its own)."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.pid != os.getpid():
+            writer = _writers[key] = DBWriter(key)
+        return writer
+
+
+def _wait(future):
+    try:
+        return future.result(WRITE_TIMEOUT)
+    except FutureTimeout:
+        # Still queued: withdraw it, so the error we raise means "not written"
+        if future.cancel():
+            raise
+        # Already in the transaction being committed; its outcome is moments away
+        return future.result()
+
+
+def write(path, sql, params=()):
+    """Run one statement on the writer and wait; returns lastrowid, re-raises its error."""
+    return _wait(get_writer(path).execute(sql, params))
+
+
+def run_write(path, fn):
+    """Run fn(conn) on the writer and wait; returns its result, re-raises its error."""
+    return _wait(get_writer(path).run(fn))
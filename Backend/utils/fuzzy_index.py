@@ -0,0 +1,81 @@
+"""Typo-tolerant name lookup over character trigrams.
+
+Each indexed alias ("kandivali west", "patel infrastructure") is split into
+padded trigrams; a query phrase is scored against every alias sharing at least
+one trigram with the Dice coefficient, so "kandivli" -> "Kandivali" and
+"gatkopar" -> "Ghatkopar" resolve in a single posting-list pass.
+"""
+
+import os
+from collections import Counter
+
+FUZZY_THRESHOLD = float(os.environ.get("FUZZY_THRESHOLD", "0.6"))
+# Shorter query words are too ambiguous to correct
+FUZZY_MIN_CHARS = 4
+
+
+def trigrams(text):
+    padded = f"  {' '.join(text.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Aliases -> (kind, value) with a similarity-threshold lookup."""
+
+    def __init__(self):
+        self._entries = []
+        self._postings = {}
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, alias, kind, value):
+        alias = " ".join(alias.lower().split())
+        if len(alias) < FUZZY_MIN_CHARS or (alias, kind) in self._seen:
+            return
+        self._seen.add((alias, kind))
+        grams = trigrams(alias)
+        entry_id = len(self._entries)
+        self._entries.append((alias, kind, value, len(grams)))
+        for g in grams:
+            self._postings.setdefault(g, []).append(entry_id)
+
+    def lookup(self, text, kinds=None, threshold=FUZZY_THRESHOLD):
+        """Best (value, kind, score) for `text` at or above `threshold`, else None."""
+        grams = trigrams(text)
+        shared = Counter()
+        for g in grams:
+            for entry_id in self._postings.get(g, ()):
+                shared[entry_id] += 1
+        best = None
+        for entry_id, count in shared.items():
+            alias, kind, value, size = self._entries[entry_id]
+            if kinds and kind not in kinds:
+                continue
+            score = 2.0 * count / (len(grams) + size)
+            if score >= threshold and (best is None or score > best[2]):
+                best = (value, kind, score)
+        return best
+
+    def resolve(self, words, kinds=None, threshold=FUZZY_THRESHOLD, max_n=3, skip=()):
+        """Best match per kind over the 1..max_n word phrases of `words`.
+
+        Phrases made only of `skip` words are not looked up. Returns
+        {kind: (value, score, phrase)}; on equal scores the longer phrase
+        wins, so "kandivli west" beats "kandivli".
+        """
+        found = {}
+        for n in range(min(max_n, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                window = words[i:i + n]
+                phrase = " ".join(window)
+                if len(phrase) < FUZZY_MIN_CHARS or all(w in skip for w in window):
+                    continue
+                hit = self.lookup(phrase, kinds, threshold)
+                if not hit:
+                    continue
+                value, kind, score = hit
+                if kind not in found or score > found[kind][1]:
+                    found[kind] = (value, score, phrase)
+        return found
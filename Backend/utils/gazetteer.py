@@ -0,0 +1,291 @@
+"""Gazetteer + Aho-Corasick matcher shared by the Flask and FastAPI query parsers.
+
+Terms come from two places: the static vocabularies below (statuses, project
+types, area aliases) and whatever the databases know about — ward names,
+zones, contractors and corporators. Each app registers the SQL that yields its
+terms with ``register_source``; the automaton is built lazily and rebuilt after
+``invalidate()`` (called whenever new projects or meetings are ingested).
+
+``scan(text)`` walks the text once and returns every term found as whole
+words (a plural "s" is allowed: "roads", but not "parking"), so one pass answers "which ward / status / type / contractor is this
+question about".
+"""
+
+import re
+import sqlite3
+import threading
+from collections import deque
+
+from utils.fuzzy_index import TrigramIndex, FUZZY_MIN_CHARS
+from utils.request_metrics import traced_connect
+
+# Ward numbers: "ward 37", "ward no 37", "ward no. 37", "ward37"
+WARD_NO_RE = re.compile(r"\bward\s*(?:no\.?\s*)?(\d{1,3})\b", re.IGNORECASE)
+
+STATUS_TERMS = {
+    "delayed": "delayed", "delay": "delayed", "stalled": "stalled",
+    "completed": "completed", "done": "completed", "finished": "completed",
+    "ongoing": "ongoing", "progress": "ongoing", "approved": "approved",
+}
+
+TYPE_TERMS = {
+    "road": "roads", "highway": "roads", "bridge": "roads", "flyover": "roads",
+    "water": "water_supply", "pipeline": "water_supply", "pipe": "water_supply",
+    "school": "schools", "education": "schools", "park": "parks", "garden": "parks",
+    "drain": "drainage", "drainage": "drainage", "sewer": "drainage", "flood": "drainage",
+    "flooding": "drainage", "nallah": "drainage",
+    "health": "healthcare", "healthcare": "healthcare", "hospital": "healthcare", "dispensary": "healthcare",
+    "light": "street_lighting", "lighting": "street_lighting", "lamp": "street_lighting", "led": "street_lighting",
+    "waste": "waste_management", "garbage": "waste_management", "trash": "waste_management",
+}
+
+# Common Mumbai/Delhi areas and local aliases, in addition to DB ward names
+AREA_ALIASES = {
+    "kandivali": "Kandivali", "andheri": "Andheri", "bandra": "Bandra",
+    "dadar": "Dadar", "worli": "Worli", "mulund": "Mulund", "kurla": "Kurla",
+    "borivali": "Borivali", "malad": "Malad", "ghatkopar": "Ghatkopar",
+    "versova": "Andheri West", "charkop": "Kandivali West",
+    "chandni chowk": "Chandni Chowk", "dwarka": "Dwarka", "rohini": "Rohini",
+    "saket": "Saket", "lajpat nagar": "Lajpat Nagar", "pitampura": "Pitampura",
+    "okhla": "Okhla", "janakpuri": "Janakpuri", "karol bagh": "Karol Bagh",
+    "mayur vihar": "Mayur Vihar", "shahdara": "Shahdara",
+}
+
+# Words that main.py's detect_filters turns into a project_name filter
+PROJECT_TERMS = (
+    "road", "drain", "water", "repair", "construction", "park", "light", "sidewalk",
+    "school", "bus", "waste", "toilet", "traffic", "garden", "storm",
+)
+# Longer word forms of PROJECT_TERMS (scan() only matches whole words)
+PROJECT_TERM_FORMS = {"lighting": "light", "drainage": "drain", "repairing": "repair", "gardening": "garden"}
+
+_DIRECTIONS = ("east", "west", "north", "south", "(e)", "(w)")
+_DIRECTION_WORDS = {"east", "west", "north", "south", "central"}
+_HONORIFICS = {"shri", "smt", "sri", "dr", "mr", "mrs", "ms", "adv"}
+
+# Kinds that also go into the typo-tolerant trigram index
+FUZZY_KINDS = {"ward_name", "contractor", "corporator", "location"}
+
+
+class Automaton:
+    """Aho-Corasick automaton over lowercase patterns."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, payload):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), payload))
+        self._built = False
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter(self, text):
+        """Yield (start, end, payload) for every pattern occurrence, in end order."""
+        if not self._built:
+            self.build()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i - length + 1, i + 1, payload
+
+
+def _fuzzy_aliases(term, kind):
+    """Spellings worth fuzzy-matching for one gazetteer term."""
+    if kind == "location":
+        # Free-text location: index its longer words ("charkop", "sector")
+        return [w for w in term.replace(",", " ").split() if len(w) >= FUZZY_MIN_CHARS and w.isalpha()]
+    words = [w for w in term.split() if w.strip(".") not in _HONORIFICS]
+    # No bare surnames: "patel" alone would turn a contractor query into a corporator filter
+    aliases = {term, " ".join(words), " ".join(words[:2])}
+    return [a for a in aliases if a]
+
+
+def _at_word_start(text, start):
+    return start == 0 or not text[start - 1].isalnum()
+
+
+def _at_word_end(text, end):
+    # A trailing plural "s" still ends the word: "roads", "parks", "wards"
+    if end < len(text) and text[end] == "s":
+        end += 1
+    return end == len(text) or not text[end].isalnum()
+
+
+def _base_area(name):
+    """'Kandivali West' -> 'Kandivali' so a bare area name still matches."""
+    parts = name.split()
+    if len(parts) > 1 and parts[-1].lower() in _DIRECTIONS:
+        return " ".join(parts[:-1])
+    return None
+
+
+class Gazetteer:
+    """Term automaton + the kinds it was built from."""
+
+    def __init__(self, terms):
+        self.size = 0
+        self._automaton = Automaton()
+        self.fuzzy = TrigramIndex()
+        seen = set()
+        for term, kind, value in terms:
+            key = (term, kind)
+            if not term or key in seen:
+                continue
+            seen.add(key)
+            if kind in FUZZY_KINDS:
+                for alias in _fuzzy_aliases(term, kind):
+                    # A location resolves to the corrected word, not the whole text
+                    self.fuzzy.add(alias, kind, alias if kind == "location" else value)
+            if kind == "location":
+                continue
+            self._automaton.add(term, (kind, value))
+            self.size += 1
+        self._automaton.build()
+
+    def scan(self, text):
+        """{kind: value} for the first (leftmost, then longest) term of each kind."""
+        text = text.lower()
+        best = {}
+        for start, end, (kind, value) in self._automaton.iter(text):
+            # Whole words only: "park" not in "parking", "ward 3" not in "ward 37"
+            if not _at_word_start(text, start) or not _at_word_end(text, end):
+                continue
+            current = best.get(kind)
+            if current is None or start < current[0] or (start == current[0] and end > current[1]):
+                best[kind] = (start, end, value)
+        return {kind: value for kind, (_, _, value) in best.items()}
+
+
+# ---------------- shared instance ----------------
+_sources = []
+_current = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def register_source(db_path, sql):
+    """Add a query yielding (kind, term) rows.
+
+    Kinds: ward_name, ward_zone, contractor, corporator, and location (free
+    text, only used for fuzzy matching).
+    """
+    with _lock:
+        if (db_path, sql) not in _sources:
+            _sources.append((db_path, sql))
+    invalidate()
+
+
+def invalidate():
+    """Drop the automaton; the next get_gazetteer() rebuilds it from the DB."""
+    global _current, _generation
+    _generation += 1
+    _current = None
+
+
+def _static_terms():
+    for term, value in STATUS_TERMS.items():
+        yield term, "status", value
+    for term, value in TYPE_TERMS.items():
+        yield term, "project_type", value
+    for term, value in AREA_ALIASES.items():
+        yield term, "ward_name", value
+    for term in PROJECT_TERMS:
+        yield term, "project_term", term
+    for term, value in PROJECT_TERM_FORMS.items():
+        yield term, "project_term", value
+
+
+def _db_terms():
+    for db_path, sql in list(_sources):
+        try:
+            conn = traced_connect(db_path, timeout=30.0)
+            try:
+                rows = conn.execute(sql).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[gazetteer] skipped source {db_path}: {e}")
+            continue
+        for kind, value in rows:
+            if value is None:
+                continue
+            value = str(value).strip()
+            # Bare numbers would match any number in the question
+            if len(value) < 2 or value.isdigit():
+                continue
+            # Zones named "West" / "South East" would fire on every "Andheri West"
+            if kind == "ward_zone" and set(value.lower().split()) <= _DIRECTION_WORDS:
+                continue
+            yield value.lower(), kind, value
+            if kind == "ward_name":
+                base = _base_area(value)
+                if base:
+                    yield base.lower(), kind, base
+
+
+def get_gazetteer():
+    global _current
+    gaz = _current
+    if gaz is None:
+        with _lock:
+            gaz = _current
+            if gaz is None:
+                generation = _generation
+                gaz = Gazetteer(list(_static_terms()) + list(_db_terms()))
+                # An ingest that finished mid-build leaves this one stale; use it
+                # for this call only and rebuild on the next.
+                if generation == _generation:
+                    _current = gaz
+                print(f"[gazetteer] built with {gaz.size} terms, {len(gaz.fuzzy)} fuzzy aliases")
+    return gaz
+
+
+def scan(text):
+    return get_gazetteer().scan(text)
+
+
+# Everyday words that must never be "corrected" into a name on their own
+_COMMON_WORDS = (set(STATUS_TERMS) | set(TYPE_TERMS) | set(PROJECT_TERMS) | set(PROJECT_TERM_FORMS)
+                 | _DIRECTION_WORDS | {"ward", "zone", "project", "projects", "work", "works", "area", "near"})
+
+
+def fuzzy_resolve(words):
+    """{kind: (value, score, phrase)} for misspelled wards, areas and people in `words`."""
+    return get_gazetteer().fuzzy.resolve(words, skip=_COMMON_WORDS)
+
+
+def find_ward_no(text):
+    m = WARD_NO_RE.search(text)
+    return int(m.group(1)) if m else None
@@ -0,0 +1,218 @@
+"""Ward GeoJSON served from memory, pre-serialised and pre-compressed.
+
+The 590 KB source file is read, transformed into the FeatureCollection the
+map expects and serialised once per file mtime. The bytes are kept as-is and
+as gzip (and brotli, when the module is installed) variants, each with its own
+ETag, so a map load costs a stat() and a dict lookup.
+
+Zoom-band variants (see utils/geometry) are cached the same way, GeoJSON
+tiles cut from them are kept in a bounded LRU, and documents derived from
+database state (the ward map with stats) are kept per name until their data
+version changes. Everything is keyed by source path so a city's geometry can
+be measured and unloaded as a unit (utils/geometry_registry).
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from utils import fast_json
+from utils.geometry import approx_size, band_for_zoom, simplify_collection, tile_collection
+
+GEOJSON_MAX_AGE = int(os.environ.get("GEOJSON_MAX_AGE", "3600"))
+TILE_CACHE_SIZE = int(os.environ.get("TILE_CACHE_SIZE", "1024"))
+
+_payloads = {}
+_tiles = OrderedDict()
+_versioned = {}
+_lock = threading.RLock()  # versioned builds read other cached documents
+
+
+def ward_feature_collection(raw):
+    """City ward GeoJSON -> FeatureCollection with wardNumber / wardName.
+
+    The ward id comes from `note` (Mumbai), `ward_number` (Delhi) or
+    `wardNumber`, as an integer where it is numeric.
+    """
+    features = []
+    for feature in raw.get("features", []):
+        props = feature.get("properties") or {}
+        raw_wn = props.get("note", props.get("ward_number", props.get("wardNumber")))
+        try:
+            wn = int(raw_wn)
+        except (ValueError, TypeError):
+            wn = raw_wn or 0
+        features.append({
+            "type": "Feature",
+            "properties": {"wardNumber": wn, "wardName": props.get("ward_name") or f"Ward {wn}"},
+            "geometry": feature["geometry"],
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _load(path, transform):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return transform(fast_json.loads(f.read()))
+    return {"type": "FeatureCollection", "features": []}
+
+
+def _encode(doc):
+    body = fast_json.dumps(doc)
+    digest = hashlib.sha1(body).hexdigest()[:20]
+    variants = {
+        "identity": (body, f'"{digest}"'),
+        "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"'),
+    }
+    if brotli is not None:
+        variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+    return variants
+
+
+def _variants_size(variants):
+    return sum(len(body) for body, _ in variants.values())
+
+
+def _entry(path, transform):
+    """(document, encoded variants) for `path` after `transform`, rebuilt when the file changes."""
+    stamp = file_stamp(path)
+    key = (path, transform)
+    cached = _payloads.get(key)
+    if cached is None or cached[0] != stamp:
+        with _lock:
+            cached = _payloads.get(key)
+            if cached is None or cached[0] != stamp:
+                doc = _load(path, transform)
+                variants = _encode(doc)
+                cached = (stamp, doc, variants, approx_size(doc) + _variants_size(variants))
+                _payloads[key] = cached
+                print(f"[geojson] {os.path.basename(path)} ({getattr(transform, '__name__', 'transform')}): "
+                      + ", ".join(f"{k} {len(v[0])} bytes" for k, v in variants.items()))
+    return cached[1], cached[2]
+
+
+def _encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def _respond(variants, max_age):
+    encoding = _encoding()
+    body, etag = variants[encoding]
+
+    if request.if_none_match.contains(etag.strip('"')):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+        resp.headers["Content-Length"] = str(len(body))
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+@lru_cache(maxsize=None)
+def zoom_transform(band):
+    """Ward transform for a zoom band (None = full resolution); one object per band."""
+    if band is None:
+        return ward_feature_collection
+
+    def transform(raw):
+        return simplify_collection(ward_feature_collection(raw), band)
+
+    transform.__name__ = f"z{band}"
+    return transform
+
+
+def geojson_response(path, transform=ward_feature_collection, max_age=GEOJSON_MAX_AGE):
+    """Response for the GeoJSON at `path`, negotiated and revalidated from memory."""
+    _, variants = _entry(path, transform)
+    return _respond(variants, max_age)
+
+
+def geojson_document(path, transform=ward_feature_collection):
+    """The transformed FeatureCollection for `path` (shared, do not mutate)."""
+    return _entry(path, transform)[0]
+
+
+def versioned_response(name, version, build, max_age=GEOJSON_MAX_AGE):
+    """Encoded `build()` output kept under `name` until `version` changes.
+
+    `name` is a tuple; include the source path in it so evict() can find it.
+    """
+    cached = _versioned.get(name)
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _versioned.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, _encode(build()))
+                _versioned[name] = cached
+    return _respond(cached[1], max_age)
+
+
+def tile_response(path, z, x, y, max_age=GEOJSON_MAX_AGE):
+    """GeoJSON tile z/x/y of the zoom-band geometry of `path`, from an LRU of encoded tiles."""
+    doc, _ = _entry(path, zoom_transform(band_for_zoom(z)))
+    key = (path, file_stamp(path), z, x, y)
+    with _lock:
+        variants = _tiles.get(key)
+        if variants is not None:
+            _tiles.move_to_end(key)
+    if variants is None:
+        variants = _encode(tile_collection(doc, z, x, y))
+        with _lock:
+            _tiles[key] = variants
+            while len(_tiles) > TILE_CACHE_SIZE:
+                _tiles.popitem(last=False)
+    return _respond(variants, max_age)
+
+
+def memory_usage(path):
+    """Estimated bytes held for `path`: documents, encodings, tiles and versioned builds."""
+    with _lock:
+        total = sum(c[3] for (p, _), c in _payloads.items() if p == path)
+        total += sum(_variants_size(v) for key, v in _tiles.items() if key[0] == path)
+        total += sum(_variants_size(c[1]) for name, c in _versioned.items() if path in name)
+    return total
+
+
+def evict(path):
+    """Drop everything cached for `path`; it is rebuilt on the next request."""
+    with _lock:
+        for key in [k for k in _payloads if k[0] == path]:
+            del _payloads[key]
+        for key in [k for k in _tiles if k[0] == path]:
+            del _tiles[key]
+        for name in [n for n in _versioned if path in n]:
+            del _versioned[name]
+
+
+def clear():
+    with _lock:
+        _payloads.clear()
+        _tiles.clear()
+        _versioned.clear()
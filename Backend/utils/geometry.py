@@ -0,0 +1,279 @@
+"""Ward polygon simplification per zoom band, and GeoJSON tiles.
+
+Simplification is Douglas-Peucker, but run on *arcs* rather than whole rings:
+each ring is cut at its junctions (vertices where the set of wards using the
+point changes), every arc is simplified once in a canonical direction, and the
+same result is reused by both wards that share it. Shared borders therefore
+stay identical after simplification and no slivers or gaps open between wards.
+
+Coordinates are also rounded to the precision a pixel can show at the band's
+zoom, which is most of the byte saving for low zoom levels.
+"""
+
+import math
+import os
+
+# Zoom levels at which simplified variants are precomputed; anything above the
+# last band gets the full-resolution geometry.
+ZOOM_BANDS = (10, 12, 14, 16)
+# Allowed deviation, in screen pixels at the band's zoom
+SIMPLIFY_PIXELS = float(os.environ.get("SIMPLIFY_PIXELS", "1.0"))
+TILE_BUFFER = 0.05  # fraction of a tile added on each side before clipping
+
+# Rough CPython footprint of a parsed [x, y] pair and of a feature's dicts,
+# for memory budgets
+POINT_BYTES = 120
+FEATURE_BYTES = 1000
+
+
+def band_for_zoom(zoom):
+    """Smallest band >= zoom, or None for full resolution."""
+    if zoom is None:
+        return None
+    for band in ZOOM_BANDS:
+        if zoom <= band:
+            return band
+    return None
+
+
+def degrees_per_pixel(zoom):
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def _perp_distance(p, a, b):
+    (x, y), (x1, y1), (x2, y2) = p, a, b
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(x - x1, y - y1)
+    return abs(dy * x - dx * y + x2 * y1 - y2 * x1) / math.hypot(dx, dy)
+
+
+def douglas_peucker(points, tolerance):
+    """Simplify an open polyline, always keeping both endpoints."""
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        best, index = 0.0, None
+        for i in range(first + 1, last):
+            d = _perp_distance(points[i], points[first], points[last])
+            if d > best:
+                best, index = d, i
+        if index is not None and best > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def vertex_count(geometry):
+    if geometry.get("type") == "Point":
+        return 1
+    return sum(len(ring) for polygon in _rings(geometry) for ring in polygon)
+
+
+def approx_size(collection):
+    """Estimated resident bytes of a parsed FeatureCollection."""
+    features = collection.get("features", [])
+    return sum(FEATURE_BYTES + POINT_BYTES * vertex_count(f.get("geometry") or {}) for f in features)
+
+
+def _key(point):
+    return (round(point[0], 7), round(point[1], 7))
+
+
+def _rings(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def _junctions(features):
+    """Keys of shared vertices where the set of features using the point changes.
+
+    These are the ends of every shared border (and isolated touching points);
+    vertices owned by a single ward never need to be pinned.
+    """
+    owners = {}
+    for i, feature in enumerate(features):
+        for polygon in _rings(feature["geometry"]):
+            for ring in polygon:
+                for p in ring:
+                    owners.setdefault(_key(p), set()).add(i)
+    junctions = set()
+    for feature in features:
+        for polygon in _rings(feature["geometry"]):
+            for ring in polygon:
+                pts = ring[:-1] if len(ring) > 1 and _key(ring[0]) == _key(ring[-1]) else ring
+                n = len(pts)
+                for j in range(n):
+                    here = owners[_key(pts[j])]
+                    if len(here) > 1 and (here != owners[_key(pts[j - 1])]
+                                          or here != owners[_key(pts[(j + 1) % n])]):
+                        junctions.add(_key(pts[j]))
+    return junctions
+
+
+class _ArcSimplifier:
+    """Simplifies arcs once, whichever direction a ring walks them."""
+
+    def __init__(self, tolerance, junctions):
+        self.tolerance = tolerance
+        self.junctions = junctions
+        self._done = {}
+
+    def arc(self, points):
+        keys = tuple(_key(p) for p in points)
+        rev = keys[::-1]
+        forward = keys <= rev
+        canon = keys if forward else rev
+        result = self._done.get(canon)
+        if result is None:
+            pts = list(points) if forward else list(points)[::-1]
+            result = douglas_peucker(pts, self.tolerance)
+            self._done[canon] = result
+        return result if forward else result[::-1]
+
+    def ring(self, ring):
+        closed = len(ring) > 1 and _key(ring[0]) == _key(ring[-1])
+        pts = ring[:-1] if closed else list(ring)
+        if len(pts) < 4:
+            return ring
+        cuts = [i for i, p in enumerate(pts) if _key(p) in self.junctions]
+        if not cuts:
+            # Free-standing ring: anchor at the first point and the farthest one
+            far = max(range(len(pts)), key=lambda i: math.hypot(pts[i][0] - pts[0][0], pts[i][1] - pts[0][1]))
+            cuts = sorted({0, far})
+        # Rotate so the ring starts on a cut, then simplify cut-to-cut arcs
+        start = cuts[0]
+        pts = pts[start:] + pts[:start]
+        cuts = [c - start for c in cuts] + [len(pts)]
+        pts = pts + [pts[0]]
+        out = []
+        for a, b in zip(cuts, cuts[1:]):
+            out.extend(self.arc(pts[a:b + 1])[:-1])
+        out.append(out[0])
+        # Too few points left to be a polygon: keep the original ring
+        return out if len(out) >= 4 else ring
+
+
+def _round_ring(ring, digits):
+    out = []
+    for x, y, *_ in ring:
+        p = [round(x, digits), round(y, digits)]
+        if not out or out[-1] != p:
+            out.append(p)
+    return out
+
+
+def simplify_collection(collection, zoom):
+    """FeatureCollection simplified for `zoom` with shared borders kept intact."""
+    features = collection.get("features", [])
+    tolerance = degrees_per_pixel(zoom) * SIMPLIFY_PIXELS
+    # Enough decimals to keep roughly a tenth of a pixel
+    digits = max(0, min(7, math.ceil(-math.log10(degrees_per_pixel(zoom) / 10))))
+    simplifier = _ArcSimplifier(tolerance, _junctions(features))
+
+    out = []
+    for feature in features:
+        geometry = feature["geometry"]
+        polygons = [[_round_ring(simplifier.ring(r), digits) for r in polygon] for polygon in _rings(geometry)]
+        if geometry["type"] == "Polygon":
+            new_geometry = {"type": "Polygon", "coordinates": polygons[0]}
+        elif geometry["type"] == "MultiPolygon":
+            new_geometry = {"type": "MultiPolygon", "coordinates": polygons}
+        else:
+            new_geometry = geometry
+        out.append({"type": "Feature", "properties": feature.get("properties", {}), "geometry": new_geometry})
+    return {"type": "FeatureCollection", "features": out}
+
+
+# ---------------- tiles ----------------
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees of Web Mercator tile z/x/y."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def _clip_ring(ring, west, south, east, north):
+    """Sutherland-Hodgman clip of a closed ring to a rectangle."""
+    edges = (
+        (lambda p: p[0] >= west, lambda a, b: _cross_x(a, b, west)),
+        (lambda p: p[0] <= east, lambda a, b: _cross_x(a, b, east)),
+        (lambda p: p[1] >= south, lambda a, b: _cross_y(a, b, south)),
+        (lambda p: p[1] <= north, lambda a, b: _cross_y(a, b, north)),
+    )
+    pts = ring[:-1]
+    for inside, cross in edges:
+        if not pts:
+            break
+        clipped = []
+        prev = pts[-1]
+        for cur in pts:
+            if inside(cur):
+                if not inside(prev):
+                    clipped.append(cross(prev, cur))
+                clipped.append(cur)
+            elif inside(prev):
+                clipped.append(cross(prev, cur))
+            prev = cur
+        pts = clipped
+    if len(pts) < 3:
+        return None
+    return pts + [pts[0]]
+
+
+def _cross_x(a, b, x):
+    t = (x - a[0]) / (b[0] - a[0])
+    return [x, round(a[1] + t * (b[1] - a[1]), 6)]
+
+
+def _cross_y(a, b, y):
+    t = (y - a[1]) / (b[1] - a[1])
+    return [round(a[0] + t * (b[0] - a[0]), 6), y]
+
+
+def _bbox(polygons):
+    xs = [p[0] for polygon in polygons for ring in polygon for p in ring]
+    ys = [p[1] for polygon in polygons for ring in polygon for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def tile_collection(collection, z, x, y, buffer=TILE_BUFFER):
+    """Features of `collection` clipped to tile z/x/y (plus a small buffer).
+
+    The result is plain GeoJSON in lng/lat, not MVT: no protobuf encoding and
+    no tile-local integer coordinates.
+    """
+    west, south, east, north = tile_bounds(z, x, y)
+    bx, by = (east - west) * buffer, (north - south) * buffer
+    west, south, east, north = west - bx, south - by, east + bx, north + by
+
+    out = []
+    for feature in collection.get("features", []):
+        polygons = _rings(feature["geometry"])
+        if not polygons:
+            continue
+        fx0, fy0, fx1, fy1 = _bbox(polygons)
+        if fx1 < west or fx0 > east or fy1 < south or fy0 > north:
+            continue
+        clipped = []
+        for polygon in polygons:
+            rings = [_clip_ring(r, west, south, east, north) for r in polygon]
+            if rings and rings[0]:
+                clipped.append([r for r in rings if r])
+        if not clipped:
+            continue
+        geometry = ({"type": "Polygon", "coordinates": clipped[0]} if len(clipped) == 1
+                    else {"type": "MultiPolygon", "coordinates": clipped})
+        out.append({"type": "Feature", "properties": feature.get("properties", {}), "geometry": geometry})
+    return {"type": "FeatureCollection", "features": out}
@@ -0,0 +1,97 @@
+"""Per-city ward geometry, discovered on disk and loaded on first use.
+
+Every ``data/<city>_wards.geojson`` (plus the original ``data/wards.geojson``,
+which is Mumbai's) is found by listing the directory; nothing is read until a
+request for that city arrives. The parsed documents, encoded variants, tiles
+and point locators live in the existing path-keyed caches (geojson_cache,
+ward_locator). This module only tracks which cities are resident, in LRU
+order, and when switching cities pushes their estimated size over
+GEOMETRY_MEMORY_MB it drops the least recently used cities from those caches.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from utils import geojson_cache, ward_locator
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEOMETRY_DIR = os.environ.get("GEOMETRY_DIR", os.path.join(BASE_DIR, "data"))
+GEOMETRY_MEMORY_MB = float(os.environ.get("GEOMETRY_MEMORY_MB", "64"))
+DEFAULT_CITY = os.environ.get("DEFAULT_CITY", "mumbai")
+
+SUFFIX = "_wards.geojson"
+LEGACY_FILE = "wards.geojson"  # Mumbai's geometry from before per-city files
+
+_paths = {}
+_scanned = None
+_resident = OrderedDict()  # city -> path, least recently used first
+_lock = threading.Lock()
+
+
+def _scan():
+    """{city: path} for GEOMETRY_DIR, re-listed only when the directory changes."""
+    global _paths, _scanned
+    try:
+        stamp = os.stat(GEOMETRY_DIR).st_mtime_ns
+    except OSError:
+        stamp = None
+    if stamp != _scanned:
+        names = sorted(os.listdir(GEOMETRY_DIR)) if stamp is not None else []
+        paths = {n[:-len(SUFFIX)].lower(): os.path.join(GEOMETRY_DIR, n) for n in names if n.endswith(SUFFIX)}
+        if LEGACY_FILE in names:
+            paths.setdefault(DEFAULT_CITY, os.path.join(GEOMETRY_DIR, LEGACY_FILE))
+        _paths, _scanned = paths, stamp
+    return _paths
+
+
+def cities():
+    """Cities that have ward geometry on disk."""
+    return sorted(_scan())
+
+
+def geometry_path(city=None):
+    """GeoJSON path for `city` (DEFAULT_CITY when empty), or None if it has none.
+
+    Marks the city as in use; other cities are unloaded if this one was not
+    already the most recently used and the budget is exceeded.
+    """
+    city = (city or DEFAULT_CITY).strip().lower()
+    path = _scan().get(city)
+    if path is None:
+        return None
+    with _lock:
+        switched = not _resident or next(reversed(_resident)) != city
+        _resident[city] = path
+        _resident.move_to_end(city)
+        if switched:
+            _enforce_budget()
+    return path
+
+
+def _usage(path):
+    return geojson_cache.memory_usage(path) + ward_locator.memory_usage(path)
+
+
+def _enforce_budget():
+    budget = GEOMETRY_MEMORY_MB * 1024 * 1024
+    sizes = {city: _usage(path) for city, path in _resident.items()}
+    total = sum(sizes.values())
+    # Never unload the city being served (the last one)
+    for city in list(_resident)[:-1]:
+        if total <= budget:
+            break
+        path = _resident.pop(city)
+        geojson_cache.evict(path)
+        ward_locator.evict(path)
+        total -= sizes[city]
+        print(f"[geometry] unloaded {city} ({sizes[city] // 1024} KB)")
+
+
+def stats():
+    """{city: {"loaded", "bytes"}} for every discovered city."""
+    with _lock:
+        return {
+            city: {"loaded": city in _resident, "bytes": _usage(path) if city in _resident else 0}
+            for city, path in _scan().items()
+        }
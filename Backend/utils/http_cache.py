@@ -0,0 +1,97 @@
+"""Conditional GET for read-only Flask endpoints.
+
+``conditional_get(version_fn)`` keys a response on the route, its query
+arguments, the X-City header and a data version (see data_versions in
+utils/database.py, bumped by triggers on every write). The key doubles as a
+strong ETag, so ``If-None-Match`` is answered with 304 before the view runs,
+and recent 200 bodies are kept in a small in-process LRU.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+from utils.metrics import counter
+
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "15"))
+HTTP_CACHE_SIZE = int(os.environ.get("HTTP_CACHE_SIZE", "256"))
+
+http_cache_requests = counter(
+    "http_cache_requests_total",
+    "Conditional GET outcomes: not_modified (304), hit (served from memory), miss (view ran).",
+    ("endpoint", "result"),
+)
+
+_responses = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _lock:
+        hit = _responses.get(key)
+        if hit is not None:
+            _responses.move_to_end(key)
+        return hit
+
+
+def _cache_put(key, value):
+    with _lock:
+        _responses[key] = value
+        _responses.move_to_end(key)
+        while len(_responses) > HTTP_CACHE_SIZE:
+            _responses.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _responses.clear()
+
+
+def _request_key(version):
+    args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return "|".join([request.path, args, request.headers.get("X-City", ""), str(version)])
+
+
+def _finish(resp, etag, max_age):
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+    resp.vary.add("X-City")
+    return resp
+
+
+def conditional_get(version_fn, max_age=HTTP_CACHE_MAX_AGE):
+    """Decorate a GET view whose output only changes when `version_fn()` does."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = _request_key(version_fn())
+            etag = hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+            # Weak match: utils/compression marks the ETag of encoded bodies weak
+            if request.if_none_match.contains_weak(etag):
+                http_cache_requests.inc(endpoint=view.__name__, result="not_modified")
+                return _finish(make_response("", 304), etag, max_age)
+
+            cached = _cache_get(key)
+            if cached is not None:
+                http_cache_requests.inc(endpoint=view.__name__, result="hit")
+                body, mimetype = cached
+                resp = make_response(body, 200)
+                resp.mimetype = mimetype
+                return _finish(resp, etag, max_age)
+
+            http_cache_requests.inc(endpoint=view.__name__, result="miss")
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            _cache_put(key, (resp.get_data(), resp.mimetype))
+            return _finish(resp, etag, max_age)
+
+        return wrapper
+
+    return decorator
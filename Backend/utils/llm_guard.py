@@ -0,0 +1,222 @@
+"""Latency budget for LLM calls: per-request deadlines + a circuit breaker.
+
+A slow provider must never hold a request hostage. Calls are run on a small
+worker pool and abandoned once the request's deadline passes; the caller then
+serves its local fallback. Results that arrive late can still be handed to an
+``on_late`` callback (e.g. to warm the answer cache for the next request).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils.llm_metrics import record_deadline
+
+LLM_DEADLINE_SECONDS = float(os.environ.get("LLM_DEADLINE_SECONDS", "4.0"))
+LLM_MAX_WORKERS = int(os.environ.get("LLM_MAX_WORKERS", "8"))
+BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "900"))
+CACHE_LATE_ANSWERS = os.environ.get("LLM_CACHE_LATE_ANSWERS", "1") != "0"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class LLMTimeout(Exception):
+    """The LLM call did not finish before the request deadline."""
+
+
+class CircuitOpen(Exception):
+    """The provider is being skipped after repeated timeouts."""
+
+
+class Deadline:
+    """Absolute deadline for one request, shared by every LLM call it makes."""
+
+    def __init__(self, seconds=None):
+        self.seconds = LLM_DEADLINE_SECONDS if seconds is None else seconds
+        self.expires_at = time.monotonic() + self.seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive timeouts, half-opens after `cooldown`."""
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        """True if a call may go out. In half-open state only one probe is let through."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self):
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_timeout(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.threshold:
+                if self._opened_at is None:
+                    print(f"[llm_guard] circuit '{self.name}' opened after {self._failures} timeouts")
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        return {"name": self.name, "state": self.state, "consecutive_timeouts": self._failures}
+
+
+class AnswerCache:
+    """Small LRU + TTL cache for generated answers."""
+
+    def __init__(self, size=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._items.get(key)
+            if not hit:
+                return None
+            stored_at, value = hit
+            if time.monotonic() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def late_writer(self, key, transform=None):
+        """on_late callback that stores a late result, or None when disabled."""
+        if not CACHE_LATE_ANSWERS:
+            return None
+
+        def _write(result):
+            value = transform(result) if transform else result
+            if value:
+                self.put(key, value)
+        return _write
+
+
+_breakers = {}
+
+
+def get_breaker(name):
+    """One breaker per provider, shared by every caller in the process."""
+    with _executor_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="llm")
+    return _executor
+
+
+def call_with_deadline(fn, deadline=None, breaker=None, on_late=None, purpose="llm"):
+    """Run `fn()` but give up when `deadline` expires.
+
+    Raises CircuitOpen if the breaker is skipping the provider and LLMTimeout
+    if the deadline passes first. Exceptions raised by `fn` propagate as-is.
+    If the call times out but later succeeds, `on_late(result)` is invoked from
+    the worker thread; a call that never left the pool queue is cancelled
+    instead. Timeouts and breaker skips are counted under `purpose`.
+    """
+    if deadline is None:
+        deadline = Deadline()
+    if breaker is not None and not breaker.allow():
+        record_deadline(purpose, "circuit_open")
+        raise CircuitOpen(f"LLM provider '{breaker.name}' temporarily skipped")
+
+    budget = deadline.remaining()
+    if budget <= 0:
+        if breaker is not None:
+            # Nothing went out, so do not count it against the provider.
+            breaker.release()
+        record_deadline(purpose, "timeout")
+        raise LLMTimeout("request deadline already exhausted")
+
+    future = _get_executor().submit(fn)
+    try:
+        result = future.result(timeout=budget)
+    except FutureTimeout:
+        if future.cancel():
+            # Still waiting for a pool worker: the provider never saw it, so it
+            # neither counts against the breaker nor spends quota later.
+            if breaker is not None:
+                breaker.release()
+            record_deadline(purpose, "queued")
+            raise LLMTimeout(f"no LLM worker free within the {budget:.2f}s budget")
+        if breaker is not None:
+            breaker.record_timeout()
+        if on_late is not None:
+            def _deliver(f):
+                if f.cancelled() or f.exception() is not None:
+                    return
+                try:
+                    on_late(f.result())
+                except Exception as e:
+                    print(f"[llm_guard] late result handler failed: {e}")
+            future.add_done_callback(_deliver)
+        record_deadline(purpose, "timeout")
+        raise LLMTimeout(f"LLM call exceeded {budget:.2f}s budget")
+    except Exception:
+        if breaker is not None:
+            # Fast provider errors are not a latency problem; the caller
+            # already falls back on them, so leave the breaker untouched.
+            breaker.release()
+        raise
+
+    if breaker is not None:
+        breaker.record_success()
+    return result
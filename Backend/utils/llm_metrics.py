@@ -0,0 +1,156 @@
+"""Per-purpose instrumentation for LLM and OCR calls.
+
+Wrap each provider call in ``track_llm(purpose, prompt)`` and hand the raw
+response to ``call.record_response(...)``. Purposes used in the tree:
+keywords, answer, extraction, project_summary, classification,
+meeting_summary and ocr.
+
+Retries are counted from the SDK's own HTTP attempts: ``create_client``
+installs ``count_http_attempt`` as an httpx request hook, and any repeated
+non-GET request inside one tracked call is a retry.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import counter, histogram, SIZE_BUCKETS
+
+CHARS_PER_TOKEN = 4
+
+llm_calls = counter("llm_calls_total", "LLM/OCR provider calls by purpose and outcome.", ("purpose", "outcome"))
+llm_latency = histogram("llm_call_duration_seconds", "Provider call latency by purpose and outcome.", ("purpose", "outcome"))
+llm_prompt_chars = histogram("llm_prompt_chars", "Prompt size in characters.", ("purpose",), buckets=SIZE_BUCKETS)
+llm_response_chars = histogram("llm_response_chars", "Response size in characters.", ("purpose",), buckets=SIZE_BUCKETS)
+llm_tokens = counter(
+    "llm_tokens_total",
+    "Tokens per purpose; source=usage when the provider reported them, estimate otherwise.",
+    ("purpose", "direction", "source"),
+)
+llm_retries = counter("llm_retries_total", "HTTP retries made by the SDK inside a call.", ("purpose",))
+llm_errors = counter("llm_errors_total", "Provider call errors by exception type.", ("purpose", "error"))
+llm_cache = counter("llm_cache_total", "Answer cache lookups.", ("purpose", "result"))
+llm_deadline = counter(
+    "llm_deadline_total",
+    "Calls abandoned by the request deadline (timeout), cancelled while waiting for a worker (queued)"
+    " or skipped by the breaker (circuit_open).",
+    ("purpose", "reason"),
+)
+ocr_stage_latency = histogram("ocr_stage_duration_seconds", "Document-intelligence job stages.", ("stage",))
+
+_local = threading.local()
+
+
+def _usage_from(response):
+    """(prompt_tokens, completion_tokens) from an SDK object or JSON dict, else None."""
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt, completion = getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    if prompt is None or completion is None:
+        return None
+    return int(prompt), int(completion)
+
+
+class TrackedCall:
+    """State for one provider call; see track_llm()."""
+
+    def __init__(self, purpose, prompt):
+        self.purpose = purpose
+        self.prompt_chars = len(prompt or "")
+        self.response_chars = 0
+        self.usage = None
+        self.error = None
+        self.attempts = {}
+
+    def record_response(self, text, response=None):
+        """Note the response text; `response` supplies provider token usage when present."""
+        self.response_chars = len(text or "")
+        if response is not None:
+            self.usage = _usage_from(response)
+
+    def fail(self, error):
+        """Mark the call failed without raising (e.g. a non-2xx HTTP response)."""
+        self.error = error
+
+    @property
+    def retries(self):
+        return sum(n - 1 for n in self.attempts.values() if n > 1)
+
+
+def count_http_attempt(request):
+    """httpx request hook: counts attempts per endpoint for the call on this thread."""
+    call = getattr(_local, "call", None)
+    if call is None or request.method == "GET":
+        return
+    key = (request.method, str(request.url))
+    call.attempts[key] = call.attempts.get(key, 0) + 1
+
+
+@contextmanager
+def track_llm(purpose, prompt=""):
+    """Time a provider call and record size, token, retry and error metrics.
+
+    Must wrap the call on the thread that makes it (i.e. inside the function
+    given to call_with_deadline) so SDK retries are attributed correctly.
+    """
+    call = TrackedCall(purpose, prompt)
+    previous = getattr(_local, "call", None)
+    _local.call = call
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield call
+    except Exception as e:
+        outcome = "error"
+        llm_errors.inc(purpose=purpose, error=type(e).__name__)
+        raise
+    finally:
+        _local.call = previous
+        elapsed = time.perf_counter() - start
+        if outcome == "ok" and call.error:
+            outcome = "error"
+            llm_errors.inc(purpose=purpose, error=call.error)
+        llm_calls.inc(purpose=purpose, outcome=outcome)
+        llm_latency.observe(elapsed, purpose=purpose, outcome=outcome)
+        if call.retries:
+            llm_retries.inc(call.retries, purpose=purpose)
+        if purpose != "ocr":
+            llm_prompt_chars.observe(call.prompt_chars, purpose=purpose)
+            if outcome == "ok":
+                llm_response_chars.observe(call.response_chars, purpose=purpose)
+            _record_tokens(call, outcome)
+
+
+def _record_tokens(call, outcome):
+    if call.usage:
+        prompt_tokens, completion_tokens = call.usage
+        source = "usage"
+    else:
+        prompt_tokens = call.prompt_chars // CHARS_PER_TOKEN
+        completion_tokens = call.response_chars // CHARS_PER_TOKEN if outcome == "ok" else 0
+        source = "estimate"
+    llm_tokens.inc(prompt_tokens, purpose=call.purpose, direction="prompt", source=source)
+    if completion_tokens:
+        llm_tokens.inc(completion_tokens, purpose=call.purpose, direction="completion", source=source)
+
+
+@contextmanager
+def ocr_stage(stage):
+    """Time one stage of an OCR job (create, upload, process, download)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ocr_stage_latency.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_cache(purpose, hit):
+    llm_cache.inc(purpose=purpose, result="hit" if hit else "miss")
+
+
+def record_deadline(purpose, reason):
+    llm_deadline.inc(purpose=purpose, reason=reason)
@@ -1,11 +1,9 @@
-import pdfplumber
-from PIL import Image
-import pytesseract
 import os
 import json
 import re
 from datetime import datetime
-from sarvamai import SarvamAI
+from utils.sarvam_client import create_client, CHAT_MODEL_KWARGS
+from utils.llm_metrics import track_llm
 
 _client = None
 
@@ -16,12 +14,16 @@ def _get_client():
         api_key = os.environ.get("SARVAM_API_KEY")
         if not api_key or api_key == "your_sarvam_api_key_here":
             raise RuntimeError("SARVAM_API_KEY is not configured. Add it to your .env file.")
-        _client = SarvamAI(api_subscription_key=api_key)
+        _client = create_client(api_key)
     return _client
 
 
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF using pdfplumber, OCR fallback for scanned pages."""
+    # Imported here: pdfplumber and pytesseract are only needed for uploads
+    import pdfplumber
+    import pytesseract
+
     text = ""
     try:
         with pdfplumber.open(pdf_path) as pdf:
@@ -145,17 +147,21 @@ RULES:
 DOCUMENT TEXT:
 {pdf_text[:12000]}"""
 
+    system_prompt = "You are a JSON extraction engine for Indian municipal meeting documents. Return ONLY valid JSON with both meeting details and projects array."
+
     try:
-        response = _get_client().chat.completions(
-            messages=[
-                {"role": "system", "content": "You are a JSON extraction engine for Indian municipal meeting documents. Return ONLY valid JSON with both meeting details and projects array."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.05,
-            max_tokens=4096,
-        )
-
-        result = response.choices[0].message.content.strip()
+        with track_llm("extraction", system_prompt + prompt) as call:
+            response = _get_client().chat.completions(
+                **CHAT_MODEL_KWARGS,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.05,
+                max_tokens=4096,
+            )
+            result = response.choices[0].message.content.strip()
+            call.record_response(result, response)
         print(f"[Sarvam response: {len(result)} chars]")
 
         parsed = _extract_json_from_text(result)
@@ -233,11 +239,15 @@ Expected Completion: {project_data.get('expected_completion')}
 Write in simple language focusing on what matters to residents."""
 
     try:
-        response = _get_client().chat.completions(
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=200,
-        )
-        return response.choices[0].message.content.strip()
+        with track_llm("project_summary", prompt) as call:
+            response = _get_client().chat.completions(
+                **CHAT_MODEL_KWARGS,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=200,
+            )
+            summary = response.choices[0].message.content.strip()
+            call.record_response(summary, response)
+        return summary
     except Exception:
         return f"{project_data.get('project_name')} in {project_data.get('ward_name')} with budget of ₹{budget/100000:.2f} lakhs."
@@ -0,0 +1,153 @@
+"""EXPLAIN QUERY PLAN auditor for debug and test runs (SQL_PLAN_AUDIT=1).
+
+Every statement run through ``traced_connect`` connections (see
+utils/request_metrics) is keyed by its normalised text. The first time a
+statement is seen its plan is fetched with ``EXPLAIN QUERY PLAN`` on the same
+connection and parameters; after that only its call count and call sites
+(file:line of the caller) are updated. ``report()`` lists each statement as
+SCAN or SEARCH, with the table and its approximate row count for every full
+scan, and ``capture()`` collects the statements run inside a block so a
+test can fail when a hot route starts scanning (see tests/test_query_plans.py).
+
+Off by default: auditing costs one extra EXPLAIN per distinct statement and
+a stack walk per call.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+enabled = os.environ.get("SQL_PLAN_AUDIT", "0") == "1"
+MAX_STATEMENTS = int(os.environ.get("SQL_PLAN_AUDIT_MAX", "2000"))
+
+AUDITED_VERBS = ("SELECT", "WITH", "UPDATE", "DELETE")
+SCAN_RE = re.compile(r"^SCAN (\w+)")
+TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|GROUP\b|ORDER\b|LIMIT\b)(\w+))?",
+                      re.IGNORECASE)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_FILES = (os.path.abspath(__file__), os.path.join(BASE_DIR, "utils", "request_metrics.py"))
+
+_statements = {}
+_lock = threading.Lock()
+_capture = ContextVar("plan_capture", default=None)
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    with _lock:
+        _statements.clear()
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename in _SKIP_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    path = os.path.relpath(frame.f_code.co_filename, BASE_DIR)
+    return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def _aliases(sql):
+    """{alias or table name: table} from the FROM / JOIN clauses."""
+    aliases = {}
+    for table, alias in TABLE_RE.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def _table_rows(conn, table):
+    """Approximate row count (max rowid) of a real table, None otherwise."""
+    try:
+        cur = sqlite3.Cursor(conn)
+        if not cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            return None
+        return cur.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"').fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+
+def _explain(conn, sql, params):
+    """(plan detail lines, [{"table", "detail", "est_rows"}] for full scans)."""
+    try:
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return [f"(EXPLAIN failed: {e})"], []
+    details = [row[3] for row in rows]
+    aliases = _aliases(sql)
+    scans = []
+    for detail in details:
+        m = SCAN_RE.match(detail)
+        if not m:
+            continue
+        table = aliases.get(m.group(1), m.group(1))
+        rows = _table_rows(conn, table)
+        if rows is not None:  # CTEs, subqueries and "SCAN CONSTANT ROW" are not tables
+            scans.append({"table": table, "detail": detail, "est_rows": rows})
+    return details, scans
+
+
+def observe(conn, sql, params=()):
+    """Record one execution of `sql` on `conn` (called by TracedCursor)."""
+    key = " ".join(sql.split())
+    if not key[:6].upper().startswith(AUDITED_VERBS):
+        return
+    entry = _statements.get(key)
+    if entry is None:
+        if len(_statements) >= MAX_STATEMENTS:
+            return
+        plan, scans = _explain(conn, sql, params)
+        entry = {"sql": key, "plan": plan, "scans": scans, "calls": 0, "sites": Counter()}
+        with _lock:
+            entry = _statements.setdefault(key, entry)
+    site = _call_site()
+    with _lock:
+        entry["calls"] += 1
+        entry["sites"][site] += 1
+    captured = _capture.get()
+    if captured is not None:
+        captured.setdefault(key, entry)
+
+
+def _summary(entry):
+    return {
+        "sql": entry["sql"],
+        "access": "SCAN" if entry["scans"] else "SEARCH",
+        "calls": entry["calls"],
+        "sites": [{"site": s, "calls": n} for s, n in entry["sites"].most_common()],
+        "scans": entry["scans"],
+        "plan": entry["plan"],
+    }
+
+
+def report(scans_only=False):
+    """Audited statements, full scans first, then by call count."""
+    with _lock:
+        entries = [_summary(e) for e in _statements.values()]
+    if scans_only:
+        entries = [e for e in entries if e["scans"]]
+    entries.sort(key=lambda e: (not e["scans"], -e["calls"]))
+    return entries
+
+
+@contextmanager
+def capture():
+    """Collect {sql: entry} for the statements executed inside the block."""
+    captured = {}
+    token = _capture.set(captured)
+    try:
+        yield captured
+    finally:
+        _capture.reset(token)
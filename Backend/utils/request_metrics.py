@@ -0,0 +1,150 @@
+"""Per-route request metrics and per-request SQL accounting for both apps.
+
+``init_flask(app)`` / ``init_fastapi(app)`` record, per route template,
+method and status: latency, response size, and how many SQL statements the
+request ran and how long they took. Everything is exported by the existing
+``/metrics`` endpoints (utils/metrics).
+
+SQL is counted by opening connections through ``traced_connect()``, which
+returns a sqlite3 connection whose cursors time execute and fetch calls into
+the current request's counters (a ContextVar, so FastAPI's threadpool endpoints
+are covered too). Outside a request the wrapper only adds a ContextVar read.
+"""
+
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from utils import plan_audit
+from utils.metrics import histogram
+
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+request_latency = histogram(
+    "http_request_duration_seconds", "Request latency by route template, method and status.",
+    ("app", "route", "method", "status"), buckets=REQUEST_BUCKETS,
+)
+response_size = histogram(
+    "http_response_size_bytes", "Response body size as sent (after compression).",
+    ("app", "route"), buckets=BYTES_BUCKETS,
+)
+request_sql_statements = histogram(
+    "http_request_sql_statements", "SQL statements executed per request.",
+    ("app", "route"), buckets=SQL_COUNT_BUCKETS,
+)
+request_sql_seconds = histogram(
+    "http_request_sql_seconds", "Time spent in SQLite (execute + fetch) per request.",
+    ("app", "route"), buckets=REQUEST_BUCKETS,
+)
+
+# [statements, seconds] for the request being served, None outside one
+_sql = ContextVar("request_sql", default=None)
+
+
+# ---------------- traced sqlite ----------------
+class TracedCursor(sqlite3.Cursor):
+    def _timed(self, fn, *args, count=False):
+        stats = _sql.get()
+        if stats is None:
+            return fn(*args)
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            stats[1] += time.perf_counter() - start
+            if count:
+                stats[0] += 1
+
+    def execute(self, sql, parameters=()):
+        if plan_audit.enabled:
+            plan_audit.observe(self.connection, sql, parameters)
+        return self._timed(super().execute, sql, parameters, count=True)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters, count=True)
+
+    def executescript(self, script):
+        return self._timed(super().executescript, script, count=True)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose statements are accounted to the current request."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute() and friends bypass cursor(); route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+def traced_connect(database, **kwargs):
+    """sqlite3.connect() returning a TracedConnection."""
+    return sqlite3.connect(database, factory=TracedConnection, **kwargs)
+
+
+# ---------------- recording ----------------
+def _begin():
+    return time.perf_counter(), _sql.set([0, 0.0])
+
+
+def _finish(app, started, token, route, method, status, size):
+    stats = _sql.get()
+    _sql.reset(token)
+    request_latency.observe(time.perf_counter() - started, app=app, route=route, method=method, status=str(status))
+    if size is not None:
+        response_size.observe(size, app=app, route=route)
+    request_sql_statements.observe(stats[0], app=app, route=route)
+    request_sql_seconds.observe(stats[1], app=app, route=route)
+
+
+def init_flask(app, name="flask"):
+    """Register before/after hooks. Call before other after_request hooks
+    (e.g. compression) so the size recorded is the one sent."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_metrics():
+        g._request_metrics = _begin()
+
+    @app.after_request
+    def _record_request_metrics(resp):
+        begun = g.pop("_request_metrics", None)
+        if begun is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            size = None if resp.is_streamed or resp.direct_passthrough else resp.calculate_content_length()
+            _finish(name, *begun, route, request.method, resp.status_code, size)
+        return resp
+
+
+def init_fastapi(app, name="fastapi"):
+    @app.middleware("http")
+    async def request_metrics_middleware(request, call_next):
+        started, token = _begin()
+        status, resp = 500, None
+        try:
+            resp = await call_next(request)
+            status = resp.status_code
+            return resp
+        finally:
+            route = request.scope.get("route")
+            length = resp.headers.get("content-length") if resp is not None else None
+            _finish(name, started, token, getattr(route, "path", "unmatched"), request.method, status,
+                    int(length) if length else None)
@@ -0,0 +1,52 @@
+"""Shared SarvamAI client construction.
+
+Set SARVAM_API_BASE to send every SDK call (chat + document intelligence) to a
+different host, e.g. the local stand-in from mock_sarvam.py:
+
+    SARVAM_API_BASE=http://127.0.0.1:8100
+    SARVAM_API_URL=http://127.0.0.1:8100/v1/chat/completions
+
+SARVAM_API_BASE and SARVAM_MODEL are read once, when this module is imported,
+so they must be in the environment (or in .env, which app.py and main.py load
+before their local imports) by then; changing them later has no effect.
+
+The SDK (and httpx) are imported on the first create_client() call: they
+account for most of the apps' import time and many workers never call the LLM.
+"""
+
+import os
+from utils.llm_metrics import count_http_attempt
+
+SARVAM_API_BASE = os.environ.get("SARVAM_API_BASE")
+# Chat model, only when SARVAM_MODEL is set; otherwise the request carries no
+# model and the API's default applies, as before. Spread into chat calls:
+# client.chat.completions(messages=..., **CHAT_MODEL_KWARGS)
+SARVAM_CHAT_MODEL = os.environ.get("SARVAM_MODEL") or None
+CHAT_MODEL_KWARGS = {"model": SARVAM_CHAT_MODEL} if SARVAM_CHAT_MODEL else {}
+SARVAM_TIMEOUT_SECONDS = 60
+
+
+def _http_client():
+    import httpx
+
+    # Same defaults as the SDK, plus a hook that counts its retries per call.
+    return httpx.Client(
+        timeout=SARVAM_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        event_hooks={"request": [count_http_attempt]},
+    )
+
+
+def create_client(api_key):
+    """SarvamAI client for `api_key`, pointed at SARVAM_API_BASE when set."""
+    from sarvamai import SarvamAI, SarvamAIEnvironment
+
+    if not SARVAM_API_BASE:
+        return SarvamAI(api_subscription_key=api_key, httpx_client=_http_client())
+    base = SARVAM_API_BASE.rstrip("/")
+    environment = SarvamAIEnvironment(
+        base=base,
+        creative=f"{base}/dubbing",
+        production=base.replace("http://", "ws://").replace("https://", "wss://"),
+    )
+    return SarvamAI(api_subscription_key=api_key, environment=environment, httpx_client=_http_client())
@@ -0,0 +1,244 @@
+"""Offline BM25-weighted TF-IDF retrieval over projects.
+
+Every project (name, summary, location, ward, type) becomes a sparse,
+L2-normalised BM25 vector stored column-wise (CSC: term -> doc postings) in
+NumPy arrays. A query is scored against all documents with one ``bincount``
+over the postings of its terms, which is the cosine similarity between the
+query and every project; ``search`` returns the top-k.
+
+Common civic abbreviations are expanded on both sides, so "sewage plant"
+finds "STP Expansion". The index follows the projects-only ``data_versions``
+counter. When the only change is new rows, just those rows are read and
+tokenised; after an update or delete every row is re-read. Either way the
+matrix itself is rebuilt in full, since IDF and the average document length
+depend on every document.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from utils.database import get_data_version, PROJECTS
+from utils.request_metrics import traced_connect
+
+SEMANTIC_MIN_SCORE = float(os.environ.get("SEMANTIC_MIN_SCORE", "0.12"))
+SEMANTIC_REFRESH_SECONDS = float(os.environ.get("SEMANTIC_REFRESH_SECONDS", "5"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    "the", "is", "in", "at", "of", "on", "for", "to", "and", "or", "an", "a", "be",
+    "what", "how", "which", "where", "when", "show", "tell", "me", "my", "will",
+    "are", "has", "have", "with", "about", "update", "status", "project", "projects",
+    "any", "all", "latest", "current", "give", "list", "find", "search", "from",
+    "can", "you", "please", "want", "need", "know", "get", "this", "that", "it",
+    "new", "by", "of", "ready", "done", "going", "there", "here", "our", "area",
+}
+
+ABBREVIATIONS = {
+    "stp": "sewage treatment plant",
+    "swd": "storm water drain",
+    "rob": "road over bridge",
+    "fob": "foot over bridge",
+    "mld": "million litres water",
+    "led": "led light",
+    "hdpe": "pipe",
+    "bmc": "municipal corporation",
+    "mcd": "municipal corporation",
+    "phc": "primary health centre",
+}
+
+PROJECT_COLUMNS = "id, city_id, project_name, summary, location_details, ward_name, project_type"
+
+
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    tokens = []
+    for word in TOKEN_RE.findall((text or "").lower()):
+        if word in STOP_WORDS:
+            continue
+        tokens.append(_stem(word))
+        if word in ABBREVIATIONS:
+            tokens.extend(_stem(w) for w in ABBREVIATIONS[word].split())
+    return tokens
+
+
+def _document_terms(row):
+    _, _, name, summary, location, ward_name, project_type = row
+    # The project name is the strongest signal, so it counts twice
+    tokens = tokenize(name) * 2
+    for text in (summary, location, ward_name, (project_type or "").replace("_", " ")):
+        tokens.extend(tokenize(text))
+    return Counter(tokens)
+
+
+class SemanticIndex:
+    """BM25/TF-IDF vectors for the projects table with cosine top-k search."""
+
+    def __init__(self, db_path, refresh_seconds=SEMANTIC_REFRESH_SECONDS):
+        self.db_path = db_path
+        self.refresh_seconds = refresh_seconds
+        self._docs = []           # (project_id, city_id, Counter)
+        self._last_id = 0
+        self._version = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._matrix = None
+
+    # ---------------- build / refresh ----------------
+    def _load(self, since_id):
+        conn = traced_connect(self.db_path, timeout=30.0)
+        try:
+            return conn.execute(
+                f"SELECT {PROJECT_COLUMNS} FROM projects WHERE id > ? ORDER BY id", (since_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def refresh(self, force=False):
+        """Pick up DB changes. Returns the number of rows read from the DB.
+
+        Pure inserts read only the new rows; any other change re-reads them
+        all. The postings matrix is rebuilt from every document in both cases.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return 0
+        with self._lock:
+            self._checked_at = now
+            try:
+                version = get_data_version(PROJECTS, db_path=self.db_path)
+                if version == self._version and self._matrix is not None:
+                    return 0
+                new_rows = self._load(self._last_id)
+                # Triggers bump the version once per written project row: if more
+                # happened than these inserts, rows were updated or deleted, so start over.
+                if self._version is None or version - self._version != len(new_rows):
+                    self._docs = []
+                    self._last_id = 0
+                    new_rows = self._load(0)
+            except sqlite3.Error as e:
+                print(f"[semantic_index] not built: {e}")
+                return 0
+            for row in new_rows:
+                self._docs.append((row[0], row[1], _document_terms(row)))
+                self._last_id = row[0]
+            self._version = version
+            self._matrix = self._build_matrix(self._docs)
+        print(f"[semantic_index] {len(self._docs)} projects, {len(self._matrix['vocab'])} terms")
+        return len(new_rows)
+
+    @staticmethod
+    def _build_matrix(docs):
+        n_docs = len(docs)
+        df = Counter()
+        for _, _, terms in docs:
+            df.update(terms.keys())
+        vocab = {term: i for i, term in enumerate(sorted(df))}
+        idf = np.array([math.log(1 + (n_docs - df[t] + 0.5) / (df[t] + 0.5)) for t in sorted(df)], dtype=np.float32)
+
+        lengths = np.array([sum(terms.values()) for _, _, terms in docs], dtype=np.float32)
+        avg_len = float(lengths.mean()) if n_docs else 1.0
+
+        rows, cols, vals = [], [], []
+        for d, (_, _, terms) in enumerate(docs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[d] / avg_len)
+            for term, tf in terms.items():
+                rows.append(d)
+                cols.append(vocab[term])
+                vals.append(tf * (BM25_K1 + 1) / (tf + norm))
+        rows = np.array(rows, dtype=np.int32)
+        cols = np.array(cols, dtype=np.int32)
+        vals = np.array(vals, dtype=np.float32) * idf[cols] if len(cols) else np.array([], dtype=np.float32)
+
+        # L2-normalise each document so the dot product is a cosine
+        doc_norms = np.sqrt(np.bincount(rows, weights=vals * vals, minlength=n_docs)).astype(np.float32)
+        doc_norms[doc_norms == 0] = 1.0
+        vals = vals / doc_norms[rows]
+
+        # Column-major postings: term -> (doc rows, weights)
+        order = np.argsort(cols, kind="stable")
+        col_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(vocab)), out=col_ptr[1:])
+        return {
+            "vocab": vocab,
+            "idf": idf,
+            "col_ptr": col_ptr,
+            "rows": rows[order],
+            "vals": vals[order],
+            "project_ids": np.array([doc[0] for doc in docs], dtype=np.int64),
+            "city_ids": np.array([doc[1] or 0 for doc in docs], dtype=np.int64),
+        }
+
+    # ---------------- search ----------------
+    def _scores(self, query):
+        """(matrix, cosine similarity of `query` with every project) in one postings pass."""
+        self.refresh()
+        m = self._matrix
+        if m is None or not len(m["project_ids"]):
+            return m, None
+
+        q_terms = Counter(t for t in tokenize(query) if t in m["vocab"])
+        if not q_terms:
+            return m, None
+        cols = np.array([m["vocab"][t] for t in q_terms], dtype=np.int64)
+        q_weights = m["idf"][cols] * np.array(list(q_terms.values()), dtype=np.float32)
+        q_weights /= np.linalg.norm(q_weights)
+
+        starts, ends = m["col_ptr"][cols], m["col_ptr"][cols + 1]
+        spans = [np.arange(s, e) for s, e in zip(starts, ends)]
+        idx = np.concatenate(spans)
+        weights = m["vals"][idx] * np.repeat(q_weights, ends - starts)
+        return m, np.bincount(m["rows"][idx], weights=weights, minlength=len(m["project_ids"]))
+
+    @staticmethod
+    def _top(scores, k, min_score):
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [i for i in top if scores[i] >= min_score]
+
+    def search(self, query, city_id=None, k=10, min_score=SEMANTIC_MIN_SCORE):
+        """[(project_id, score)] ranked by cosine similarity, best first."""
+        m, scores = self._scores(query)
+        if scores is None:
+            return []
+        if city_id:
+            scores[m["city_ids"] != city_id] = 0.0
+        return [(int(m["project_ids"][i]), float(scores[i])) for i in self._top(scores, k, min_score)]
+
+    def rank(self, query, city_id=None, k=10, min_score=SEMANTIC_MIN_SCORE):
+        """Project ids of the top-k in `city_id` and the top-k overall, best first.
+
+        Both come from the same scoring pass, so a caller can prefer the city's
+        hits and fall back to other cities without searching twice.
+        """
+        m, scores = self._scores(query)
+        if scores is None:
+            return []
+        picked = set(self._top(scores, k, min_score))
+        if city_id:
+            picked.update(self._top(np.where(m["city_ids"] == city_id, scores, 0.0), k, min_score))
+        return [int(m["project_ids"][i]) for i in sorted(picked, key=lambda i: -scores[i])]
+
+    def stats(self):
+        m = self._matrix or {}
+        return {"projects": len(self._docs), "terms": len(m.get("vocab", {})), "version": self._version}
@@ -0,0 +1,194 @@
+"""In-memory phrase vocabulary for a table's text columns.
+
+Maps every 1..max_n word phrase found in the indexed columns to the number of
+rows (per column) that contain it, so filter detection can test a question's
+n-grams without running LIKE scans. A phrase also matches when it is a prefix
+of an indexed phrase ("gym" -> "gymnasium", "open gym" -> "open gymnasium"),
+which keeps the behaviour of the old ``LIKE '%phrase%'`` probes for the cases
+that matter.
+
+With ``row_postings=True`` it also keeps word -> rowids, so ``rows_matching``
+can answer "which rows mention any of these words" (again with prefix
+matching) and the caller fetches just those rows by rowid.
+
+The index is built once and then topped up with rows whose rowid is above the
+last one seen; ``refresh()`` is cheap and rate-limited, so callers can invoke
+it on every lookup. If the table holds fewer rows than that accounts for, rows
+were deleted or replaced (``INSERT OR REPLACE`` moves a row to a new rowid)
+and the index is rebuilt, so stale phrases and rowids never match.
+"""
+
+import bisect
+import os
+from collections import Counter
+import re
+import sqlite3
+import threading
+import time
+
+from utils.request_metrics import traced_connect
+
+VOCAB_REFRESH_SECONDS = float(os.environ.get("VOCAB_REFRESH_SECONDS", "30"))
+
+TOKEN_RE = re.compile(r"\b[\w&'-]+\b")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class VocabIndex:
+    """phrase -> column -> row count, with prefix lookup per column."""
+
+    def __init__(self, db_path, table, columns, max_n=3, refresh_seconds=VOCAB_REFRESH_SECONDS,
+                 row_postings=False):
+        self.db_path = db_path
+        self.table = table
+        self.columns = tuple(columns)
+        self.max_n = max_n
+        self.refresh_seconds = refresh_seconds
+        self.row_postings = row_postings
+        self._postings = {}
+        self._sorted = {c: [] for c in self.columns}
+        self._rows = {}
+        self._words = []
+        self._last_rowid = 0
+        self._row_count = 0
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    # ---------------- build / refresh ----------------
+    def _phrases(self, text):
+        words = tokenize(text)
+        found = set()
+        for n in range(1, self.max_n + 1):
+            for i in range(len(words) - n + 1):
+                found.add(" ".join(words[i:i + n]))
+        return found
+
+    def _add_row(self, rowid, row, new_keys, new_words):
+        words = set()
+        for column, value in zip(self.columns, row):
+            for phrase in self._phrases(value):
+                counts = self._postings.setdefault(phrase, {})
+                if column not in counts:
+                    new_keys[column].append(phrase)
+                counts[column] = counts.get(column, 0) + 1
+                if self.row_postings and " " not in phrase:
+                    words.add(phrase)
+        for word in words:
+            if word not in self._rows:
+                self._rows[word] = []
+                new_words.append(word)
+            self._rows[word].append(rowid)
+
+    def _load_since(self, rowid):
+        """(rows above `rowid`, table row count), read from one snapshot."""
+        cols = ", ".join(self.columns)
+        conn = traced_connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            rows = conn.execute(
+                f"SELECT rowid, {cols} FROM {self.table} WHERE rowid > ? ORDER BY rowid", (rowid,)
+            ).fetchall()
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        finally:
+            conn.close()
+        return rows, total
+
+    def _clear(self):
+        self._postings = {}
+        self._sorted = {c: [] for c in self.columns}
+        self._rows = {}
+        self._words = []
+        self._last_rowid = 0
+        self._row_count = 0
+
+    def rebuild(self):
+        """Drop everything and index the whole table again."""
+        with self._lock:
+            self._clear()
+        return self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Index rows added since the last refresh. Returns the number of new rows."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return 0
+        with self._lock:
+            self._checked_at = now
+            try:
+                rows, total = self._load_since(self._last_rowid)
+                if total != self._row_count + len(rows):
+                    # Rows were deleted or replaced: their postings are stale
+                    self._clear()
+                    rows, total = self._load_since(0)
+            except sqlite3.Error as e:
+                print(f"[vocab_index] {self.table} not indexed: {e}")
+                return 0
+            new_keys = {c: [] for c in self.columns}
+            new_words = []
+            for row in rows:
+                self._add_row(row[0], row[1:], new_keys, new_words)
+                self._last_rowid = row[0]
+            self._row_count += len(rows)
+            for column, keys in new_keys.items():
+                if keys:
+                    self._sorted[column] = sorted(self._sorted[column] + keys)
+            if new_words:
+                self._words = sorted(self._words + new_words)
+        if rows:
+            print(f"[vocab_index] {self.table}: indexed {len(rows)} rows, {len(self._postings)} phrases")
+        return len(rows)
+
+    # ---------------- lookup ----------------
+    def count(self, phrase, column):
+        """Rows whose `column` contains `phrase` (exact phrase hit only)."""
+        return self._postings.get(phrase, {}).get(column, 0)
+
+    def matches(self, phrase, column):
+        """True if `phrase` is, or is a prefix of, an indexed phrase of `column`."""
+        if self._postings.get(phrase, {}).get(column):
+            return True
+        keys = self._sorted[column]
+        i = bisect.bisect_left(keys, phrase)
+        return i < len(keys) and keys[i].startswith(phrase)
+
+    def longest_match(self, words, columns=None):
+        """First (phrase, column) hit scanning n-grams of `words` longest first.
+
+        Within one length, windows are tried left to right and columns in the
+        given order, matching the order of the old per-n-gram SQL probes.
+        """
+        self.refresh()
+        columns = columns or self.columns
+        for n in range(min(self.max_n, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                for column in columns:
+                    if self.matches(phrase, column):
+                        return phrase, column
+        return None
+
+    def rows_matching(self, words):
+        """Counter rowid -> how many of `words` the row contains (as a word or word prefix).
+
+        Needs ``row_postings=True``.
+        """
+        self.refresh()
+        hits = Counter()
+        for word in set(words):
+            rowids = set()
+            i = bisect.bisect_left(self._words, word)
+            while i < len(self._words) and self._words[i].startswith(word):
+                rowids.update(self._rows[self._words[i]])
+                i += 1
+            hits.update(rowids)
+        return hits
+
+    def stats(self):
+        return {
+            "table": self.table,
+            "phrases": len(self._postings),
+            "last_rowid": self._last_rowid,
+        }
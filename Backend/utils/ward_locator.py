@@ -0,0 +1,167 @@
+"""Coordinate -> ward lookup over the ward polygons.
+
+Ward bounding boxes are packed into an STR (sort-tile-recursive) R-tree once
+per file mtime; a lookup descends only the nodes whose box contains the point
+and then runs an exact even-odd point-in-polygon test (holes respected) on
+the few candidate wards. Everything is in memory, so tagging a batch of
+complaints costs microseconds per point.
+"""
+
+import json
+import math
+import os
+import threading
+
+from utils.geometry import FEATURE_BYTES, POINT_BYTES
+
+# Children per R-tree node
+NODE_CAPACITY = 8
+
+
+def _bbox_of(rings):
+    xs = [p[0] for ring in rings for p in ring]
+    ys = [p[1] for ring in rings for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _union(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _contains(box, x, y):
+    return box[0] <= x <= box[2] and box[1] <= y <= box[3]
+
+
+def _in_ring(x, y, ring):
+    inside = False
+    x1, y1 = ring[-1][0], ring[-1][1]
+    for x2, y2, *_ in ring:
+        if (y1 > y) != (y2 > y) and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _in_polygon(x, y, polygon):
+    """Inside the outer ring and outside every hole."""
+    if not _in_ring(x, y, polygon[0]):
+        return False
+    return not any(_in_ring(x, y, hole) for hole in polygon[1:])
+
+
+def _str_pack(entries):
+    """One R-tree level: group (box, payload) entries into nodes of NODE_CAPACITY."""
+    slices = max(1, math.ceil(math.sqrt(math.ceil(len(entries) / NODE_CAPACITY))))
+    per_slice = slices * NODE_CAPACITY
+    by_x = sorted(entries, key=lambda e: (e[0][0] + e[0][2]) / 2)
+    nodes = []
+    for i in range(0, len(by_x), per_slice):
+        column = sorted(by_x[i:i + per_slice], key=lambda e: (e[0][1] + e[0][3]) / 2)
+        for j in range(0, len(column), NODE_CAPACITY):
+            children = column[j:j + NODE_CAPACITY]
+            nodes.append((_union([c[0] for c in children]), children))
+    return nodes
+
+
+class WardLocator:
+    """STR R-tree over ward boxes + exact point-in-polygon."""
+
+    def __init__(self, collection):
+        self.wards = []
+        self.vertices = 0
+        leaves = []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            polygons = [p for p in polygons if p and p[0]]
+            if not polygons:
+                continue
+            ward_id = len(self.wards)
+            self.wards.append((feature.get("properties", {}), polygons))
+            for polygon in polygons:
+                self.vertices += sum(len(ring) for ring in polygon)
+                leaves.append((_bbox_of(polygon[:1]), (ward_id, polygon)))
+
+        # Pack bottom-up until a single root remains; leaf payloads are tuples,
+        # inner payloads are lists of children
+        level = leaves
+        self.depth = 0
+        while len(level) > 1:
+            level = _str_pack(level)
+            self.depth += 1
+        self._root = level[0] if level else None
+
+    def __len__(self):
+        return len(self.wards)
+
+    def locate(self, lat, lng):
+        """Properties of the ward containing (lat, lng), or None."""
+        if self._root is None:
+            return None
+        x, y = lng, lat
+        stack = [self._root]
+        while stack:
+            box, payload = stack.pop()
+            if not _contains(box, x, y):
+                continue
+            if isinstance(payload, list):
+                stack.extend(payload)
+                continue
+            ward_id, polygon = payload
+            if _in_polygon(x, y, polygon):
+                return self.wards[ward_id][0]
+        return None
+
+    def approx_size(self):
+        """Estimated resident bytes (rings dominate; tree nodes are small)."""
+        return len(self.wards) * FEATURE_BYTES + self.vertices * POINT_BYTES
+
+    def locate_many(self, points):
+        """locate() for each (lat, lng); None where a point is outside every ward."""
+        return [self.locate(lat, lng) for lat, lng in points]
+
+
+# ---------------- shared instance ----------------
+_locators = {}
+_lock = threading.Lock()
+
+
+def get_locator(path, transform=None):
+    """WardLocator for the GeoJSON at `path`, rebuilt when the file changes."""
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    cached = _locators.get(path)
+    if cached is None or cached[0] != stamp:
+        with _lock:
+            cached = _locators.get(path)
+            if cached is None or cached[0] != stamp:
+                collection = {"type": "FeatureCollection", "features": []}
+                if stamp is not None:
+                    with open(path, "r", encoding="utf-8") as f:
+                        collection = json.load(f)
+                    if transform:
+                        collection = transform(collection)
+                locator = WardLocator(collection)
+                print(f"[ward_locator] {os.path.basename(path)}: {len(locator)} wards, depth {locator.depth}")
+                cached = (stamp, locator)
+                _locators[path] = cached
+    return cached[1]
+
+
+def memory_usage(path):
+    cached = _locators.get(path)
+    return cached[1].approx_size() if cached else 0
+
+
+def evict(path):
+    with _lock:
+        _locators.pop(path, None)
@@ -1,24 +1,26 @@
 from flask import Blueprint, jsonify, request
-import json
 import os
 import sqlite3
-import re
+from utils.database import get_data_version, DATABASE_PATH, WARD_GROUP_SQL
+from utils.http_cache import conditional_get, HTTP_CACHE_MAX_AGE
+from utils.geojson_cache import (
+    geojson_response, tile_response, zoom_transform, ward_feature_collection,
+    geojson_document, versioned_response, file_stamp,
+)
+from utils.geometry import band_for_zoom
+from utils.ward_locator import get_locator
+from utils.geometry_registry import geometry_path
+from utils.request_metrics import traced_connect
 
 ward_bp = Blueprint("wards", __name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-GEOJSON_PATH = os.path.join(BASE_DIR, "data", "wards.geojson")
-
-# Use the real JanSaakshi database (same one the rest of the app uses)
-DB_PATH = os.path.join(BASE_DIR, "jansaakshi.db")
 
+# Upper bound on points per batch /locate call
+MAX_LOCATE_BATCH = int(os.environ.get("MAX_LOCATE_BATCH", "10000"))
 
-def _to_int_ward(raw) -> int:
-    """Coerce any ward_no representation to an integer, e.g. '001' -> 1, '5A' -> 5."""
-    if raw is None:
-        return 0
-    m = re.search(r'\d+', str(raw))
-    return int(m.group()) if m else 0
+# Use the real JanSaakshi database (same one the rest of the app uses)
+DB_PATH = os.path.join(BASE_DIR, DATABASE_PATH)
 
 
 def _resolve_city_id(conn):
@@ -32,40 +34,128 @@ def _resolve_city_id(conn):
     return row[0] if row else None
 
 
+def _city_geometry():
+    """GeoJSON path for ?city= (default city when absent), or None if it has no geometry."""
+    return geometry_path(request.args.get("city"))
+
+
+def _no_geometry():
+    return jsonify({"error": "No ward geometry for this city"}), 404
+
+
+def _city_locator():
+    """(WardLocator, None) for ?city=, or (None, 404 response) if it has no ward polygons."""
+    path = _city_geometry()
+    if path is None:
+        return None, _no_geometry()
+    locator = get_locator(path, ward_feature_collection)
+    if not len(locator):
+        # e.g. Delhi's file only has ward centroids (Point features)
+        return None, (jsonify({"error": "No ward boundaries for this city"}), 404)
+    return locator, None
+
+
+def _data_version():
+    """City-scoped data version for the conditional GET cache."""
+    conn = traced_connect(DB_PATH, timeout=30.0)
+    try:
+        cid = _resolve_city_id(conn)
+    finally:
+        conn.close()
+    return f"{cid}:{get_data_version(cid, db_path=DB_PATH)}"
+
+
 @ward_bp.route("/geojson")
 def get_geojson():
-    """Serve ward GeoJSON with wardNumber normalised to integer."""
-    if not os.path.exists(GEOJSON_PATH):
-        return jsonify({"type": "FeatureCollection", "features": []})
+    """Serve ward GeoJSON with wardNumber normalised to integer.
 
-    with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+    ?zoom=N returns geometry simplified for that zoom level; ?city= picks the city.
+    """
+    path = _city_geometry()
+    if path is None:
+        return _no_geometry()
+    return geojson_response(path, zoom_transform(band_for_zoom(request.args.get("zoom", type=int))))
 
-    features = []
-    for feature in raw.get("features", []):
-        try:
-            wn = int(feature["properties"].get("note", 0))
-        except (ValueError, TypeError):
-            wn = 0
-        features.append({
-            "type": "Feature",
-            "properties": {
-                "wardNumber": wn,
-                "wardName": f"Ward {wn}",
-            },
-            "geometry": feature["geometry"],
-        })
 
-    return jsonify({"type": "FeatureCollection", "features": features})
+@ward_bp.route("/tiles/<int:z>/<int:x>/<int:y>")
+def get_tile(z, x, y):
+    """Ward polygons clipped to Web Mercator tile z/x/y, simplified for z.
 
+    Each tile is a GeoJSON FeatureCollection in lng/lat (application/json),
+    not a Mapbox Vector Tile: clients load it as a GeoJSON source per tile.
+    """
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": "Invalid tile"}), 400
+    path = _city_geometry()
+    if path is None:
+        return _no_geometry()
+    return tile_response(path, z, x, y)
 
-@ward_bp.route("/stats")
-def ward_stats():
-    """Per-ward stats from the real jansaakshi.db projects table."""
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
 
-    cid = _resolve_city_id(conn)
+def locate_ward(lat, lng, city=None):
+    """{"wardNumber", "wardName"} of the ward containing the point in `city`, or None."""
+    path = geometry_path(city)
+    if path is None:
+        return None
+    return get_locator(path, ward_feature_collection).locate(lat, lng)
+
+
+def _point(obj):
+    """(lat, lng) from {"lat": .., "lng": ..} or [lat, lng]; ValueError if malformed."""
+    if isinstance(obj, dict):
+        lat, lng = obj.get("lat"), obj.get("lng", obj.get("lon"))
+    elif isinstance(obj, (list, tuple)) and len(obj) == 2:
+        lat, lng = obj
+    else:
+        raise ValueError("point must be {lat, lng} or [lat, lng]")
+    lat, lng = float(lat), float(lng)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("coordinates out of range")
+    return lat, lng
+
+
+@ward_bp.route("/locate")
+def locate():
+    """Ward containing ?lat=&lng=."""
+    try:
+        lat, lng = _point({"lat": request.args.get("lat"), "lng": request.args.get("lng")})
+    except (TypeError, ValueError):
+        return jsonify({"error": "lat and lng required"}), 400
+    locator, error = _city_locator()
+    if error:
+        return error
+    ward = locator.locate(lat, lng)
+    if ward is None:
+        return jsonify({"error": "No ward at this location", "lat": lat, "lng": lng}), 404
+    return jsonify({"lat": lat, "lng": lng, **ward})
+
+
+@ward_bp.route("/locate", methods=["POST"])
+def locate_batch():
+    """Batch lookup for ingest: {"points": [[lat, lng] | {"lat", "lng"}, ...]}."""
+    data = request.get_json(silent=True) or {}
+    points = data.get("points")
+    if not isinstance(points, list):
+        return jsonify({"error": "points list required"}), 400
+    if len(points) > MAX_LOCATE_BATCH:
+        return jsonify({"error": f"At most {MAX_LOCATE_BATCH} points per request"}), 400
+    try:
+        coords = [_point(p) for p in points]
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    locator, error = _city_locator()
+    if error:
+        return error
+    results = [
+        {"lat": lat, "lng": lng, **(ward or {"wardNumber": None, "wardName": None})}
+        for (lat, lng), ward in zip(coords, locator.locate_many(coords))
+    ]
+    return jsonify({"results": results, "count": len(results)})
+
+
+def _ward_stats(conn, cid):
+    """Per-ward stats rows from the projects table, keyed by integer ward number
+    (ward_key), or by the ward_no text for wards without one."""
     params = []
     city_filter = ""
     if cid:
@@ -74,7 +164,7 @@ def ward_stats():
 
     rows = conn.execute(f"""
         SELECT
-            ward_no,
+            {WARD_GROUP_SQL}      AS ward,
             MAX(ward_name)        AS ward_name,
             MAX(corporator_name)  AS corporator_name,
             COUNT(*)              AS total,
@@ -87,16 +177,13 @@ def ward_stats():
         FROM projects
         WHERE ward_no IS NOT NULL AND ward_no != ''
         {city_filter}
-        GROUP BY ward_no
+        GROUP BY {WARD_GROUP_SQL}
     """, params).fetchall()
-    conn.close()
 
     result = []
     for r in rows:
         d = dict(r)
-        wn = _to_int_ward(d["ward_no"])
-        if wn == 0:
-            continue  # skip rows with no parseable ward number
+        wn = d["ward"]
         result.append({
             "wardNumber":    wn,                              # integer – matches GeoJSON
             "wardName":      d["ward_name"] or f"Ward {wn}",
@@ -109,14 +196,72 @@ def ward_stats():
             "total_budget":  d["total_budget"],
             "avg_delay_days": round(float(d["avg_delay_days"] or 0), 1),
         })
+    return result
+
 
+@ward_bp.route("/stats")
+@conditional_get(_data_version)
+def ward_stats():
+    """Per-ward stats from the real jansaakshi.db projects table."""
+    conn = traced_connect(DB_PATH, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    try:
+        result = _ward_stats(conn, _resolve_city_id(conn))
+    finally:
+        conn.close()
     return jsonify(result)
 
 
+# Properties of a ward with no projects in the /map response
+_EMPTY_STATS = {"corporatorName": "", "total": 0, "active": 0, "completed": 0, "delayed": 0,
+                "stalled": 0, "total_budget": 0, "avg_delay_days": 0.0}
+
+
+@ward_bp.route("/map")
+def ward_map():
+    """Ward GeoJSON with each ward's stats in its properties: one request for the map page.
+
+    Cached per city and zoom band; rebuilt when the city's projects (or the
+    GeoJSON file) change.
+    """
+    conn = traced_connect(DB_PATH, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    try:
+        cid = _resolve_city_id(conn)
+    finally:
+        conn.close()
+    path = _city_geometry()
+    if path is None:
+        return _no_geometry()
+    band = band_for_zoom(request.args.get("zoom", type=int))
+    version = (get_data_version(cid, db_path=DB_PATH), file_stamp(path))
+
+    def build():
+        conn = traced_connect(DB_PATH, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            stats = {s["wardNumber"]: s for s in _ward_stats(conn, cid)}
+        finally:
+            conn.close()
+        geo = geojson_document(path, zoom_transform(band))
+        features = []
+        for feature in geo["features"]:
+            props = feature["properties"]
+            features.append({
+                "type": "Feature",
+                "properties": {**_EMPTY_STATS, **props, **stats.get(props["wardNumber"], {})},
+                "geometry": feature["geometry"],
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+    return versioned_response(("map", path, cid, band), version, build, max_age=HTTP_CACHE_MAX_AGE)
+
+
 @ward_bp.route("/<int:ward_no>")
+@conditional_get(_data_version)
 def single_ward(ward_no):
     """Stats for a single ward."""
-    conn = sqlite3.connect(DB_PATH, timeout=30.0)
+    conn = traced_connect(DB_PATH, timeout=30.0)
     conn.row_factory = sqlite3.Row
 
     cid = _resolve_city_id(conn)
@@ -126,7 +271,7 @@ def single_ward(ward_no):
         city_filter = " AND city_id=?"
         params.append(cid)
 
-    # Match both numeric string and zero-padded versions
+    # ward_key matches both numeric string and zero-padded versions
     rows = conn.execute(f"""
         SELECT
             COUNT(*) as total,
@@ -138,7 +283,7 @@ def single_ward(ward_no):
             MAX(ward_name) as ward_name,
             MAX(corporator_name) as corporator_name
         FROM projects
-        WHERE CAST(ward_no AS INTEGER) = ?
+        WHERE ward_key = ?
         {city_filter}
     """, [ward_no] + params).fetchone()
     conn.close()
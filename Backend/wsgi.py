@@ -0,0 +1,12 @@
+"""Production WSGI entrypoint for the Flask API (app.py).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+master: the schema is migrated a single time and warm_up() fills the caches
+before the workers fork, so every worker starts hot and shares those pages.
+"""
+
+from app import app, warm_up
+
+warm_up()
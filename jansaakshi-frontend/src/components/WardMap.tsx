@@ -2,7 +2,7 @@
 
 import { useEffect, useMemo, useRef, useState, useCallback } from 'react';
 import Link from 'next/link';
-import { MapContainer, TileLayer, GeoJSON, ZoomControl } from 'react-leaflet';
+import { MapContainer, TileLayer, GeoJSON, ZoomControl, useMapEvents } from 'react-leaflet';
 import type { Feature, FeatureCollection, GeoJsonObject, GeoJsonProperties } from 'geojson';
 import L from 'leaflet';
 import { useRouter } from "next/navigation";
@@ -24,11 +24,29 @@ type StatsIndex = Record<number, WardStat>;
 
 import { API_BASE } from '@/lib/config';
 
+// Zoom bands the backend precomputes simplified geometry for (utils/geometry.py);
+// above the last band the full-resolution polygons are used.
+const ZOOM_BANDS = [10, 12, 14, 16];
+const INITIAL_ZOOM = 13;
+
+function bandFor(zoom: number): number {
+    return ZOOM_BANDS.find((b) => zoom <= b) ?? Math.round(zoom);
+}
+
+function ZoomWatcher({ onBand }: { onBand: (band: number) => void }) {
+    const map = useMapEvents({
+        zoomend: () => onBand(bandFor(map.getZoom())),
+    });
+    return null;
+}
+
 export default function WardMap() {
 
     const [geojson, setGeojson] = useState<FeatureCollection | null>(null);
     const [stats, setStats] = useState<StatsIndex>({});
     const [selected, setSelected] = useState<number | null>(null);
+    const [band, setBand] = useState<number>(bandFor(INITIAL_ZOOM));
+    const [geoBand, setGeoBand] = useState<number | null>(null);
     const [query, setQuery] = useState('');
     const mapRef = useRef<L.Map | null>(null);
     const geoRef = useRef<L.GeoJSON | null>(null);
@@ -36,27 +54,31 @@ export default function WardMap() {
     const router = useRouter();
 
     // ---------------- LOAD DATA ----------------
+    // One request: ward geometry for the current zoom band with each ward's
+    // stats in its properties; refetched when the band changes
     useEffect(() => {
+        let cancelled = false;
         const load = async () => {
-            const [gRes, sRes] = await Promise.all([
-                fetch(`${API_BASE}/api/wards/geojson`),
-                fetch(`${API_BASE}/api/wards/stats`)
-            ]);
-
-            if (!gRes.ok) throw new Error('GeoJSON failed');
-
+            const gRes = await fetch(`${API_BASE}/api/wards/map?zoom=${band}`);
+            if (!gRes.ok) throw new Error('Ward map failed');
             const g = (await gRes.json()) as FeatureCollection;
-            const s = (await sRes.json()) as WardStat[];
 
             const index: StatsIndex = {};
-            for (const w of s) index[w.wardNumber] = w;
+            for (const f of g.features) {
+                const w = f.properties as WardStat;
+                if (w.total > 0) index[w.wardNumber] = w;
+            }
 
-            setGeojson(g);
-            setStats(index);
+            if (!cancelled) {
+                setGeojson(g);
+                setStats(index);
+                setGeoBand(band);
+            }
         };
 
         load().catch(console.error);
-    }, []);
+        return () => { cancelled = true; };
+    }, [band]);
 
     // ---------------- FORCE LEAFLET RESIZE ----------------
     useEffect(() => {
@@ -275,7 +297,7 @@ export default function WardMap() {
                     }
                 }}
                 style={{ width: '100%', height: '100%' }}
-                zoom={10}
+                zoom={INITIAL_ZOOM}
                 minZoom={13}
                 maxZoom={20}
                 center={[19.076, 72.8777]}
@@ -287,8 +309,11 @@ export default function WardMap() {
                     url="https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png"
                 />
 
+                <ZoomWatcher onBand={setBand} />
+
                 {geojson && (
                     <GeoJSON
+                        key={geoBand ?? 'initial'}
                         ref={geoRef}
                         data={geojson as GeoJsonObject}
                         style={styleFn}